@@ -1,48 +1,144 @@
-from sqlalchemy.orm import Session
-from . import models, schemas
-from .database import mongo_db
+import base64
+import json
+from datetime import datetime
+from typing import Collection, List, Optional, Sequence, Tuple
+from sqlalchemy import insert, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from . import metrics, models, schemas
+from .services import archive_outbox, dedup, gazetteer, rollups
+from .services.response_cache import threats_cache
+
+# --- Pagination Cursors ---
+
+def encode_cursor(threat: models.Threat) -> str:
+    """
+    Builds an opaque cursor pointing just after the given threat in the
+    (created_at, id) ordering used by get_threats.
+    """
+    raw = json.dumps([threat.created_at.isoformat(), threat.id])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """
+    Decodes a cursor produced by encode_cursor. Raises ValueError if it is malformed.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, threat_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(created_at), int(threat_id)
+    except Exception as e:
+        raise ValueError(f"Invalid cursor: {cursor!r}") from e
 
 # --- PostgreSQL Functions ---
 
-def get_threats(db: Session, skip: int = 0, limit: int = 100):
+def filter_threats(
+    query,
+    region: Optional[str] = None,
+    category: Optional[str] = None,
+    created_after: Optional[datetime] = None,
+    created_before: Optional[datetime] = None,
+    region_ids: Optional[Collection[str]] = None,
+):
+    """
+    Applies the region/category/time-range filters of GET /api/threats/ to a query over threats.
+    `region_ids` (gazetteer ids, e.g. from a bbox lookup) keeps the threats normalized
+    to any of them; an empty collection matches nothing.
+    """
+    if region_ids is not None:
+        query = query.where(models.Threat.id.in_(
+            select(models.ThreatRegion.threat_id).where(models.ThreatRegion.region_id.in_(list(region_ids)))
+        ))
+    if region is not None:
+        query = query.where(models.Threat.region == region)
+    if category is not None:
+        query = query.where(models.Threat.category == category)
+    if created_after is not None:
+        query = query.where(models.Threat.created_at >= created_after)
+    if created_before is not None:
+        query = query.where(models.Threat.created_at < created_before)
+    return query
+
+async def get_threats(
+    db: AsyncSession,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    region: Optional[str] = None,
+    category: Optional[str] = None,
+    created_after: Optional[datetime] = None,
+    created_before: Optional[datetime] = None,
+    region_ids: Optional[Collection[str]] = None,
+):
     """
     Retrieves a list of threats from the PostgreSQL database, newest first.
+
+    Pages are addressed with a keyset `cursor` (see encode_cursor), so every page
+    is an index range scan regardless of depth. `skip` is still honoured for old
+    clients but gets slower the deeper it goes.
+    """
+    query = filter_threats(select(models.Threat), region, category, created_after, created_before, region_ids)
+
+    if cursor is not None:
+        cursor_created_at, cursor_id = decode_cursor(cursor)
+        # Row-value comparison so the database can seek straight into the composite index
+        query = query.where(
+            tuple_(models.Threat.created_at, models.Threat.id) < tuple_(cursor_created_at, cursor_id)
+        )
+    elif skip:
+        query = query.offset(skip)
+
+    query = query.order_by(models.Threat.created_at.desc(), models.Threat.id.desc()).limit(limit)
+    return (await db.scalars(query)).all()
+
+async def create_threats_bulk(db: AsyncSession, threats_data: Sequence[schemas.ThreatCreate]) -> List[models.Threat]:
     """
-    return db.query(models.Threat).order_by(models.Threat.created_at.desc()).offset(skip).limit(limit).all()
+    Creates a batch of threats in the PostgreSQL database in a single transaction.
+    Archiving to MongoDB happens in the background through the archive outbox
+    (see services/archive_outbox.py), so a MongoDB outage never loses a threat.
+    Returns the newly created threat objects, in the same order as `threats_data`.
+    """
+    if not threats_data:
+        return []
+
+    rows = [
+        {
+            "title": threat_data.title,
+            "region": threat_data.region,
+            "category": threat_data.category,
+            "description": threat_data.description,
+            "potential_impact": threat_data.potential_impact,
+            "source_urls": threat_data.source_urls,
+            "date_mentioned": threat_data.date_mentioned,
+        }
+        for threat_data in threats_data
+    ]
+    with metrics.stage("postgres_commit"):
+        # One multi-row INSERT ... RETURNING gives us the ids and created_at of the whole batch
+        db_threats = (await db.scalars(
+            insert(models.Threat).returning(models.Threat, sort_by_parameter_order=True),
+            rows,
+        )).all()
+        # Index the new threats for duplicate detection in the same transaction
+        dedup.detector.add_fingerprints(db, db_threats)
+        # Count them into the analytics rollups, also in the same transaction
+        await rollups.add_threats(db, db_threats)
+        # Map the free-text regions to gazetteer ids for geographic queries
+        gazetteer.add_threat_regions(db, db_threats)
+        # Queue the MongoDB archive write; it commits (or rolls back) together with the threats
+        archive_outbox.enqueue(db, db_threats)
+        await db.commit()
+    # New data: cached /api/threats/ responses are now stale
+    threats_cache.bump_version()
+
+    # --- MongoDB Logging ---
+    # The outbox rows were committed with the threats; wake the flusher to archive them
+    archive_outbox.flusher.notify()
+
+    return db_threats
 
-def create_threat(db: Session, threat_data: schemas.ThreatCreate):
+async def create_threat(db: AsyncSession, threat_data: schemas.ThreatCreate):
     """
-    Creates a new threat in the PostgreSQL database and logs the source URLs in MongoDB.
+    Creates a new threat in the PostgreSQL database and queues it for the MongoDB archive.
     Returns the newly created threat object.
     """
-    # Create the main threat record in PostgreSQL
-    db_threat = models.Threat(
-        title=threat_data.title,
-        region=threat_data.region,
-        category=threat_data.category,
-        description=threat_data.description,
-        potential_impact=threat_data.potential_impact,  # New field for potential impact
-        source_urls=threat_data.source_urls,  # Optional URL for more information
-        date_mentioned=threat_data.date_mentioned  # Assuming this field exists in the Threat model
-    )
-    db.add(db_threat)
-    db.commit()
-    db.refresh(db_threat)
-
-    # --- MongoDB Logging (Example) ---
-    # Log the full report, including source URLs, to MongoDB for archival
-    log_entry = {
-        "postgres_id": db_threat.id,
-        "title": threat_data.title,
-        "source_urls": threat_data.source_urls,
-        "created_at": db_threat.created_at,
-        "region": threat_data.region,
-        "category": threat_data.category,
-        "description": threat_data.description,
-        "potential_impact": threat_data.potential_impact,  # New field for potential impact
-        "date_mentioned": threat_data.date_mentioned  # Assuming this field exists in the Threat model
-    }
-    # We use 'await' because Motor is an async library
-    mongo_db.threat_logs.insert_one(log_entry)
-
-    return db_threat
\ No newline at end of file
+    return (await create_threats_bulk(db, [threat_data]))[0]
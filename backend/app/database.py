@@ -1,9 +1,7 @@
 from dotenv import load_dotenv
-from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
-from pymongo.mongo_client import MongoClient
-from pymongo.server_api import ServerApi
 import os
 
 load_dotenv()
@@ -11,8 +9,35 @@ load_dotenv()
 # It reads the connection URL from the .env file
 SQLALCHEMY_DATABASE_URL = os.getenv("DATABASE_URL")
 
-engine = create_engine(SQLALCHEMY_DATABASE_URL)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Async drivers for the plain URLs people put in .env
+ASYNC_DRIVERS = {
+    "postgres": "postgresql+asyncpg",
+    "postgresql": "postgresql+asyncpg",
+    "postgresql+psycopg2": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+def to_async_url(database_url: str):
+    """
+    Rewrites a database URL to use an async driver (asyncpg / aiosqlite),
+    translating the libpq-only query parameters asyncpg does not understand.
+    """
+    url = make_url(database_url)
+    if url.drivername not in ASYNC_DRIVERS:
+        return url
+    url = url.set(drivername=ASYNC_DRIVERS[url.drivername])
+    if url.drivername == "postgresql+asyncpg":
+        query = dict(url.query)
+        if "sslmode" in query:
+            query["ssl"] = query.pop("sslmode")
+        query.pop("channel_binding", None)
+        url = url.set(query=query)
+    return url
+
+engine = create_async_engine(to_async_url(SQLALCHEMY_DATABASE_URL), pool_pre_ping=True)
+# expire_on_commit=False keeps freshly inserted rows readable after commit
+# without a reload query per object (which AsyncSession can't do implicitly anyway)
+SessionLocal = async_sessionmaker(bind=engine, autoflush=False, expire_on_commit=False)
 
 # This is a base class that our database models will inherit from
 Base = declarative_base()
@@ -21,15 +46,41 @@ Base = declarative_base()
 # --- MongoDB Connection (for unstructured data/logs) ---
 MONGO_DATABASE_URL = os.getenv("MONGO_URL")
 
-# Create a client to connect to MongoDB
-mongo_client =  MongoClient(MONGO_DATABASE_URL, server_api=ServerApi('1'))
+# The client is created on first use: read-only requests (and serverless cold starts)
+# never pay for importing Motor or setting up the connection pool
+_mongo_client = None
+_mongo_db = None
+
+def get_mongo_db():
+    """
+    Returns the MongoDB database (e.g., "maritime_threat_monitor"), connecting on first use.
+    """
+    global _mongo_client, _mongo_db
+    if _mongo_db is None:
+        from motor.motor_asyncio import AsyncIOMotorClient
+        from pymongo.server_api import ServerApi
+
+        # Create an async (Motor) client to connect to MongoDB, so archive writes never block the event loop
+        _mongo_client = AsyncIOMotorClient(MONGO_DATABASE_URL, server_api=ServerApi('1'))
+        _mongo_db = _mongo_client.maritime_threat_monitor
+    return _mongo_db
+
+def use_mongo_db(db):
+    """
+    Replaces the MongoDB database, e.g. with a local stand-in for benchmarks.
+    """
+    global _mongo_db
+    _mongo_db = db
 
-# Get a specific database from MongoDB (e.g., "threat_db")
-mongo_db = mongo_client.maritime_threat_monitor
+def close_mongo_client():
+    global _mongo_client, _mongo_db
+    if _mongo_client is not None:
+        _mongo_client.close()
+    _mongo_client = _mongo_db = None
 
 # Send a ping to confirm a successful connection
 #try:
-#    mongo_client.admin.command('ping')
+#    await get_mongo_db().client.admin.command('ping')
 #    print("Pinged your deployment. You successfully connected to MongoDB!")
 #except Exception as e:
-#    print(e)
\ No newline at end of file
+#    print(e)
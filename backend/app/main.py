@@ -1,22 +1,34 @@
 import asyncio
 from contextlib import asynccontextmanager # Import this!
-from fastapi import FastAPI, Depends, HTTPException, status, Header
+from fastapi import FastAPI, Depends, HTTPException, status, Header, Query, Response
+import time
 import os
 from fastapi.middleware.cors import CORSMiddleware
-from sqlalchemy.orm import Session
-from apscheduler.schedulers.asyncio import AsyncIOScheduler
-from apscheduler.triggers.cron import CronTrigger
-from typing import List
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from pydantic import TypeAdapter
+from typing import List, Literal, Optional, Set
+from datetime import datetime
 
-from . import crud, models, schemas
-from .database import SessionLocal, engine
-from .services import rag_agent
-from .services.teams_notifier import send_threat_to_teams
+from . import crud, metrics, models, schemas
+from .database import SessionLocal, engine, close_mongo_client
+from .services.notification_hub import NotificationHub, SlowConsumerError
+from .services.response_cache import threats_cache, etag_matches
+from .services import archive_outbox, export, gazetteer, rollups, search
+from .services.discovery_jobs import DiscoveryJobManager, RunStats, RUNNING
 
 
 
 SECRET_KEY = os.getenv("API_SECRET_KEY")
 
+# Read-only deployments never write: no schema sync at startup, no discovery runs
+READ_ONLY_MODE = os.getenv("READ_ONLY_MODE", "false").lower() == "true"
+# The in-process cron needs a long-running server. On serverless platforms (Vercel sets VERCEL=1)
+# discovery is triggered externally through /api/discover-threats instead.
+ENABLE_SCHEDULER = os.getenv(
+    "ENABLE_SCHEDULER", "false" if READ_ONLY_MODE or os.getenv("VERCEL") else "true"
+).lower() == "true"
+
 async def verify_secret_key(x_api_key: str = Header(..., description="API Secret Key")):
     """
     Dependency to verify the secret key provided in the X-API-Key header.
@@ -29,52 +41,102 @@ async def verify_secret_key(x_api_key: str = Header(..., description="API Secret
     return x_api_key
 
 
-# This queue will hold new threats to be sent to clients as notifications
-notification_queue = asyncio.Queue()
+# This hub broadcasts new threats to every connected SSE client
+notification_hub = NotificationHub(
+    replay_window=int(os.getenv("SSE_REPLAY_WINDOW", "1000")),
+    subscriber_buffer_size=int(os.getenv("SSE_SUBSCRIBER_BUFFER", "100")),
+    slow_consumer_policy=os.getenv("SSE_SLOW_CONSUMER_POLICY", "drop_oldest"),
+)
+
+# Expose the hub's live state on /metrics (read at scrape time)
+metrics.registry.set_function("maritime_sse_subscribers", lambda: notification_hub.subscriber_count)
+metrics.registry.set_function("maritime_sse_dropped_events_total", lambda: notification_hub.dropped_events)
 
 # Global scheduler instance (will be initialized in lifespan)
 # We need to declare it here so it's accessible within `lifespan` and can be started/stopped
-scheduler: AsyncIOScheduler = None 
+scheduler = None
 
-# --- Database Dependency (remains the same) ---
-def get_db():
-    db = SessionLocal()
-    try:
+# --- Database Dependency ---
+async def get_db():
+    async with SessionLocal() as db:
         yield db
-    finally:
-        db.close()
 
 # --- Background Task (The Agent Runner - remains the same) ---
-async def run_threat_discovery_and_save():
+async def run_threat_discovery_and_save(stats: Optional[RunStats] = None, full_rescan: bool = False) -> RunStats:
+    """
+    Runs the agent and saves, broadcasts and notifies every new threat it finds.
+    Only sources not processed by earlier runs are searched, unless `full_rescan` is set.
+    Counts and per-stage timings are collected on `stats` (see DiscoveryJobManager).
+    """
+    stats = stats if stats is not None else RunStats()
+    # The agent stack (LangChain, Gemini, Tavily) and the notifier are only imported
+    # when discovery actually runs, keeping them off the cold-start path of read requests
+    from .services import rag_agent, dedup
+    from .services.teams_notifier import send_threat_to_teams
+
     print("Scheduler triggered: Starting RAG agent to discover threats...")
-    db: Session = next(get_db()) # Use next() to get a session outside a request context
+    started_at = time.perf_counter()
+    found = saved = 0
+    status_label = "failed"
     try:
-        threat_reports = await rag_agent.find_maritime_threats()
-        if not threat_reports:
-            print("Agent finished: No new threats found.")
-            return
-
-        for report in threat_reports:
-            # Here you should add logic to check if the threat is a duplicate
-            # For now, we'll create all of them.
-            new_threat_orm = crud.create_threat(db=db, threat_data=report)
-            #print(f"New threat saved to DB: {new_threat_orm.title}")
-            
-            # Convert the DB object to a Pydantic schema for the notification
-            # No from_orm needed if schema is created directly, but if Threat.from_orm
-            # handles ORM to Pydantic conversion, keep it.
-            # Assuming schemas.Threat.from_orm is correct from your pydantic warning fixes
-            new_threat_schema = schemas.Threat.model_validate(new_threat_orm) 
-            # Put the new threat into the notification queue
-            await notification_queue.put(new_threat_schema)
-
-            # --- ADD THIS LINE ---
-            # Send the notification to the Teams channel            
-            await send_threat_to_teams(new_threat_schema)
-            # --------------------
-
+        # Each report is handled as soon as the agent has finished writing it
+        async for report in rag_agent.stream_maritime_threats(full_rescan=full_rescan, stats=stats):
+            found += 1
+            stats.found = found
+            # Open our own session since we are outside a request context
+            async with SessionLocal() as db:
+                # Drop reports we have already saved (same source or near-identical text)
+                with metrics.stage("dedup"), stats.stage("dedup"):
+                    is_new = bool(await dedup.detector.filter_new(db, [report]))
+                if not is_new:
+                    stats.duplicates += 1
+                    metrics.REPORTS.inc(outcome="duplicate")
+                    continue
+                with stats.stage("save"):
+                    new_threat_orm = await crud.create_threat(db=db, threat_data=report)
+            saved += 1
+            stats.saved = saved
+            metrics.REPORTS.inc(outcome="saved")
+
+            with stats.stage("notify"):
+                # Convert the DB object to a Pydantic schema for the notification
+                new_threat_schema = schemas.Threat.model_validate(new_threat_orm)
+                # Broadcast the new threat to all connected clients (serialized once)
+                notification_hub.publish(new_threat_schema.model_dump_json())
+
+                # Queue the notification for the Teams channel (sent in the background)
+                await send_threat_to_teams(new_threat_schema)
+        status_label = "success"
     finally:
-        db.close()
+        elapsed = time.perf_counter() - started_at
+        # Whatever time wasn't spent on our own stages was spent waiting for the agent (search + LLM)
+        own_seconds = sum(stage["seconds"] for stage in stats.stages.values())
+        stats.stages["agent"] = {"count": 1, "seconds": max(0.0, elapsed - own_seconds)}
+        metrics.DISCOVERY_RUNS.inc(status=status_label)
+        metrics.DISCOVERY_RUN_SECONDS.observe(elapsed)
+        metrics.REPORTS_PER_RUN.observe(found, kind="found")
+        metrics.REPORTS_PER_RUN.observe(saved, kind="saved")
+
+    if not found:
+        print("Agent finished: No new threats found.")
+    else:
+        print(f"Agent finished: saved {saved} new threats, {found - saved} of {found} reports were duplicates.")
+    return stats
+
+# Runs discovery in the background, one run at a time (manual triggers and the cron job share it)
+discovery_jobs = DiscoveryJobManager(run_threat_discovery_and_save, SessionLocal)
+
+
+def create_schema(connection):
+    """
+    Creates the database tables and indexes. Runs on a sync connection via run_sync().
+    """
+    models.Base.metadata.create_all(bind=connection)
+    # create_all() skips indexes on tables that already exist, so add any new ones here
+    for index in models.Threat.__table__.indexes:
+        index.create(bind=connection, checkfirst=True)
+    # Full-text search column and GIN index (PostgreSQL only)
+    search.create_search_index(connection)
 
 
 # --- Lifespan Event Handler ---
@@ -85,35 +147,57 @@ async def lifespan(app: FastAPI):
     
     # 1. Create database tables (if they don't exist)
     # This happens *once* when the application starts
-    print("Creating database tables...")
-    models.Base.metadata.create_all(bind=engine)
-    print("Database tables created/verified.")
+    if not READ_ONLY_MODE:
+        print("Creating database tables...")
+        async with engine.begin() as conn:
+            await conn.run_sync(create_schema)
+        print("Database tables created/verified.")
 
     # 2. Initialize and start the scheduler
     # Access the global scheduler variable
-    global scheduler 
-    scheduler = AsyncIOScheduler()
-    #scheduler.add_job(run_threat_discovery_and_save, 'interval', minutes=1)
-    scheduler.add_job(run_threat_discovery_and_save,   trigger=CronTrigger(hour=6, minute=0, timezone='UTC'))
+    global scheduler
+    if ENABLE_SCHEDULER:
+        from apscheduler.schedulers.asyncio import AsyncIOScheduler
+        from apscheduler.triggers.cron import CronTrigger
 
-    scheduler.start()
-    print("Scheduler started. RAG agent will run periodically.")
+        scheduler = AsyncIOScheduler()
+        #scheduler.add_job(run_threat_discovery_and_save, 'interval', minutes=1)
+        scheduler.add_job(discovery_jobs.trigger, kwargs={"trigger": "schedule"}, trigger=CronTrigger(hour=6, minute=0, timezone='UTC'))
 
-    print("Pinged your deployment. You successfully connected to MongoDB!") # Your MongoDB message
+        scheduler.start()
+        print("Scheduler started. RAG agent will run periodically.")
+    else:
+        print("Scheduler disabled (serverless or read-only mode).")
+
+    # 3. Archive threats left in the MongoDB outbox by an earlier process
+    if not READ_ONLY_MODE:
+        archive_outbox.flusher.start()
+
+    # The Teams dispatcher, agent and MongoDB client start on first use
 
     print("Application startup complete.")
     yield # Application starts serving requests after this point
 
     # --- Shutdown Logic (runs when the application is gracefully shutting down) ---
     print("Application shutdown initiated.")
-    if scheduler.running:
+    if scheduler is not None and scheduler.running:
         scheduler.shutdown()
         print("Scheduler stopped.")
-    
-    # Add any other cleanup logic here, e.g., closing MongoDB connection
-    # if it's managed directly in this file and needs explicit closing.
-    # For SQLAlchemy, the engine usually manages connections, but if you had a
-    # global MongoDB client, you'd close it here.
+
+    # Stop a discovery run still in progress (it is recorded as cancelled)
+    await discovery_jobs.stop()
+
+    # Give queued Teams notifications a chance to go out (if any were ever sent)
+    if not READ_ONLY_MODE:
+        from .services.teams_notifier import dispatcher as teams_dispatcher
+        await teams_dispatcher.stop()
+
+    # Flush what is still waiting for the MongoDB archive (the rest goes out on the next start)
+    await archive_outbox.flusher.stop()
+
+    # Close the database connection pool and the MongoDB client
+    await engine.dispose()
+    close_mongo_client()
 
     print("Application shutdown complete.")
 
@@ -121,6 +205,10 @@ async def lifespan(app: FastAPI):
 # Initialize FastAPI application with the lifespan handler
 app = FastAPI(title="Maritime Geopolitical Threats API", lifespan=lifespan)
 
+# Request counts and latency per route, served on /metrics
+if metrics.registry.enabled:
+    app.add_middleware(metrics.MetricsMiddleware)
+
 # --- CORS Middleware (remains the same) ---
 app.add_middleware(
     CORSMiddleware,
@@ -128,6 +216,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag"],  # Lets browser clients read the pagination cursor and ETag
 )
 
 # --- API Endpoints (remains the same) ---
@@ -136,47 +225,287 @@ app.add_middleware(
 def read_root():
     return {"message": "Welcome to the Maritime Threats API"}
 
+# Serializes a page of ORM rows straight to JSON bytes (pydantic-core, no intermediate dicts)
+threat_list_adapter = TypeAdapter(List[schemas.Threat])
+
+def resolve_region_ids(bbox: Optional[str], near: Optional[str], radius_km: float) -> Optional[Set[str]]:
+    """
+    Gazetteer regions matching the bbox and/or point-radius query parameters
+    (both must match when both are given), or None when neither is set.
+    Raises ValueError for malformed coordinates.
+    """
+    if bbox is None and near is None:
+        return None
+    places = gazetteer.get_gazetteer()
+    region_ids = None
+    if bbox is not None:
+        region_ids = places.regions_in_bbox(gazetteer.parse_bbox(bbox))
+    if near is not None:
+        nearby = places.regions_near(*gazetteer.parse_point(near), radius_km)
+        region_ids = nearby if region_ids is None else region_ids & nearby
+    return region_ids
+
 @app.get("/api/threats/", response_model=List[schemas.Threat])
-def get_all_threats(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+async def get_all_threats(
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    region: Optional[str] = None,
+    category: Optional[str] = None,
+    created_after: Optional[datetime] = None,
+    created_before: Optional[datetime] = None,
+    bbox: Optional[str] = Query(None, description="min_lon,min_lat,max_lon,max_lat (WGS84)"),
+    near: Optional[str] = Query(None, description="lat,lon; combine with radius_km"),
+    radius_km: float = Query(100, gt=0, le=20000),
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Endpoint to get a list of all threats from the database, newest first.
+    When more results are available, the cursor for the next page is returned
+    in the X-Next-Cursor header; pass it back as `cursor` to continue.
+    `bbox` and `near`/`radius_km` keep the threats in gazetteer regions
+    (see GET /api/regions) intersecting the box or circle.
+    Responses are cached in memory until the next insert and carry an ETag,
+    so If-None-Match requests for unchanged data get a 304 without a database query.
+    """
+    cache_key = (skip, limit, cursor, region, category, created_after, created_before, bbox, near, near and radius_km)
+    cached = threats_cache.get(cache_key)
+    if cached is None:
+        version = threats_cache.version
+        try:
+            region_ids = resolve_region_ids(bbox, near, radius_km)
+            threats = await crud.get_threats(
+                db,
+                skip=skip,
+                limit=limit,
+                cursor=cursor,
+                region=region,
+                category=category,
+                created_after=created_after,
+                created_before=created_before,
+                region_ids=region_ids,
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+        headers = {}
+        if threats and len(threats) == limit:
+            headers["X-Next-Cursor"] = crud.encode_cursor(threats[-1])
+        body = threat_list_adapter.dump_json(threat_list_adapter.validate_python(threats, from_attributes=True))
+        cached = threats_cache.put(cache_key, body, headers, version=version)
+
+    headers = {**cached.headers, "ETag": cached.etag, "Cache-Control": "no-cache"}
+    if etag_matches(if_none_match, cached.etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=cached.body, media_type="application/json", headers=headers)
+
+@app.get("/api/threats/search", response_model=List[schemas.ThreatSearchResult])
+async def search_threats(
+    q: str = Query(..., min_length=1, description="Search terms, e.g. 'houthi drone attack'"),
+    limit: int = Query(20, ge=1, le=100),
+    skip: int = Query(0, ge=0),
+    region: Optional[str] = None,
+    category: Optional[str] = None,
+    created_after: Optional[datetime] = None,
+    created_before: Optional[datetime] = None,
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Ranked full-text search over title, description, potential impact and region,
+    best match first. Matched terms are wrapped in <mark> in `highlights`; the rest of
+    each snippet is HTML-escaped, since titles and descriptions come from the web.
+    """
+    hits = await search.search_threats(
+        db,
+        q,
+        limit=limit,
+        offset=skip,
+        region=region,
+        category=category,
+        created_after=created_after,
+        created_before=created_before,
+    )
+    return [
+        schemas.ThreatSearchResult(
+            **schemas.Threat.model_validate(hit.threat).model_dump(), rank=hit.rank, highlights=hit.highlights
+        )
+        for hit in hits
+    ]
+
+@app.get("/api/threats/stats", response_model=List[schemas.ThreatStatsBucket], response_model_exclude_none=True)
+async def get_threat_stats(
+    bucket: Literal["day", "week", "month"] = "day",
+    group_by: Optional[str] = Query(None, description="Comma-separated dimensions: region, category"),
+    region: Optional[str] = None,
+    category: Optional[str] = None,
+    created_after: Optional[datetime] = None,
+    created_before: Optional[datetime] = None,
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Threat counts per day, week (starting Monday) or month, in UTC, optionally broken
+    down by region and/or category. Served from the rollup table, so the cost
+    depends on the number of buckets returned, not on the number of threats.
+    """
+    dimensions = [dimension.strip() for dimension in group_by.split(",") if dimension.strip()] if group_by else []
+    unknown = set(dimensions) - set(rollups.DIMENSIONS)
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown group_by dimension(s): {', '.join(sorted(unknown))}. Use: {', '.join(rollups.DIMENSIONS)}.",
+        )
+    return await rollups.get_stats(
+        db,
+        bucket=bucket,
+        group_by=list(dict.fromkeys(dimensions)),
+        region=region,
+        category=category,
+        created_after=created_after,
+        created_before=created_before,
+    )
+
+@app.get("/api/regions", response_model=List[schemas.MaritimeRegion])
+def get_regions():
+    """
+    The maritime regions and chokepoints of the bundled gazetteer. Threat regions
+    are normalized to these ids at ingest; bbox/near queries resolve to them.
+    """
+    return [
+        schemas.MaritimeRegion(id=region.id, name=region.name, kind=region.kind, bbox=list(region.bbox), aliases=list(region.aliases))
+        for region in gazetteer.get_gazetteer().regions.values()
+    ]
+
+@app.get("/api/threats/export")
+async def export_threats(
+    format: Literal["ndjson", "csv", "parquet"] = "ndjson",
+    region: Optional[str] = None,
+    category: Optional[str] = None,
+    created_after: Optional[datetime] = None,
+    created_before: Optional[datetime] = None,
+):
     """
-    Endpoint to get a list of all threats from the database.
+    Streams every matching threat, oldest first, as NDJSON, CSV or Parquet.
+    Rows are read through a server-side cursor and written out batch by batch
+    (one Parquet row group per batch), so memory stays flat however large the
+    history is. Parquet needs the optional pyarrow package on the server.
     """
-    threats = crud.get_threats(db, skip=skip, limit=limit)
-    return threats
+    if format == "parquet" and not export.parquet_available():
+        # Checked up front: once streaming has started the status can no longer change
+        raise HTTPException(
+            status_code=status.HTTP_501_NOT_IMPLEMENTED,
+            detail="Parquet export is not available: the server does not have pyarrow installed.",
+        )
+    filters = {"region": region, "category": category, "created_after": created_after, "created_before": created_before}
+    return StreamingResponse(
+        export.stream_export(SessionLocal, format, **filters),
+        media_type=export.MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="threats.{format}"'},
+    )
+
+@app.get("/metrics", include_in_schema=False)
+def get_metrics():
+    """
+    Pipeline and request metrics in the Prometheus text format.
+    """
+    if not metrics.registry.enabled:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Metrics are disabled.")
+    return Response(content=metrics.registry.render(), media_type=metrics.CONTENT_TYPE)
 
 # --- Real-Time Notification Endpoint (remains the same) ---
 from sse_starlette.sse import EventSourceResponse
-import json
 
-async def notification_generator():
+async def notification_generator(last_event_id: Optional[int] = None):
     """
-    Yields new threats from the queue as they arrive.
-    This keeps the connection open with the client.
+    Yields new threats from the hub as they are published, replaying the ones
+    missed since `last_event_id` first. This keeps the connection open with the client.
     """
-    while True:
-        try:
-            # Wait for a new threat to appear in the queue
-            new_threat = await notification_queue.get()
-            # Send the threat data as a JSON string
-            yield json.dumps(new_threat.dict())
-        except asyncio.CancelledError:
-            # The client disconnected
-            print("Client disconnected.")
-            break
+    try:
+        async for event in notification_hub.subscribe(last_event_id):
+            # The event ID lets the browser resume with Last-Event-ID after a reconnect
+            yield {"id": str(event.id), "data": event.data}
+    except SlowConsumerError as e:
+        # The client fell too far behind; it will reconnect and replay from its last ID
+        print(f"Disconnecting slow SSE client: {e}")
+    except asyncio.CancelledError:
+        # The client disconnected
+        print("Client disconnected.")
+        raise
 
 @app.get("/api/notifications")
-async def stream_notifications():
+async def stream_notifications(last_event_id: Optional[str] = Header(None, alias="Last-Event-ID")):
     """
     Endpoint for clients to subscribe to real-time threat notifications.
+    Reconnecting clients get the threats they missed replayed from memory.
     """
-    return EventSourceResponse(notification_generator())
+    try:
+        resume_from = int(last_event_id) if last_event_id else None
+    except ValueError:
+        resume_from = None
+    return EventSourceResponse(notification_generator(resume_from))
 
 
-@app.get("/api/discover-threats", dependencies=[Depends(verify_secret_key)])
-async def discover_threats():
+def ensure_discovery_enabled():
+    if READ_ONLY_MODE:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Threat discovery is disabled in read-only mode.",
+        )
+
+
+@app.get(
+    "/api/discover-threats",
+    status_code=status.HTTP_202_ACCEPTED,
+    response_model=schemas.DiscoveryRunStatus,
+    dependencies=[Depends(verify_secret_key), Depends(ensure_discovery_enabled)],
+)
+async def discover_threats(response: Response, wait: bool = False, full_rescan: bool = False):
     """
     Endpoint to trigger the threat discovery process.
     Protected by a secret key.
+
+    Returns 202 with the run ID right away; the run continues in the background.
+    If a run is already in progress, the trigger joins it instead of starting another.
+    Serverless callers can pass `wait=true` to keep the request open until the run ends.
+    Runs are incremental; `full_rescan=true` also re-reads sources earlier runs processed.
+    """
+    run, started = await discovery_jobs.trigger(full_rescan=full_rescan)
+    if wait:
+        run = await discovery_jobs.wait(run.id)
+    response.headers["Location"] = f"/api/discover-threats/{run.id}"
+    result = schemas.DiscoveryRunStatus.model_validate(run)
+    result.message = "Threat discovery initiated." if started else "Threat discovery is already running; joined the current run."
+    return result
+
+
+@app.get(
+    "/api/discover-threats/{run_id}",
+    response_model=schemas.DiscoveryRunStatus,
+    dependencies=[Depends(verify_secret_key)],
+)
+async def get_discovery_run(run_id: str):
+    """
+    Status, duration and per-stage results of a discovery run.
+    """
+    run = await discovery_jobs.get(run_id)
+    if run is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Discovery run not found.")
+    return run
+
+
+@app.delete(
+    "/api/discover-threats/{run_id}",
+    status_code=status.HTTP_202_ACCEPTED,
+    response_model=schemas.DiscoveryRunStatus,
+    dependencies=[Depends(verify_secret_key), Depends(ensure_discovery_enabled)],
+)
+async def cancel_discovery_run(run_id: str):
+    """
+    Cancels a discovery run in progress. Threats saved before the cancel are kept.
     """
-    await run_threat_discovery_and_save()
-    return {"message": "Threat discovery initiated."}
\ No newline at end of file
+    run = await discovery_jobs.cancel(run_id)
+    if run is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Discovery run not found.")
+    if run.status != RUNNING and not run.cancel_requested:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=f"Discovery run already {run.status}.")
+    return run
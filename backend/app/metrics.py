@@ -0,0 +1,314 @@
+import math
+import os
+import time
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+# --- Configuration ---
+# With METRICS_ENABLED=false every inc()/observe()/timer is a single flag check and /metrics returns 404
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() != "false"
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)) + "}"
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value))
+
+
+class _Metric(ABC):
+    kind = "untyped"
+
+    def __init__(self, registry: "Registry", name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.registry = registry
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    @abstractmethod
+    def samples(self) -> List[Tuple[str, Sequence[str], Sequence[str], float]]:
+        """(sample name, label names, label values, value) for every series of the metric."""
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {_escape(self.documentation)}", f"# TYPE {self.name} {self.kind}"]
+        for name, labelnames, labelvalues, value in self.samples():
+            lines.append(f"{name}{_format_labels(labelnames, labelvalues)} {_format_value(value)}")
+        return lines
+
+
+class Counter(_Metric):
+    """Monotonically increasing count, optionally read from a callback at scrape time."""
+    kind = "counter"
+
+    def __init__(self, registry, name, documentation, labelnames=(), function: Optional[Callable[[], float]] = None):
+        super().__init__(registry, name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+        self._function = function
+
+    def inc(self, amount: float = 1.0, **labels):
+        if not self.registry.enabled:
+            return
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def samples(self):
+        if self._function is not None:
+            return [(self.name, (), (), self._function())]
+        return [(self.name, self.labelnames, key, value) for key, value in self._values.items()]
+
+
+class Gauge(Counter):
+    """Value that goes up and down, optionally read from a callback at scrape time."""
+    kind = "gauge"
+
+    def set(self, value: float, **labels):
+        if not self.registry.enabled:
+            return
+        self._values[self._key(labels)] = value
+
+    def dec(self, amount: float = 1.0, **labels):
+        self.inc(-amount, **labels)
+
+
+class _Timer:
+    __slots__ = ("histogram", "labels", "start")
+
+    def __init__(self, histogram: "Histogram", labels: Dict[str, str]):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.histogram.observe(time.perf_counter() - self.start, **self.labels)
+
+    async def __aenter__(self):
+        return self.__enter__()
+
+    async def __aexit__(self, *exc_info):
+        self.__exit__(*exc_info)
+
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        pass
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        pass
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class Histogram(_Metric):
+    """Distribution of observed values (e.g. durations in seconds) over fixed buckets."""
+    kind = "histogram"
+
+    def __init__(self, registry, name, documentation, labelnames=(), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(registry, name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # label values -> [per-bucket counts (last one is +Inf), sum, count]
+        self._values: Dict[LabelValues, list] = {}
+
+    def observe(self, value: float, **labels):
+        if not self.registry.enabled:
+            return
+        key = self._key(labels)
+        state = self._values.get(key)
+        if state is None:
+            state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        state[0][bisect_left(self.buckets, value)] += 1
+        state[1] += value
+        state[2] += 1
+
+    def time(self, **labels):
+        """Context manager (sync or async) observing the duration of its block."""
+        if not self.registry.enabled:
+            return _NULL_TIMER
+        return _Timer(self, labels)
+
+    def count(self, **labels) -> int:
+        state = self._values.get(self._key(labels))
+        return state[2] if state else 0
+
+    def samples(self):
+        samples = []
+        bucket_labels = self.labelnames + ("le",)
+        for key, (counts, total, count) in self._values.items():
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (math.inf,), counts):
+                cumulative += bucket_count
+                samples.append((f"{self.name}_bucket", bucket_labels, key + (_format_value(bound),), cumulative))
+            samples.append((f"{self.name}_sum", self.labelnames, key, total))
+            samples.append((f"{self.name}_count", self.labelnames, key, count))
+        return samples
+
+
+class Registry:
+    """
+    Minimal in-process metrics registry rendering the Prometheus text format.
+    Meant for a single event loop: updates are plain dict operations without locks.
+    """
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self._metrics: Dict[str, _Metric] = {}
+
+    def _register(self, metric: _Metric) -> _Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name!r} is already registered.")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, documentation, labelnames=(), function=None) -> Counter:
+        return self._register(Counter(self, name, documentation, labelnames, function))
+
+    def gauge(self, name, documentation, labelnames=(), function=None) -> Gauge:
+        return self._register(Gauge(self, name, documentation, labelnames, function))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(self, name, documentation, labelnames, buckets))
+
+    def set_function(self, name: str, function: Callable[[], float]):
+        """Makes a registered gauge/counter report `function()` at scrape time."""
+        self._metrics[name]._function = function
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry(enabled=METRICS_ENABLED)
+
+
+# --- Discovery Pipeline ---
+STAGE_SECONDS = registry.histogram(
+    "maritime_stage_duration_seconds",
+    "Duration of each pipeline stage: query, search, llm, parse, dedup, postgres_commit, mongo_insert, webhook.",
+    ["stage"],
+)
+DISCOVERY_RUN_SECONDS = registry.histogram(
+    "maritime_discovery_run_duration_seconds", "Wall time of a whole discovery run.",
+    buckets=(10.0, 30.0, 60.0, 120.0, 300.0, 600.0, 1200.0, 1800.0, 3600.0),
+)
+DISCOVERY_RUNS = registry.counter("maritime_discovery_runs_total", "Discovery runs by outcome.", ["status"])
+DISCOVERY_TRIGGERS = registry.counter(
+    "maritime_discovery_triggers_total", "Discovery triggers that started a run or joined the one in progress.", ["result"]
+)
+REPORTS_PER_RUN = registry.histogram(
+    "maritime_discovery_reports_per_run", "Reports per discovery run, found by the agent and saved after dedup.",
+    ["kind"], buckets=(0, 1, 2, 5, 10, 20, 50, 100, 200),
+)
+REPORTS = registry.counter("maritime_discovery_reports_total", "Reports from the agent by outcome.", ["outcome"])
+QUERY_FAILURES = registry.counter("maritime_discovery_query_failures_total", "Failed discovery sub-queries.", ["reason"])
+DISCOVERY_SOURCES = registry.counter(
+    "maritime_discovery_sources_total",
+    "Search results passed to the LLM (processed) or dropped before it (skipped_ledger, skipped_watermark).",
+    ["outcome"],
+)
+PARSE_FAILURES = registry.counter(
+    "maritime_discovery_parse_failures_total", "Report objects in LLM answers that could not be parsed or validated."
+)
+
+# --- Teams Notifications ---
+WEBHOOK_REQUESTS = registry.counter(
+    "maritime_teams_webhook_requests_total", "Teams webhook requests by HTTP status (or 'error').", ["status"]
+)
+WEBHOOK_RETRIES = registry.counter("maritime_teams_webhook_retries_total", "Teams webhook retries.")
+NOTIFICATIONS = registry.counter(
+    "maritime_teams_notifications_total", "Threats delivered to (or given up on for) Teams.", ["outcome"]
+)
+TEAMS_QUEUE_DEPTH = registry.gauge("maritime_teams_queue_depth", "Threats waiting in the Teams dispatcher queue.")
+
+# --- MongoDB Archive Outbox ---
+ARCHIVE_OUTBOX_PENDING = registry.gauge("maritime_archive_outbox_pending", "Threats waiting to be archived to MongoDB.")
+ARCHIVE_OUTBOX_LAG = registry.gauge(
+    "maritime_archive_outbox_lag_seconds", "Age of the oldest threat waiting to be archived (0 when the outbox is empty)."
+)
+ARCHIVED = registry.counter(
+    "maritime_archive_documents_total", "Threat documents written to the MongoDB archive by outcome.", ["outcome"]
+)
+ARCHIVE_FLUSH_FAILURES = registry.counter("maritime_archive_flush_failures_total", "Failed archive outbox flushes.")
+
+# --- SSE Notifications ---
+SSE_SUBSCRIBERS = registry.gauge("maritime_sse_subscribers", "Connected SSE clients.")
+SSE_DROPPED_EVENTS = registry.counter("maritime_sse_dropped_events_total", "Events skipped for slow SSE clients.")
+
+# --- HTTP ---
+HTTP_REQUESTS = registry.counter("maritime_http_requests_total", "HTTP requests by route and status.", ["method", "route", "status"])
+HTTP_REQUEST_SECONDS = registry.histogram(
+    "maritime_http_request_duration_seconds", "HTTP request latency by route (streaming responses excluded).", ["method", "route"]
+)
+
+
+def stage(name: str):
+    """Times a pipeline stage: `with metrics.stage("search"): ...`"""
+    return STAGE_SECONDS.time(stage=name)
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware counting requests and timing them per route template
+    (e.g. /api/threats/), so ids in paths don't explode the label set.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not registry.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        response = {"status": 500, "streaming": False}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                response["status"] = message["status"]
+                response["streaming"] = any(
+                    name == b"content-type" and value.startswith(b"text/event-stream")
+                    for name, value in message.get("headers", [])
+                )
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = getattr(scope.get("route"), "path", "unmatched")
+            HTTP_REQUESTS.inc(method=scope["method"], route=route, status=response["status"])
+            if not response["streaming"]:
+                HTTP_REQUEST_SECONDS.observe(time.perf_counter() - start, method=scope["method"], route=route)
@@ -1,7 +1,33 @@
-from sqlalchemy import Column, Integer, String, DateTime, JSON
-from sqlalchemy.sql import func
+from sqlalchemy import Column, Integer, BigInteger, String, Boolean, Float, Date, DateTime, JSON, Index, ForeignKey, LargeBinary
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import FunctionElement
 from .database import Base
 
+
+class utcnow(FunctionElement):
+    """
+    Current timestamp as a server default. On SQLite it is written in the same
+    'YYYY-MM-DD HH:MM:SS.ffffff' text SQLAlchemy binds datetimes as; plain
+    CURRENT_TIMESTAMP has no fraction, so a row never compared equal to a
+    pagination cursor pointing at it.
+    """
+    type = DateTime(timezone=True)
+    inherit_cache = True
+
+@compiles(utcnow)
+def _utcnow_default(element, compiler, **kw):
+    return "CURRENT_TIMESTAMP"
+
+@compiles(utcnow, "postgresql")
+def _utcnow_postgresql(element, compiler, **kw):
+    return "now()"
+
+@compiles(utcnow, "sqlite")
+def _utcnow_sqlite(element, compiler, **kw):
+    # %f is seconds with milliseconds (SS.SSS); pad to microseconds
+    return "(strftime('%Y-%m-%d %H:%M:%f000', 'now'))"
+
+
 class Threat(Base):
     __tablename__ = "threats"
 
@@ -12,8 +38,126 @@ class Threat(Base):
     description = Column(String)    
     potential_impact = Column(String, nullable=True)  # New field for potential impact
     # Automatically set the creation time on the database side
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    created_at = Column(DateTime(timezone=True), server_default=utcnow())
     # Optional URL for more information
     source_urls = Column(JSON)
     date_mentioned = Column(String)  # Date when the threat was mentioned in the sources
 
+    # Composite indexes backing keyset pagination on (created_at, id) and the
+    # region/category filters of GET /api/threats/
+    __table_args__ = (
+        Index("ix_threats_created_at_id", "created_at", "id"),
+        Index("ix_threats_region_created_at_id", "region", "created_at", "id"),
+        Index("ix_threats_category_created_at_id", "category", "created_at", "id"),
+    )
+
+
+# --- Duplicate Detection Fingerprints (see services/dedup.py) ---
+
+class ThreatSourceURL(Base):
+    """Canonicalized source URLs of each threat, for exact-source duplicate lookups."""
+    __tablename__ = "threat_source_urls"
+
+    url = Column(String, primary_key=True)
+    threat_id = Column(Integer, ForeignKey("threats.id", ondelete="CASCADE"), primary_key=True)
+
+class ThreatFingerprint(Base):
+    """MinHash signature of a threat's title + description."""
+    __tablename__ = "threat_fingerprints"
+
+    threat_id = Column(Integer, ForeignKey("threats.id", ondelete="CASCADE"), primary_key=True)
+    signature = Column(LargeBinary, nullable=False)
+
+class ThreatLSHBucket(Base):
+    """LSH band buckets; threats sharing a band_key are near-duplicate candidates."""
+    __tablename__ = "threat_lsh_buckets"
+
+    band_key = Column(BigInteger, primary_key=True)
+    threat_id = Column(Integer, ForeignKey("threats.id", ondelete="CASCADE"), primary_key=True)
+
+
+# --- Analytics Rollups (see services/rollups.py) ---
+
+class ThreatRollup(Base):
+    """Threat counts per time bucket (day/week/month), region and category, kept up to date at insert time."""
+    __tablename__ = "threat_rollups"
+
+    bucket = Column(String, primary_key=True)  # "day", "week" or "month"
+    bucket_start = Column(Date, primary_key=True)  # UTC day, Monday of the week, or 1st of the month
+    region = Column(String, primary_key=True)
+    category = Column(String, primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+
+
+# --- Region Gazetteer (see services/gazetteer.py) ---
+
+class ThreatRegion(Base):
+    """Canonical gazetteer regions a threat's free-text region was normalized to."""
+    __tablename__ = "threat_regions"
+
+    threat_id = Column(Integer, ForeignKey("threats.id", ondelete="CASCADE"), primary_key=True)
+    region_id = Column(String, primary_key=True)
+
+    # Geographic queries look threats up by region
+    __table_args__ = (
+        Index("ix_threat_regions_region_id_threat_id", "region_id", "threat_id"),
+    )
+
+
+# --- Discovery Runs (see services/discovery_jobs.py) ---
+
+class DiscoveryRun(Base):
+    """One discovery run: its state, timing and per-stage results."""
+    __tablename__ = "discovery_runs"
+
+    id = Column(String(32), primary_key=True)
+    status = Column(String, nullable=False, index=True)  # running, succeeded, failed, cancelled, timed_out
+    trigger = Column(String, nullable=False)  # manual or schedule
+    full_rescan = Column(Boolean, nullable=False, default=False)  # ignored watermarks and the source ledger
+    # True while the run is in progress, NULL afterwards. The unique constraint allows
+    # only one active run across all processes (NULLs never collide).
+    active = Column(Boolean, nullable=True, unique=True)
+    cancel_requested = Column(Boolean, nullable=False, default=False)
+    started_at = Column(DateTime(timezone=True), nullable=False)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+    duration_seconds = Column(Float, nullable=True)
+    reports_found = Column(Integer, nullable=False, default=0)
+    reports_saved = Column(Integer, nullable=False, default=0)
+    reports_duplicate = Column(Integer, nullable=False, default=0)
+    sources_processed = Column(Integer, nullable=False, default=0)  # search results passed to the LLM
+    sources_skipped = Column(Integer, nullable=False, default=0)  # dropped before the LLM as already processed
+    stages = Column(JSON, nullable=True)  # {"dedup": {"count": 12, "seconds": 0.4}, ...}
+    error = Column(String, nullable=True)
+
+
+# --- Incremental Discovery (see services/discovery_ledger.py) ---
+
+class DiscoveryWatermark(Base):
+    """Per discovery sub-query: when its last successful run started."""
+    __tablename__ = "discovery_watermarks"
+
+    query_key = Column(String(64), primary_key=True)  # SHA-256 of the query text
+    query = Column(String, nullable=False)
+    watermark = Column(DateTime(timezone=True), nullable=False)
+
+class ProcessedSource(Base):
+    """Ledger of the articles (canonical URLs) the agent has already read."""
+    __tablename__ = "processed_sources"
+
+    url = Column(String, primary_key=True)
+    published_at = Column(DateTime(timezone=True), nullable=True)  # as reported by the search API
+    processed_at = Column(DateTime(timezone=True), nullable=False, index=True)
+
+
+# --- MongoDB Archive Outbox (see services/archive_outbox.py) ---
+
+class ArchiveOutbox(Base):
+    """Threats waiting to be archived to MongoDB, written in the same transaction as the threat."""
+    __tablename__ = "archive_outbox"
+
+    id = Column(Integer, primary_key=True)
+    threat_id = Column(Integer, ForeignKey("threats.id", ondelete="CASCADE"), nullable=False, index=True)
+    created_at = Column(DateTime(timezone=True), nullable=False)
+    attempts = Column(Integer, nullable=False, default=0)
+    next_attempt_at = Column(DateTime(timezone=True), nullable=True)
+    last_error = Column(String, nullable=True)
@@ -1,6 +1,6 @@
 from pydantic import BaseModel, Field
-from datetime import datetime
-from typing import List
+from datetime import date, datetime
+from typing import Dict, List, Optional
 
 # Base properties for a threat
 class ThreatBase(BaseModel):
@@ -23,4 +23,46 @@ class Threat(ThreatBase):
 
     # This allows the model to be created from a database object
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+# A full-text search hit: the threat plus its relevance and <mark>-highlighted snippets
+class ThreatSearchResult(Threat):
+    rank: float
+    highlights: Dict[str, str] = Field(default_factory=dict)
+
+# One row of GET /api/threats/stats; region/category are only set when grouped by them
+class ThreatStatsBucket(BaseModel):
+    bucket_start: date
+    region: Optional[str] = None
+    category: Optional[str] = None
+    count: int
+
+# A gazetteer region (GET /api/regions); bbox is [min_lon, min_lat, max_lon, max_lat]
+class MaritimeRegion(BaseModel):
+    id: str
+    name: str
+    kind: str
+    bbox: List[float]
+    aliases: List[str] = Field(default_factory=list)
+
+# State of a discovery run (GET/DELETE /api/discover-threats/{run_id})
+class DiscoveryRunStatus(BaseModel):
+    id: str
+    status: str
+    trigger: str
+    full_rescan: bool = False
+    started_at: datetime
+    finished_at: Optional[datetime] = None
+    duration_seconds: Optional[float] = None
+    reports_found: int = 0
+    reports_saved: int = 0
+    reports_duplicate: int = 0
+    sources_processed: int = 0
+    sources_skipped: int = 0
+    stages: Optional[Dict[str, Dict[str, float]]] = None
+    error: Optional[str] = None
+    cancel_requested: bool = False
+    message: Optional[str] = None
+
+    class Config:
+        from_attributes = True
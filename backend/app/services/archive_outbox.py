@@ -0,0 +1,314 @@
+import asyncio
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Sequence
+
+from sqlalchemy import delete, func, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .. import metrics, models
+from ..database import SessionLocal, get_mongo_db
+
+# --- Configuration ---
+# Documents per insert_many
+ARCHIVE_OUTBOX_BATCH_SIZE = int(os.getenv("ARCHIVE_OUTBOX_BATCH_SIZE", "500"))
+# How often the outbox is checked when nobody signals new rows (e.g. rows written by another process)
+ARCHIVE_OUTBOX_POLL_SECONDS = float(os.getenv("ARCHIVE_OUTBOX_POLL_SECONDS", "30"))
+# Upper bound of the exponential backoff while MongoDB is unreachable
+ARCHIVE_OUTBOX_BACKOFF_MAX_SECONDS = float(os.getenv("ARCHIVE_OUTBOX_BACKOFF_MAX_SECONDS", "300"))
+# How long a flusher owns the rows it claimed; also the time limit of one MongoDB write
+ARCHIVE_OUTBOX_CLAIM_SECONDS = float(os.getenv("ARCHIVE_OUTBOX_CLAIM_SECONDS", "120"))
+
+DUPLICATE_KEY_ERROR = 11000
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def archive_document(threat: models.Threat) -> dict:
+    """The MongoDB archive entry of a threat: the full report, including source URLs."""
+    return {
+        "postgres_id": threat.id,
+        "title": threat.title,
+        "source_urls": threat.source_urls,
+        "created_at": threat.created_at,
+        "region": threat.region,
+        "category": threat.category,
+        "description": threat.description,
+        "potential_impact": threat.potential_impact,
+        "date_mentioned": threat.date_mentioned,
+    }
+
+
+def enqueue(db: AsyncSession, threats: Sequence[models.Threat]):
+    """Adds outbox rows for the threats to the caller's transaction."""
+    now = _utcnow()
+    db.add_all(models.ArchiveOutbox(threat_id=threat.id, created_at=now, attempts=0) for threat in threats)
+
+
+class ArchiveOutboxFlusher:
+    """
+    Background task draining the archive outbox to MongoDB.
+
+    Rows are claimed in id order (a short transaction that leases them to this
+    flusher), written with one insert_many per batch and then deleted. A unique
+    index on postgres_id makes redelivery idempotent: a document that is already
+    archived (e.g. the process died between the Mongo write and the delete)
+    counts as done.
+    While MongoDB is unreachable the flusher backs off exponentially; the
+    threats stay in the outbox, nothing is lost.
+    """
+
+    def __init__(
+        self,
+        session_factory=SessionLocal,
+        batch_size: int = ARCHIVE_OUTBOX_BATCH_SIZE,
+        poll_interval: float = ARCHIVE_OUTBOX_POLL_SECONDS,
+        backoff_max: float = ARCHIVE_OUTBOX_BACKOFF_MAX_SECONDS,
+        claim_seconds: float = ARCHIVE_OUTBOX_CLAIM_SECONDS,
+    ):
+        self.session_factory = session_factory
+        self.batch_size = max(1, batch_size)
+        self.poll_interval = poll_interval
+        self.backoff_max = backoff_max
+        self.claim_seconds = claim_seconds
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._stopping = False
+        self._index_ready = False
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self):
+        if self.running:
+            return
+        self._stopping = False
+        self._wakeup = asyncio.Event()
+        self._wakeup.set()  # look for leftovers right away
+        self._task = asyncio.create_task(self._run())
+
+    def notify(self):
+        """Signals that new outbox rows were committed (starts the flusher if needed)."""
+        if not self.running:
+            self.start()
+        self._wakeup.set()
+
+    async def stop(self, drain_timeout: float = 10.0):
+        """Stops the flusher, giving pending rows up to `drain_timeout` seconds to go out."""
+        if not self.running:
+            return
+        # The loop exits at its next turn, so a flush in progress finishes its transaction instead of
+        # being cancelled halfway. Only a flusher stuck in backoff or on a slow MongoDB is cancelled.
+        self._stopping = True
+        self._wakeup.set()
+        done, _ = await asyncio.wait({self._task}, timeout=drain_timeout)
+        if not done:
+            # Before Python 3.12, wait_for() swallows a cancel that arrives as the awaited call
+            # completes; the flag still ends the loop then instead of stop() waiting forever
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+        try:
+            await asyncio.wait_for(self.drain(), timeout=drain_timeout)
+        except Exception as e:
+            # Whatever is left is flushed on the next start
+            print(f"Warning: archive outbox not fully drained on shutdown: {e!r}")
+
+    async def drain(self) -> int:
+        """Flushes until no row is due. Returns the number of rows processed."""
+        total = 0
+        while True:
+            flushed = await self.flush_once()
+            total += flushed
+            if flushed < self.batch_size:
+                return total
+
+    async def _run(self):
+        backoff = 0.0
+        while not self._stopping:
+            self._wakeup.clear()
+            try:
+                flushed = await self.flush_once()
+                backoff = 0.0
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                metrics.ARCHIVE_FLUSH_FAILURES.inc()
+                backoff = min(self.backoff_max, max(1.0, backoff * 2))
+                print(f"Error: archiving to MongoDB failed, retrying in {backoff:.0f}s: {e}")
+                await asyncio.sleep(backoff)
+                continue
+            if flushed == self.batch_size:
+                continue  # probably more waiting
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    async def flush_once(self) -> int:
+        """Archives one batch of due outbox rows. Returns the number of rows processed."""
+        # 1. Claim a batch: push the rows' next attempt past the claim lease and commit, so no
+        #    transaction (or row lock) stays open while MongoDB is written to
+        async with self.session_factory() as db:
+            now = _utcnow()
+            rows = (await db.execute(
+                select(models.ArchiveOutbox, models.Threat)
+                .join(models.Threat, models.Threat.id == models.ArchiveOutbox.threat_id)
+                .where(or_(models.ArchiveOutbox.next_attempt_at.is_(None), models.ArchiveOutbox.next_attempt_at <= now))
+                .order_by(models.ArchiveOutbox.id)
+                .limit(self.batch_size)
+                # Several processes may flush at once; each takes different rows (a no-op on SQLite)
+                .with_for_update(of=models.ArchiveOutbox, skip_locked=True)
+            )).all()
+            claimed = {entry.id: entry.attempts for entry, _ in rows}
+            documents = [archive_document(threat) for _, threat in rows]
+            if claimed:
+                await db.execute(
+                    update(models.ArchiveOutbox)
+                    .where(models.ArchiveOutbox.id.in_(claimed))
+                    .values(next_attempt_at=now + timedelta(seconds=self.claim_seconds))
+                )
+            await db.commit()
+
+        if claimed:
+            ids = list(claimed)
+            # 2. Write to MongoDB. A process dying here leaves the rows claimed until the lease
+            #    runs out; they are then redelivered, which the unique index makes harmless.
+            try:
+                with metrics.stage("mongo_insert"):
+                    failed = await asyncio.wait_for(self._write(documents), timeout=self.claim_seconds)
+            except BaseException:
+                # Release the claim so the batch is retried as soon as the flusher's backoff allows
+                async with self.session_factory() as db:
+                    await db.execute(
+                        update(models.ArchiveOutbox).where(models.ArchiveOutbox.id.in_(ids)).values(next_attempt_at=None)
+                    )
+                    await db.commit()
+                raise
+
+            # 3. Delete the archived rows; documents MongoDB rejected are retried later with their own backoff
+            async with self.session_factory() as db:
+                now = _utcnow()
+                done = [entry_id for i, entry_id in enumerate(ids) if i not in failed]
+                if done:
+                    await db.execute(delete(models.ArchiveOutbox).where(models.ArchiveOutbox.id.in_(done)))
+                for i, error in failed.items():
+                    attempts = claimed[ids[i]] + 1
+                    await db.execute(
+                        update(models.ArchiveOutbox)
+                        .where(models.ArchiveOutbox.id == ids[i])
+                        .values(
+                            attempts=attempts,
+                            last_error=error[:500],
+                            next_attempt_at=now + timedelta(seconds=min(self.backoff_max, 2 ** attempts)),
+                        )
+                    )
+                await db.commit()
+            metrics.ARCHIVED.inc(len(failed), outcome="failed")
+
+        async with self.session_factory() as db:
+            await self._update_lag(db)
+        return len(claimed)
+
+    async def _write(self, documents: List[dict]) -> Dict[int, str]:
+        """
+        Writes the documents with insert_many. Returns the errors of the documents that
+        were not archived, by position; raises if MongoDB could not be reached at all.
+        """
+        collection = get_mongo_db().threat_logs
+        if not self._index_ready:
+            try:
+                await collection.create_index("postgres_id", unique=True)
+                self._index_ready = True
+            except Exception as e:
+                # Retried on the next flush. If MongoDB is down, insert_many below fails too and the
+                # batch waits; if it is up (e.g. duplicates from before the outbox), redelivery is
+                # not idempotent until the index exists.
+                print(f"Warning: could not create unique index on threat_logs.postgres_id: {e}")
+
+        try:
+            await collection.insert_many(documents, ordered=False)
+        except Exception as e:
+            # pymongo's BulkWriteError carries the per-document errors
+            details = getattr(e, "details", None)
+            if not isinstance(details, dict) or details.get("writeConcernErrors") or "writeErrors" not in details:
+                raise
+            failed = {
+                error["index"]: error.get("errmsg", "write error")
+                for error in details["writeErrors"]
+                if error.get("code") != DUPLICATE_KEY_ERROR
+            }
+            duplicates = len(details["writeErrors"]) - len(failed)
+            metrics.ARCHIVED.inc(len(documents) - len(details["writeErrors"]), outcome="archived")
+            metrics.ARCHIVED.inc(duplicates, outcome="duplicate")
+            return failed
+        metrics.ARCHIVED.inc(len(documents), outcome="archived")
+        return {}
+
+    async def _update_lag(self, db: AsyncSession):
+        if not metrics.registry.enabled:
+            return
+        pending, oldest = (await db.execute(
+            select(func.count(), func.min(models.ArchiveOutbox.created_at)).select_from(models.ArchiveOutbox)
+        )).one()
+        metrics.ARCHIVE_OUTBOX_PENDING.set(pending)
+        if oldest is None:
+            metrics.ARCHIVE_OUTBOX_LAG.set(0)
+        else:
+            if oldest.tzinfo is None:  # SQLite returns naive UTC
+                oldest = oldest.replace(tzinfo=timezone.utc)
+            metrics.ARCHIVE_OUTBOX_LAG.set(max(0.0, (_utcnow() - oldest).total_seconds()))
+
+
+# Shared flusher, started by the app lifespan (or by the first notify())
+flusher = ArchiveOutboxFlusher()
+
+
+async def reconcile(db: AsyncSession, batch_size: int = 1000) -> int:
+    """
+    Queues every threat that is neither in the MongoDB archive nor in the outbox,
+    e.g. threats whose archive write was lost before the outbox existed.
+    Returns the number of threats queued.
+    """
+    collection = get_mongo_db().threat_logs
+    queued = 0
+    last_id = 0
+    while True:
+        ids = (await db.scalars(
+            select(models.Threat.id).where(models.Threat.id > last_id).order_by(models.Threat.id).limit(batch_size)
+        )).all()
+        if not ids:
+            break
+        archived = set(await collection.distinct("postgres_id", {"postgres_id": {"$in": list(ids)}}))
+        pending = set((await db.scalars(
+            select(models.ArchiveOutbox.threat_id).where(models.ArchiveOutbox.threat_id.in_(ids))
+        )).all())
+        missing = [threat_id for threat_id in ids if threat_id not in archived and threat_id not in pending]
+        if missing:
+            now = _utcnow()
+            db.add_all(models.ArchiveOutbox(threat_id=threat_id, created_at=now, attempts=0) for threat_id in missing)
+            await db.commit()
+            queued += len(missing)
+        last_id = ids[-1]
+    return queued
+
+
+if __name__ == "__main__":
+    # Usage (from backend/): python -m app.services.archive_outbox
+    from ..database import close_mongo_client, engine
+
+    async def _reconcile():
+        async with engine.begin() as conn:
+            await conn.run_sync(models.Base.metadata.create_all)
+        async with SessionLocal() as db:
+            queued = await reconcile(db)
+        print(f"Queued {queued} threats missing from the MongoDB archive.")
+        archived = await flusher.drain()
+        print(f"Flushed {archived} outbox rows to MongoDB.")
+        await engine.dispose()
+        close_mongo_client()
+
+    asyncio.run(_reconcile())
@@ -0,0 +1,127 @@
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from typing import Any, Optional
+
+# Local on-disk cache file shared by all namespaces (e.g. search results)
+DISCOVERY_CACHE_PATH = os.getenv(
+    "DISCOVERY_CACHE_PATH", os.path.join(tempfile.gettempdir(), "maritime_discovery_cache.sqlite3")
+)
+DISCOVERY_CACHE_MAX_ENTRIES = int(os.getenv("DISCOVERY_CACHE_MAX_ENTRIES", "20000"))
+
+
+def content_key(*parts: Any) -> str:
+    """
+    Stable SHA-256 key for any JSON-serializable parts (order-insensitive for dict keys).
+    """
+    raw = json.dumps(parts, sort_keys=True, default=str, separators=(",", ":"))
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+class PersistentCache:
+    """
+    Small SQLite-backed key/value cache with a TTL and size-bounded LRU eviction.
+
+    Values are stored as JSON. Several caches can share one file by using
+    different namespaces; `max_entries` applies per namespace. The sync methods
+    are safe to call from several threads, and the async variants run them in a
+    worker thread so disk I/O never blocks the event loop.
+    """
+
+    def __init__(self, namespace: str, ttl_seconds: float, max_entries: int = DISCOVERY_CACHE_MAX_ENTRIES,
+                 path: str = DISCOVERY_CACHE_PATH):
+        self.namespace = namespace
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _connection(self) -> sqlite3.Connection:
+        # Opened on first use so importing the module never touches the disk
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                """CREATE TABLE IF NOT EXISTS cache_entries (
+                    namespace TEXT NOT NULL,
+                    key TEXT NOT NULL,
+                    value TEXT NOT NULL,
+                    expires_at REAL NOT NULL,
+                    last_access REAL NOT NULL,
+                    PRIMARY KEY (namespace, key)
+                )"""
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS ix_cache_entries_lru ON cache_entries (namespace, last_access)"
+            )
+        return self._conn
+
+    @property
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {"hits": self.hits, "misses": self.misses, "hit_rate": self.hits / total if total else 0.0}
+
+    def get(self, key: str) -> Optional[Any]:
+        now = time.time()
+        with self._lock:
+            conn = self._connection()
+            row = conn.execute(
+                "SELECT value, expires_at FROM cache_entries WHERE namespace = ? AND key = ?",
+                (self.namespace, key),
+            ).fetchone()
+            if row is None or row[1] <= now:
+                if row is not None:
+                    conn.execute("DELETE FROM cache_entries WHERE namespace = ? AND key = ?", (self.namespace, key))
+                self.misses += 1
+                return None
+            conn.execute(
+                "UPDATE cache_entries SET last_access = ? WHERE namespace = ? AND key = ?",
+                (now, self.namespace, key),
+            )
+            self.hits += 1
+        return json.loads(row[0])
+
+    def set(self, key: str, value: Any):
+        now = time.time()
+        with self._lock:
+            conn = self._connection()
+            conn.execute(
+                "INSERT OR REPLACE INTO cache_entries (namespace, key, value, expires_at, last_access) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (self.namespace, key, json.dumps(value, default=str), now + self.ttl_seconds, now),
+            )
+            self._evict(conn, now)
+
+    def _evict(self, conn: sqlite3.Connection, now: float):
+        conn.execute("DELETE FROM cache_entries WHERE namespace = ? AND expires_at <= ?", (self.namespace, now))
+        (count,) = conn.execute("SELECT COUNT(*) FROM cache_entries WHERE namespace = ?", (self.namespace,)).fetchone()
+        if count > self.max_entries:
+            # Drop the least recently used entries, with some headroom so we don't evict on every write
+            # (none for tiny caps, where it would take the entry just written with it)
+            excess = count - self.max_entries + self.max_entries // 10
+            conn.execute(
+                "DELETE FROM cache_entries WHERE rowid IN ("
+                "SELECT rowid FROM cache_entries WHERE namespace = ? ORDER BY last_access LIMIT ?)",
+                (self.namespace, excess),
+            )
+
+    def clear(self):
+        with self._lock:
+            self._connection().execute("DELETE FROM cache_entries WHERE namespace = ?", (self.namespace,))
+
+    async def aget(self, key: str) -> Optional[Any]:
+        return await asyncio.to_thread(self.get, key)
+
+    async def aset(self, key: str, value: Any):
+        await asyncio.to_thread(self.set, key, value)
@@ -0,0 +1,279 @@
+import asyncio
+import hashlib
+import os
+import random
+import re
+import struct
+from dataclasses import dataclass
+from typing import Iterable, List, Optional, Sequence, Set, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .. import models
+
+# --- Configuration ---
+# Estimated Jaccard similarity (title + description) above which a report is a duplicate
+DEDUP_SIMILARITY_THRESHOLD = float(os.getenv("DEDUP_SIMILARITY_THRESHOLD", "0.5"))
+# Lower bar for reports that also share a canonical source URL with an existing threat.
+# One article can legitimately describe several different threats, so a shared URL alone isn't enough.
+DEDUP_URL_MATCH_THRESHOLD = float(os.getenv("DEDUP_URL_MATCH_THRESHOLD", "0.3"))
+# Number of MinHash permutations per signature
+DEDUP_NUM_PERM = int(os.getenv("DEDUP_NUM_PERM", "128"))
+# Upper bound on candidates verified per lookup, keeps lookups constant-time on hot buckets
+DEDUP_MAX_CANDIDATES = int(os.getenv("DEDUP_MAX_CANDIDATES", "50"))
+
+# Query parameters that only track where a click came from
+TRACKING_PARAMS = {"fbclid", "gclid", "mc_cid", "mc_eid", "ocid", "cmpid", "ref", "src", "smid", "ito"}
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "has", "in", "is", "it",
+    "its", "of", "on", "or", "that", "the", "to", "was", "were", "which", "will", "with",
+}
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+_WORD_RE = re.compile(r"[a-z0-9]+")
+
+
+def canonicalize_url(url: str) -> str:
+    """
+    Normalizes a source URL so the same article always maps to the same key:
+    drops the scheme, "www.", default ports, fragments, tracking parameters and
+    trailing slashes, and sorts the remaining query parameters.
+    """
+    parts = urlsplit(url.strip())
+    host = (parts.hostname or "").lower()
+    if host.startswith("www."):
+        host = host[4:]
+    if parts.port and parts.port not in (80, 443):
+        host = f"{host}:{parts.port}"
+    query = sorted(
+        (key, value)
+        for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not key.lower().startswith("utm_") and key.lower() not in TRACKING_PARAMS
+    )
+    path = re.sub(r"/{2,}", "/", parts.path).rstrip("/")
+    return urlunsplit(("", host, path, urlencode(query), "")).lstrip("/")
+
+
+def shingles(text: str) -> Set[str]:
+    """
+    The set of normalized words in the text, minus stopwords. The LLM rewords the
+    same story differently on every run, so single words hold up much better than
+    n-grams here.
+    """
+    return {word for word in _WORD_RE.findall(text.lower()) if word not in STOPWORDS}
+
+
+def _lsh_params(threshold: float, num_perm: int) -> Tuple[int, int]:
+    """
+    Picks (bands, rows) so that the LSH candidate threshold (1/bands)^(1/rows)
+    sits a little below the similarity threshold, trading some extra candidate
+    checks for recall.
+    """
+    target = threshold * 0.8
+    layouts = [(num_perm // rows, rows) for rows in range(1, num_perm + 1)]
+    return min(layouts, key=lambda layout: abs((1 / layout[0]) ** (1 / layout[1]) - target))
+
+
+@dataclass
+class Fingerprint:
+    urls: List[str]
+    signature: Tuple[int, ...]
+    band_keys: List[int]
+
+
+class DuplicateDetector:
+    """
+    Detects near-duplicate threats before they are saved.
+
+    Two signals are used: exact canonical source URLs, and MinHash signatures
+    over title + description bucketed with LSH banding. The URL, signature and
+    bucket tables are indexed in the database, so a lookup is a handful of index
+    probes plus verification of at most `max_candidates` signatures, no matter
+    how large the threats table grows, and the index survives restarts.
+    """
+
+    def __init__(
+        self,
+        threshold: float = DEDUP_SIMILARITY_THRESHOLD,
+        url_threshold: float = DEDUP_URL_MATCH_THRESHOLD,
+        num_perm: int = DEDUP_NUM_PERM,
+        max_candidates: int = DEDUP_MAX_CANDIDATES,
+    ):
+        self.threshold = threshold
+        self.url_threshold = url_threshold
+        self.num_perm = num_perm
+        self.max_candidates = max_candidates
+        self.bands, self.rows = _lsh_params(threshold, num_perm)
+
+        rng = random.Random(1337)  # Fixed seed: signatures must be stable across processes
+        self._perms = [
+            (rng.randrange(1, _MERSENNE_PRIME), rng.randrange(0, _MERSENNE_PRIME))
+            for _ in range(num_perm)
+        ]
+
+    # --- Fingerprinting ---
+
+    def signature(self, text: str) -> Tuple[int, ...]:
+        hashes = [
+            int.from_bytes(hashlib.blake2b(shingle.encode(), digest_size=4).digest(), "little")
+            for shingle in shingles(text)
+        ]
+        if not hashes:
+            return (_MAX_HASH,) * self.num_perm
+        return tuple(
+            min(((a * h + b) % _MERSENNE_PRIME) & _MAX_HASH for h in hashes)
+            for a, b in self._perms
+        )
+
+    def band_keys(self, signature: Sequence[int]) -> List[int]:
+        keys = []
+        for band in range(self.bands):
+            chunk = signature[band * self.rows:(band + 1) * self.rows]
+            # The banding layout is part of the key, so changing the threshold never mixes layouts
+            raw = struct.pack(f"<3I{self.rows}I", self.num_perm, self.rows, band, *chunk)
+            keys.append(int.from_bytes(hashlib.blake2b(raw, digest_size=8).digest(), "little", signed=True))
+        return keys
+
+    def fingerprint(self, title: str, description: str, source_urls: Iterable[str]) -> Fingerprint:
+        signature = self.signature(f"{title} {description}")
+        return Fingerprint(
+            urls=sorted({canonicalize_url(url) for url in source_urls or [] if url}),
+            signature=signature,
+            band_keys=self.band_keys(signature),
+        )
+
+    def similarity(self, a: Sequence[int], b: Sequence[int]) -> float:
+        """Estimated Jaccard similarity of two signatures."""
+        return sum(x == y for x, y in zip(a, b)) / self.num_perm
+
+    def pack(self, signature: Sequence[int]) -> bytes:
+        return struct.pack(f"<{len(signature)}I", *signature)
+
+    def unpack(self, data: bytes) -> Tuple[int, ...]:
+        return struct.unpack(f"<{len(data) // 4}I", data)
+
+    # --- Lookups ---
+
+    async def find_duplicate(self, db: AsyncSession, fp: Fingerprint) -> Optional[int]:
+        """
+        Returns the ID of an existing threat that `fp` duplicates, or None.
+        """
+        url_matches: Set[int] = set()
+        if fp.urls:
+            url_matches = set((await db.scalars(
+                select(models.ThreatSourceURL.threat_id)
+                .where(models.ThreatSourceURL.url.in_(fp.urls))
+                .limit(self.max_candidates)
+            )).all())
+
+        # Threats sharing the most bands with us are the most similar, check those first
+        band_hits = (await db.execute(
+            select(models.ThreatLSHBucket.threat_id)
+            .where(models.ThreatLSHBucket.band_key.in_(fp.band_keys))
+            .group_by(models.ThreatLSHBucket.threat_id)
+            .order_by(func.count().desc())
+            .limit(self.max_candidates)
+        )).scalars().all()
+
+        candidates = url_matches.union(band_hits)
+        if not candidates:
+            return None
+
+        rows = (await db.execute(
+            select(models.ThreatFingerprint.threat_id, models.ThreatFingerprint.signature)
+            .where(models.ThreatFingerprint.threat_id.in_(candidates))
+        )).all()
+        for threat_id, packed in rows:
+            threshold = self.url_threshold if threat_id in url_matches else self.threshold
+            if self.similarity(fp.signature, self.unpack(packed)) >= threshold:
+                return threat_id
+        return None
+
+    async def filter_new(self, db: AsyncSession, reports: Sequence) -> List:
+        """
+        Returns the reports that are neither duplicates of stored threats nor of
+        an earlier report in the same batch, preserving their order.
+        """
+        fresh: List = []
+        fresh_fps: List[Fingerprint] = []
+        for report in reports:
+            # Hashing is CPU-bound, give other tasks a turn between reports
+            fp = self.fingerprint(report.title, report.description, report.source_urls)
+            await asyncio.sleep(0)
+
+            existing_id = await self.find_duplicate(db, fp)
+            if existing_id is not None:
+                print(f"Skipping duplicate threat '{report.title}' (matches threat ID: {existing_id})")
+                continue
+
+            in_batch = any(
+                self.similarity(fp.signature, other.signature)
+                >= (self.url_threshold if set(fp.urls) & set(other.urls) else self.threshold)
+                for other in fresh_fps
+            )
+            if in_batch:
+                print(f"Skipping duplicate threat '{report.title}' (repeated within this run)")
+                continue
+
+            fresh.append(report)
+            fresh_fps.append(fp)
+        return fresh
+
+    # --- Index Maintenance ---
+
+    def add_fingerprints(self, db: AsyncSession, threats: Iterable[models.Threat]):
+        """
+        Adds the fingerprint rows for freshly inserted threats to the session,
+        so they are committed in the same transaction as the threats themselves.
+        """
+        for threat in threats:
+            fp = self.fingerprint(threat.title, threat.description, threat.source_urls)
+            db.add_all([models.ThreatSourceURL(url=url, threat_id=threat.id) for url in fp.urls])
+            db.add(models.ThreatFingerprint(threat_id=threat.id, signature=self.pack(fp.signature)))
+            db.add_all([models.ThreatLSHBucket(band_key=key, threat_id=threat.id) for key in set(fp.band_keys)])
+
+    async def rebuild(self, db: AsyncSession, batch_size: int = 1000) -> int:
+        """
+        Recomputes the fingerprint tables from the threats table, e.g. after a
+        backfill or after changing the similarity threshold. Returns the number
+        of threats indexed.
+        """
+        for table in (models.ThreatLSHBucket, models.ThreatFingerprint, models.ThreatSourceURL):
+            await db.execute(delete(table))
+
+        indexed = 0
+        last_id = 0
+        while True:
+            threats = (await db.scalars(
+                select(models.Threat).where(models.Threat.id > last_id).order_by(models.Threat.id).limit(batch_size)
+            )).all()
+            if not threats:
+                break
+            self.add_fingerprints(db, threats)
+            await db.flush()
+            db.expunge_all()
+            indexed += len(threats)
+            last_id = threats[-1].id
+        await db.commit()
+        return indexed
+
+
+# Shared detector used by the ingest pipeline
+detector = DuplicateDetector()
+
+
+if __name__ == "__main__":
+    # Usage (from backend/): python -m app.services.dedup
+    from ..database import SessionLocal, engine
+
+    async def _rebuild():
+        async with engine.begin() as conn:
+            await conn.run_sync(models.Base.metadata.create_all)
+        async with SessionLocal() as db:
+            count = await detector.rebuild(db)
+        await engine.dispose()
+        print(f"Rebuilt duplicate-detection index for {count} threats.")
+
+    asyncio.run(_rebuild())
@@ -0,0 +1,222 @@
+import asyncio
+import os
+import time
+import uuid
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+from sqlalchemy import select, update
+from sqlalchemy.exc import IntegrityError
+
+from .. import metrics, models
+
+# --- Configuration ---
+# A run still going after this long is cancelled and marked timed_out
+DISCOVERY_RUN_TIMEOUT_SECONDS = float(os.getenv("DISCOVERY_RUN_TIMEOUT_SECONDS", "3600"))
+# How often a run checks whether a cancel was requested (possibly from another process)
+DISCOVERY_CANCEL_POLL_SECONDS = float(os.getenv("DISCOVERY_CANCEL_POLL_SECONDS", "5"))
+
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+CANCELLED = "cancelled"
+TIMED_OUT = "timed_out"
+
+
+@dataclass
+class RunStats:
+    """Live counters and per-stage timings of one discovery run."""
+    found: int = 0
+    saved: int = 0
+    duplicates: int = 0
+    sources_processed: int = 0
+    sources_skipped: int = 0
+    stages: Dict[str, Dict[str, float]] = field(default_factory=dict)
+
+    @contextmanager
+    def stage(self, name: str):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            stage = self.stages.setdefault(name, {"count": 0, "seconds": 0.0})
+            stage["count"] += 1
+            stage["seconds"] += time.perf_counter() - t0
+
+
+RunFunction = Callable[..., Awaitable[object]]  # run_function(stats, full_rescan=...)
+
+
+class DiscoveryJobManager:
+    """
+    Runs discovery in the background, at most one run at a time.
+
+    A trigger while a run is in progress joins that run instead of starting a
+    second one. Across processes this is enforced by the database: an active
+    run holds the single `active = TRUE` row of discovery_runs. Run state,
+    duration and per-stage results are written to that row when the run ends.
+    """
+
+    def __init__(self, run_function: RunFunction, session_factory, timeout: float = DISCOVERY_RUN_TIMEOUT_SECONDS):
+        self.run_function = run_function
+        self.session_factory = session_factory
+        self.timeout = timeout
+        self._lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self._run_id: Optional[str] = None
+        self._stats: Optional[RunStats] = None
+        self._cancel_reason: Optional[str] = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    async def trigger(self, trigger: str = "manual", full_rescan: bool = False) -> Tuple[models.DiscoveryRun, bool]:
+        """
+        Starts a run unless one is already in progress (which is joined as is,
+        even if `full_rescan` differs). Returns the run and whether it was started by this call.
+        """
+        async with self._lock:
+            if self.running:
+                metrics.DISCOVERY_TRIGGERS.inc(result="coalesced")
+                return await self.get(self._run_id), False
+
+            async with self.session_factory() as db:
+                await self._expire_abandoned(db)
+                for _ in range(3):
+                    run = models.DiscoveryRun(
+                        id=uuid.uuid4().hex,
+                        status=RUNNING,
+                        trigger=trigger,
+                        full_rescan=full_rescan,
+                        active=True,
+                        cancel_requested=False,
+                        started_at=datetime.now(timezone.utc),
+                    )
+                    db.add(run)
+                    try:
+                        await db.commit()
+                        break
+                    except IntegrityError:
+                        # Another process is running discovery: join its run
+                        await db.rollback()
+                        existing = await db.scalar(select(models.DiscoveryRun).where(models.DiscoveryRun.active.is_(True)))
+                        if existing is not None:
+                            metrics.DISCOVERY_TRIGGERS.inc(result="coalesced")
+                            return existing, False
+                else:
+                    raise RuntimeError("Could not register a discovery run.")
+
+            self._run_id = run.id
+            self._stats = RunStats()
+            self._cancel_reason = None
+            self._task = asyncio.create_task(self._execute(run.id, self._stats, full_rescan))
+            metrics.DISCOVERY_TRIGGERS.inc(result="started")
+            return run, True
+
+    async def get(self, run_id: str) -> Optional[models.DiscoveryRun]:
+        """Returns a run, with live counters if it is in progress in this process."""
+        async with self.session_factory() as db:
+            run = await db.get(models.DiscoveryRun, run_id)
+        if run is not None and run.status == RUNNING and run_id == self._run_id and self._stats is not None:
+            self._apply_stats(run, self._stats)
+        return run
+
+    async def wait(self, run_id: str) -> Optional[models.DiscoveryRun]:
+        """Waits for a run of this process to finish and returns its final state."""
+        if run_id == self._run_id and self._task is not None:
+            await asyncio.wait({self._task})
+        return await self.get(run_id)
+
+    async def cancel(self, run_id: str) -> Optional[models.DiscoveryRun]:
+        """
+        Requests cancellation of a run. A run of this process is cancelled right away,
+        one of another process within DISCOVERY_CANCEL_POLL_SECONDS.
+        Returns the run (unchanged if it had already finished), or None if unknown.
+        """
+        async with self.session_factory() as db:
+            run = await db.get(models.DiscoveryRun, run_id)
+            if run is None or run.status != RUNNING:
+                return run
+            run.cancel_requested = True
+            await db.commit()
+
+        if run_id == self._run_id and self.running:
+            self._cancel_reason = "Cancelled on request."
+            self._task.cancel()
+            await asyncio.wait({self._task})
+        return await self.get(run_id)
+
+    async def stop(self):
+        """Cancels the run in progress (used on application shutdown)."""
+        if self.running:
+            self._cancel_reason = "Cancelled by application shutdown."
+            self._task.cancel()
+            await asyncio.wait({self._task})
+
+    async def _execute(self, run_id: str, stats: RunStats, full_rescan: bool = False):
+        status, error = SUCCEEDED, None
+        t0 = time.perf_counter()
+        watcher = asyncio.create_task(self._watch_cancel(run_id))
+        try:
+            await asyncio.wait_for(self.run_function(stats, full_rescan=full_rescan), timeout=self.timeout)
+        except asyncio.TimeoutError:
+            status, error = TIMED_OUT, f"Run exceeded the {self.timeout:.0f}s timeout."
+        except asyncio.CancelledError:
+            status, error = CANCELLED, self._cancel_reason or "Cancelled."
+        except Exception as e:
+            status, error = FAILED, f"{type(e).__name__}: {e}"
+        finally:
+            watcher.cancel()
+        duration = time.perf_counter() - t0
+        print(f"Discovery run {run_id} {status} after {duration:.1f}s.")
+
+        try:
+            async with self.session_factory() as db:
+                run = await db.get(models.DiscoveryRun, run_id)
+                run.status = status
+                run.error = error
+                run.active = None
+                run.finished_at = datetime.now(timezone.utc)
+                run.duration_seconds = duration
+                self._apply_stats(run, stats)
+                await db.commit()
+        except Exception as e:
+            print(f"Error: Could not record the result of discovery run {run_id}: {e}")
+
+    async def _watch_cancel(self, run_id: str):
+        while True:
+            await asyncio.sleep(DISCOVERY_CANCEL_POLL_SECONDS)
+            try:
+                async with self.session_factory() as db:
+                    requested = await db.scalar(
+                        select(models.DiscoveryRun.cancel_requested).where(models.DiscoveryRun.id == run_id)
+                    )
+            except Exception as e:
+                print(f"Warning: Could not check discovery run {run_id} for cancellation: {e}")
+                continue
+            if requested:
+                self._cancel_reason = "Cancelled on request."
+                self._task.cancel()
+                return
+
+    async def _expire_abandoned(self, db):
+        """Releases runs left active by a process that died (well past the run timeout)."""
+        cutoff = datetime.now(timezone.utc) - timedelta(seconds=self.timeout * 2)
+        await db.execute(
+            update(models.DiscoveryRun)
+            .where(models.DiscoveryRun.active.is_(True), models.DiscoveryRun.started_at < cutoff)
+            .values(status=FAILED, active=None, error="Abandoned: the process running it stopped.")
+        )
+        await db.commit()
+
+    @staticmethod
+    def _apply_stats(run: models.DiscoveryRun, stats: RunStats):
+        run.reports_found = stats.found
+        run.reports_saved = stats.saved
+        run.reports_duplicate = stats.duplicates
+        run.sources_processed = stats.sources_processed
+        run.sources_skipped = stats.sources_skipped
+        run.stages = {name: dict(values) for name, values in stats.stages.items()}
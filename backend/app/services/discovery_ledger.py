@@ -0,0 +1,116 @@
+import os
+from datetime import datetime, timedelta, timezone
+from email.utils import parsedate_to_datetime
+from typing import Collection, Dict, Optional, Set
+
+from sqlalchemy import delete, insert, select
+from sqlalchemy.dialects import postgresql, sqlite
+
+from .. import models
+from ..database import SessionLocal
+from .cache import content_key
+
+# --- Configuration ---
+# Articles published up to this long before a query's watermark still count as new
+# (search indexes pick articles up late, and publish dates are often day-granular)
+DISCOVERY_WATERMARK_OVERLAP_SECONDS = float(os.getenv("DISCOVERY_WATERMARK_OVERLAP_SECONDS", str(24 * 3600)))
+# Ledger entries older than this are pruned; by then the watermark drops those articles anyway
+DISCOVERY_LEDGER_RETENTION_DAYS = float(os.getenv("DISCOVERY_LEDGER_RETENTION_DAYS", "90"))
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _as_utc(value: datetime) -> datetime:
+    # SQLite returns naive datetimes; everything we store is UTC
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value.astimezone(timezone.utc)
+
+
+def query_key(query: str) -> str:
+    return content_key("discovery_query", query.strip())
+
+
+def parse_published_date(value) -> Optional[datetime]:
+    """
+    Parses a search result's publish date (ISO 8601 or RFC 2822, as Tavily returns
+    for news) into an aware UTC datetime. Returns None if missing or unparseable.
+    """
+    if not value or not isinstance(value, str):
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.strip().replace("Z", "+00:00"))
+    except ValueError:
+        try:
+            parsed = parsedate_to_datetime(value)
+        except (TypeError, ValueError, IndexError):
+            return None
+    return _as_utc(parsed)
+
+
+class SourceLedger:
+    """
+    Persisted state of incremental discovery: a watermark per sub-query (start
+    of its last successful run) and the canonical URLs of every article the
+    agent has already read. Search results older than the watermark or already
+    in the ledger are dropped before they reach the LLM.
+    """
+
+    def __init__(self, session_factory=SessionLocal, overlap_seconds: float = DISCOVERY_WATERMARK_OVERLAP_SECONDS):
+        self.session_factory = session_factory
+        self.overlap = timedelta(seconds=overlap_seconds)
+
+    async def cutoff(self, query: str) -> Optional[datetime]:
+        """Articles published before this are not new for `query` (None: first run)."""
+        async with self.session_factory() as db:
+            watermark = await db.scalar(
+                select(models.DiscoveryWatermark.watermark).where(models.DiscoveryWatermark.query_key == query_key(query))
+            )
+        return _as_utc(watermark) - self.overlap if watermark is not None else None
+
+    async def known(self, urls: Collection[str]) -> Set[str]:
+        """The subset of `urls` (canonical) that is already in the ledger."""
+        if not urls:
+            return set()
+        async with self.session_factory() as db:
+            return set((await db.scalars(
+                select(models.ProcessedSource.url).where(models.ProcessedSource.url.in_(list(urls)))
+            )).all())
+
+    async def record(self, query: str, started_at: datetime, sources: Dict[str, Optional[datetime]]):
+        """
+        Adds the sources (canonical URL -> publish date) a successful sub-query read
+        to the ledger and moves the query's watermark to the start of that run.
+        """
+        now = _utcnow()
+        async with self.session_factory() as db:
+            if sources:
+                rows = [
+                    {"url": url, "published_at": published_at, "processed_at": now}
+                    for url, published_at in sources.items()
+                ]
+                table = models.ProcessedSource.__table__
+                dialect = db.bind.dialect.name
+                if dialect in ("postgresql", "sqlite"):
+                    dialect_insert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+                    await db.execute(dialect_insert(table).on_conflict_do_nothing(index_elements=[table.c.url]), rows)
+                else:
+                    existing = set((await db.scalars(select(table.c.url).where(table.c.url.in_(list(sources))))).all())
+                    new_rows = [row for row in rows if row["url"] not in existing]
+                    if new_rows:
+                        await db.execute(insert(table), new_rows)
+            # One discovery run at a time (see DiscoveryJobManager), so a plain merge is enough
+            await db.merge(models.DiscoveryWatermark(query_key=query_key(query), query=query, watermark=started_at))
+            await db.commit()
+
+    async def prune(self, retention_days: float = DISCOVERY_LEDGER_RETENTION_DAYS) -> int:
+        """Deletes ledger entries older than the retention. Returns the number deleted."""
+        cutoff = _utcnow() - timedelta(days=retention_days)
+        async with self.session_factory() as db:
+            result = await db.execute(delete(models.ProcessedSource).where(models.ProcessedSource.processed_at < cutoff))
+            await db.commit()
+        return result.rowcount or 0
+
+
+# Shared ledger used by the discovery agent
+ledger = SourceLedger()
@@ -0,0 +1,230 @@
+import asyncio
+import csv
+import io
+import json
+import os
+from datetime import datetime
+from typing import AsyncIterator, Iterable, Optional, Sequence
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .. import models
+from ..crud import filter_threats
+
+# --- Configuration ---
+# Rows fetched per round trip from the server-side cursor; also the rows per output chunk
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "2000"))
+
+FORMATS = ("ndjson", "csv", "parquet")
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+# Exported columns, in output order
+COLUMNS = (
+    models.Threat.id,
+    models.Threat.created_at,
+    models.Threat.title,
+    models.Threat.region,
+    models.Threat.category,
+    models.Threat.description,
+    models.Threat.potential_impact,
+    models.Threat.source_urls,
+    models.Threat.date_mentioned,
+)
+FIELD_NAMES = tuple(column.key for column in COLUMNS)
+
+
+async def iter_batches(
+    db: AsyncSession,
+    region: Optional[str] = None,
+    category: Optional[str] = None,
+    created_after: Optional[datetime] = None,
+    created_before: Optional[datetime] = None,
+    batch_size: int = EXPORT_BATCH_SIZE,
+) -> AsyncIterator[Sequence[tuple]]:
+    """
+    Yields the matching threats as batches of plain row tuples, oldest first.
+
+    The rows come from a server-side cursor (yield_per) and no ORM objects are
+    built, so memory use is bounded by `batch_size` however many rows match.
+    """
+    query = filter_threats(select(*COLUMNS), region, category, created_after, created_before)
+    query = query.order_by(models.Threat.created_at, models.Threat.id).execution_options(yield_per=batch_size)
+    result = await db.stream(query)
+    try:
+        async for partition in result.partitions():
+            yield partition
+    finally:
+        await result.close()
+
+
+def _isoformat(value: Optional[datetime]) -> Optional[str]:
+    return value.isoformat() if value is not None else None
+
+
+def ndjson_chunk(rows: Iterable[tuple]) -> bytes:
+    """One JSON object per line."""
+    lines = []
+    for row in rows:
+        record = dict(zip(FIELD_NAMES, row))
+        record["created_at"] = _isoformat(record["created_at"])
+        lines.append(json.dumps(record, ensure_ascii=False))
+    return ("\n".join(lines) + "\n").encode() if lines else b""
+
+
+def csv_header() -> bytes:
+    buffer = io.StringIO()
+    csv.writer(buffer).writerow(FIELD_NAMES)
+    return buffer.getvalue().encode()
+
+
+def csv_chunk(rows: Iterable[tuple]) -> bytes:
+    """CSV rows; source_urls are space-separated (URLs never contain spaces)."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for (threat_id, created_at, title, region, category, description, impact, source_urls, date_mentioned) in rows:
+        writer.writerow((
+            threat_id, _isoformat(created_at), title, region, category, description, impact,
+            " ".join(source_urls or ()), date_mentioned,
+        ))
+    return buffer.getvalue().encode()
+
+
+def parquet_available() -> bool:
+    """Whether the optional pyarrow package is installed (needed for Parquet export)."""
+    try:
+        import pyarrow.parquet  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+class ParquetSink(io.RawIOBase):
+    """Write-only file that hands out what pyarrow wrote since the last take()."""
+
+    def __init__(self):
+        super().__init__()
+        self._chunks = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def take(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+async def stream_export(session_factory, format: str, **filters) -> AsyncIterator[bytes]:
+    """
+    Yields the export as encoded chunks, one per database batch, opening its own
+    session so it can outlive the request handler (StreamingResponse).
+    """
+    async with session_factory() as db:
+        if format == "parquet":
+            sink = ParquetSink()
+            async for _ in _write_parquet_batches(db, sink, **filters):
+                yield sink.take()
+            yield sink.take()  # the footer, written when the writer closes
+            return
+        encode = ndjson_chunk if format == "ndjson" else csv_chunk
+        if format == "csv":
+            yield csv_header()
+        async for rows in iter_batches(db, **filters):
+            yield encode(rows)
+
+
+async def write_parquet(db: AsyncSession, path: str, **filters) -> int:
+    """
+    Writes the export to a Parquet file, one row group per batch.
+    Requires the optional pyarrow package. Returns the number of rows written.
+    """
+    total = 0
+    async for count in _write_parquet_batches(db, path, **filters):
+        total += count
+    return total
+
+
+async def _write_parquet_batches(db: AsyncSession, where, **filters) -> AsyncIterator[int]:
+    """Writes one row group per batch to `where` (a path or file object), yielding each batch's row count."""
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise RuntimeError("Parquet export requires pyarrow: pip install pyarrow")
+
+    schema = pa.schema([
+        ("id", pa.int64()),
+        ("created_at", pa.timestamp("us", tz="UTC")),
+        ("title", pa.string()),
+        ("region", pa.string()),
+        ("category", pa.string()),
+        ("description", pa.string()),
+        ("potential_impact", pa.string()),
+        ("source_urls", pa.list_(pa.string())),
+        ("date_mentioned", pa.string()),
+    ])
+    with pq.ParquetWriter(where, schema, compression="zstd") as writer:
+        async for rows in iter_batches(db, **filters):
+            columns = list(zip(*rows))
+            writer.write_table(pa.Table.from_arrays(
+                [pa.array(values, type=field.type) for values, field in zip(columns, schema)], schema=schema
+            ))
+            yield len(rows)
+
+
+if __name__ == "__main__":
+    # Usage (from backend/): python -m app.services.export --format parquet --output threats.parquet
+    import argparse
+    import sys
+
+    from ..database import SessionLocal, engine
+
+    parser = argparse.ArgumentParser(description="Export threats as NDJSON, CSV or Parquet.")
+    parser.add_argument("--format", choices=FORMATS, default="ndjson")
+    parser.add_argument("--output", help="Output file (default: stdout; required for parquet).")
+    parser.add_argument("--region")
+    parser.add_argument("--category")
+    parser.add_argument("--created-after", type=datetime.fromisoformat)
+    parser.add_argument("--created-before", type=datetime.fromisoformat)
+    args = parser.parse_args()
+    if args.format == "parquet" and not args.output:
+        parser.error("--output is required for parquet")
+    filters = {
+        "region": args.region,
+        "category": args.category,
+        "created_after": args.created_after,
+        "created_before": args.created_before,
+    }
+
+    async def _export():
+        try:
+            if args.format == "parquet":
+                async with SessionLocal() as db:
+                    count = await write_parquet(db, args.output, **filters)
+                print(f"Exported {count} threats to {args.output}.", file=sys.stderr)
+                return
+            out = open(args.output, "wb") if args.output else sys.stdout.buffer
+            try:
+                async for chunk in stream_export(SessionLocal, args.format, **filters):
+                    out.write(chunk)
+            finally:
+                if args.output:
+                    out.close()
+        finally:
+            await engine.dispose()
+
+    asyncio.run(_export())
@@ -0,0 +1,272 @@
+import asyncio
+import json
+import math
+import os
+import re
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from sqlalchemy import delete, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .. import models
+
+# --- Configuration ---
+GAZETTEER_PATH = os.getenv(
+    "GAZETTEER_PATH", os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "maritime_regions.json")
+)
+# Cell size of the spatial grid, in degrees
+GAZETTEER_GRID_DEGREES = float(os.getenv("GAZETTEER_GRID_DEGREES", "5"))
+
+EARTH_RADIUS_KM = 6371.0
+KM_PER_DEGREE = 111.32
+
+BBox = Tuple[float, float, float, float]  # (min_lon, min_lat, max_lon, max_lat)
+
+
+@dataclass(frozen=True)
+class Region:
+    id: str
+    name: str
+    kind: str  # chokepoint, sea or ocean
+    bbox: BBox
+    aliases: Tuple[str, ...]
+
+
+def _normalize_text(text: str) -> str:
+    """Lowercase, punctuation and hyphens to spaces, whitespace collapsed."""
+    return " ".join(re.sub(r"[^\w]+", " ", text.lower()).split())
+
+
+def parse_bbox(value: str) -> BBox:
+    """
+    Parses "min_lon,min_lat,max_lon,max_lat". min_lon may exceed max_lon for a box
+    crossing the antimeridian. Raises ValueError if malformed.
+    """
+    try:
+        min_lon, min_lat, max_lon, max_lat = (float(part) for part in value.split(","))
+    except ValueError:
+        raise ValueError(f"Invalid bbox {value!r}: expected min_lon,min_lat,max_lon,max_lat")
+    if not (-180 <= min_lon <= 180 and -180 <= max_lon <= 180 and -90 <= min_lat <= max_lat <= 90):
+        raise ValueError(f"Invalid bbox {value!r}: coordinates out of range or min_lat > max_lat")
+    return min_lon, min_lat, max_lon, max_lat
+
+
+def parse_point(value: str) -> Tuple[float, float]:
+    """Parses "lat,lon". Raises ValueError if malformed."""
+    try:
+        lat, lon = (float(part) for part in value.split(","))
+    except ValueError:
+        raise ValueError(f"Invalid point {value!r}: expected lat,lon")
+    if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+        raise ValueError(f"Invalid point {value!r}: coordinates out of range")
+    return lat, lon
+
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def _intersects(a: BBox, b: BBox) -> bool:
+    return a[0] <= b[2] and b[0] <= a[2] and a[1] <= b[3] and b[1] <= a[3]
+
+
+def _split_antimeridian(bbox: BBox) -> List[BBox]:
+    min_lon, min_lat, max_lon, max_lat = bbox
+    if min_lon <= max_lon:
+        return [bbox]
+    return [(min_lon, min_lat, 180.0, max_lat), (-180.0, min_lat, max_lon, max_lat)]
+
+
+class GridIndex:
+    """
+    Uniform lat/lon grid over region bounding boxes. A lookup visits only the
+    cells the query box covers and tests the regions registered there, so its
+    cost depends on the query area, not on the number of regions.
+    """
+
+    def __init__(self, regions: Iterable[Region], cell_degrees: float = GAZETTEER_GRID_DEGREES):
+        self.cell_degrees = cell_degrees
+        self.regions = {region.id: region for region in regions}
+        self.cells: Dict[Tuple[int, int], List[Region]] = {}
+        for region in self.regions.values():
+            # A region crossing the antimeridian (min_lon > max_lon) is registered in both halves
+            for part in _split_antimeridian(region.bbox):
+                for cell in self._cells(part):
+                    self.cells.setdefault(cell, []).append(region)
+
+    def _cells(self, bbox: BBox) -> Iterable[Tuple[int, int]]:
+        min_lon, min_lat, max_lon, max_lat = bbox
+        size = self.cell_degrees
+        for x in range(math.floor(min_lon / size), math.floor(max_lon / size) + 1):
+            for y in range(math.floor(min_lat / size), math.floor(max_lat / size) + 1):
+                yield x, y
+
+    def query_bbox(self, bbox: BBox) -> Set[str]:
+        """Ids of the regions whose bounding box intersects `bbox`."""
+        found: Set[str] = set()
+        for part in _split_antimeridian(bbox):
+            for cell in self._cells(part):
+                for region in self.cells.get(cell, ()):
+                    if region.id not in found and any(
+                        _intersects(region_part, part) for region_part in _split_antimeridian(region.bbox)
+                    ):
+                        found.add(region.id)
+        return found
+
+    def query_radius(self, lat: float, lon: float, radius_km: float) -> Set[str]:
+        """Ids of the regions whose bounding box comes within `radius_km` of the point."""
+        lat_delta = radius_km / KM_PER_DEGREE
+        lon_delta = radius_km / (KM_PER_DEGREE * max(math.cos(math.radians(lat)), 1e-6))
+        if lon_delta >= 180:
+            search = (-180.0, max(-90.0, lat - lat_delta), 180.0, min(90.0, lat + lat_delta))
+        else:
+            west = (lon - lon_delta + 180) % 360 - 180
+            east = (lon + lon_delta + 180) % 360 - 180
+            search = (west, max(-90.0, lat - lat_delta), east, min(90.0, lat + lat_delta))
+
+        found = set()
+        for region_id in self.query_bbox(search):
+            for min_lon, min_lat, max_lon, max_lat in _split_antimeridian(self.regions[region_id].bbox):
+                # Distance to the closest point of the box; the point is also tried one turn east
+                # and west, so a box just across the antimeridian counts as near
+                nearest_lat = min(max(lat, min_lat), max_lat)
+                distance = min(
+                    haversine_km(lat, shifted, nearest_lat, min(max(shifted, min_lon), max_lon))
+                    for shifted in (lon - 360, lon, lon + 360)
+                )
+                if distance <= radius_km:
+                    found.add(region_id)
+                    break
+        return found
+
+
+class Gazetteer:
+    """Bundled maritime regions: alias normalization and geographic lookups."""
+
+    def __init__(self, regions: Sequence[Region], cell_degrees: float = GAZETTEER_GRID_DEGREES):
+        self.regions = {region.id: region for region in regions}
+        self.index = GridIndex(regions, cell_degrees)
+        aliases = {}
+        for region in regions:
+            for alias in (region.name, region.id.replace("_", " "), *region.aliases):
+                aliases.setdefault(_normalize_text(alias), region.id)
+        self._aliases = aliases
+        self._pattern = None  # compiled on first normalize()
+
+    @classmethod
+    def load(cls, path: str = GAZETTEER_PATH) -> "Gazetteer":
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        return cls([
+            Region(
+                id=entry["id"],
+                name=entry["name"],
+                kind=entry["kind"],
+                bbox=tuple(entry["bbox"]),
+                aliases=tuple(entry.get("aliases", ())),
+            )
+            for entry in data["regions"]
+        ])
+
+    def normalize(self, region: Optional[str]) -> List[str]:
+        """
+        Maps a free-text region from the LLM ("Southern Red Sea", "Bab el-Mandeb and
+        the Gulf of Aden", ...) to canonical region ids, in order of appearance.
+        Text naming no known region (e.g. "Global") maps to no ids.
+        """
+        if not region:
+            return []
+        if self._pattern is None:
+            # Longest alias first, so "gulf of aden" wins over "aden" at the same position
+            self._pattern = re.compile(
+                r"\b(" + "|".join(re.escape(alias) for alias in sorted(self._aliases, key=len, reverse=True)) + r")\b"
+            )
+        matches = self._pattern.findall(_normalize_text(region))
+        return list(dict.fromkeys(self._aliases[match] for match in matches))
+
+    def regions_in_bbox(self, bbox: BBox) -> Set[str]:
+        return self.index.query_bbox(bbox)
+
+    def regions_near(self, lat: float, lon: float, radius_km: float) -> Set[str]:
+        return self.index.query_radius(lat, lon, radius_km)
+
+
+_gazetteer: Optional[Gazetteer] = None
+
+
+def get_gazetteer() -> Gazetteer:
+    """Loads the bundled gazetteer on first use."""
+    global _gazetteer
+    if _gazetteer is None:
+        _gazetteer = Gazetteer.load()
+    return _gazetteer
+
+
+def add_threat_regions(db: AsyncSession, threats: Iterable[models.Threat]):
+    """
+    Adds the normalized region rows of freshly inserted threats to the session,
+    so they are committed in the same transaction as the threats themselves.
+    """
+    gazetteer = get_gazetteer()
+    db.add_all(
+        models.ThreatRegion(threat_id=threat.id, region_id=region_id)
+        for threat in threats
+        for region_id in gazetteer.normalize(threat.region)
+    )
+
+
+async def rebuild(db: AsyncSession, batch_size: int = 10000) -> Tuple[int, Dict[str, int]]:
+    """
+    Recomputes threat_regions from the threats table, e.g. after a backfill or after
+    extending the gazetteer. Returns the number of threats processed and the counts
+    of the region texts that matched no region.
+    """
+    gazetteer = get_gazetteer()
+    await db.execute(delete(models.ThreatRegion))
+
+    total = 0
+    unmatched: Dict[str, int] = {}
+    last_id = 0
+    while True:
+        batch = (await db.execute(
+            select(models.Threat.id, models.Threat.region)
+            .where(models.Threat.id > last_id)
+            .order_by(models.Threat.id)
+            .limit(batch_size)
+        )).all()
+        if not batch:
+            break
+        rows = []
+        for threat_id, region in batch:
+            region_ids = gazetteer.normalize(region)
+            if not region_ids:
+                unmatched[region or ""] = unmatched.get(region or "", 0) + 1
+            rows.extend({"threat_id": threat_id, "region_id": region_id} for region_id in region_ids)
+        if rows:
+            await db.execute(insert(models.ThreatRegion), rows)
+        total += len(batch)
+        last_id = batch[-1][0]
+    await db.commit()
+    return total, unmatched
+
+
+if __name__ == "__main__":
+    # Usage (from backend/): python -m app.services.gazetteer
+    from ..database import SessionLocal, engine
+
+    async def _rebuild():
+        async with engine.begin() as conn:
+            await conn.run_sync(models.Base.metadata.create_all)
+        async with SessionLocal() as db:
+            count, unmatched = await rebuild(db)
+        await engine.dispose()
+        print(f"Normalized the regions of {count} threats.")
+        if unmatched:
+            print("Most frequent region texts without a gazetteer match:")
+            for text, n in sorted(unmatched.items(), key=lambda item: -item[1])[:20]:
+                print(f"  {n:>6}  {text!r}")
+
+    asyncio.run(_rebuild())
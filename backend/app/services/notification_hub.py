@@ -0,0 +1,146 @@
+import asyncio
+import time
+from typing import AsyncIterator, List, NamedTuple, Optional
+
+# What to do with a subscriber that falls further behind than its buffer allows.
+DROP_OLDEST = "drop_oldest"    # skip ahead, the client loses the oldest events
+DISCONNECT = "disconnect"      # end the stream, the client reconnects with Last-Event-ID
+
+
+class HubEvent(NamedTuple):
+    """A single published event, already serialized for the wire."""
+    id: int
+    data: str
+
+
+class SlowConsumerError(Exception):
+    """Raised inside a subscription that fell behind under the DISCONNECT policy."""
+
+
+class NotificationHub:
+    """
+    Fan-out broadcast hub for Server-Sent Events.
+
+    Every published event is serialized once and stored in a fixed-size ring
+    buffer shared by all subscribers. Each subscriber only keeps a cursor (the
+    ID of the last event it has seen), so its "buffer" is the window of the ring
+    between its cursor and the newest event, capped at `subscriber_buffer_size`.
+    The cap applies to live lag only; a Last-Event-ID replay is delivered in full.
+
+    Publishing is O(1): it writes one ring slot and resolves a single shared
+    wake-up future. Waking the waiting subscribers is scheduled as a separate
+    loop callback, so it never runs on the publisher's critical path.
+    """
+
+    def __init__(
+        self,
+        replay_window: int = 1000,
+        subscriber_buffer_size: int = 100,
+        slow_consumer_policy: str = DROP_OLDEST,
+    ):
+        if slow_consumer_policy not in (DROP_OLDEST, DISCONNECT):
+            raise ValueError(f"Unknown slow consumer policy: {slow_consumer_policy!r}")
+        self.replay_window = max(1, replay_window)
+        # A subscriber can never be further behind than what the ring still holds.
+        self.subscriber_buffer_size = max(1, min(subscriber_buffer_size, self.replay_window))
+        self.slow_consumer_policy = slow_consumer_policy
+
+        self._ring: List[Optional[HubEvent]] = [None] * self.replay_window
+        # IDs are seeded from the wall clock so they keep increasing across restarts.
+        # A client reconnecting after a restart then simply replays what is left.
+        self._first_id = int(time.time() * 1000)
+        self._last_id = self._first_id
+        self._wakeup: Optional[asyncio.Future] = None
+
+        self.subscriber_count = 0
+        self.dropped_events = 0
+        self.disconnected_subscribers = 0
+
+    @property
+    def last_event_id(self) -> int:
+        return self._last_id
+
+    @property
+    def oldest_event_id(self) -> int:
+        """ID of the oldest event still available for replay."""
+        return max(self._first_id + 1, self._last_id - self.replay_window + 1)
+
+    def publish(self, data: str) -> int:
+        """
+        Stores a serialized event and wakes up all subscribers.
+        Returns the ID assigned to the event.
+        """
+        self._last_id += 1
+        event_id = self._last_id
+        self._ring[event_id % self.replay_window] = HubEvent(event_id, data)
+
+        waiter, self._wakeup = self._wakeup, None
+        if waiter is not None:
+            # Resolving the future schedules one callback per waiting subscriber,
+            # so defer it to keep publish() constant-time.
+            waiter.get_loop().call_soon(_release, waiter)
+        return event_id
+
+    def events_after(self, event_id: int) -> List[HubEvent]:
+        """Returns the buffered events newer than `event_id` (used for replay)."""
+        start = max(event_id + 1, self.oldest_event_id)
+        return [self._ring[i % self.replay_window] for i in range(start, self._last_id + 1)]
+
+    async def subscribe(self, last_event_id: Optional[int] = None) -> AsyncIterator[HubEvent]:
+        """
+        Yields events as they are published.
+
+        If `last_event_id` is given (the SSE `Last-Event-ID` header), the events
+        published after it that are still in the replay window are yielded first.
+        """
+        if last_event_id is None or last_event_id > self._last_id:
+            cursor = self._last_id
+        else:
+            cursor = last_event_id
+
+        # Events up to here are replay: bounded by the ring and delivered in full.
+        # Only lag behind events published after subscribing counts against the buffer.
+        replay_end = self._last_id
+        delivered = False
+
+        self.subscriber_count += 1
+        try:
+            while True:
+                if cursor >= self._last_id:
+                    await self._wait()
+                    continue
+
+                # Anything older than the ring is gone for good.
+                cursor = max(cursor, self.oldest_event_id - 1)
+
+                backlog = self._last_id - cursor
+                if cursor >= replay_end and backlog > self.subscriber_buffer_size:
+                    if self.slow_consumer_policy == DISCONNECT:
+                        # Disconnect only once the client got something, so its Last-Event-ID
+                        # moves forward and a reconnect can't be dropped before making progress.
+                        if delivered:
+                            self.disconnected_subscribers += 1
+                            raise SlowConsumerError(
+                                f"Subscriber is {backlog} events behind (buffer size {self.subscriber_buffer_size})."
+                            )
+                    else:
+                        skipped = backlog - self.subscriber_buffer_size
+                        self.dropped_events += skipped
+                        cursor += skipped
+
+                cursor += 1
+                delivered = True
+                yield self._ring[cursor % self.replay_window]
+        finally:
+            self.subscriber_count -= 1
+
+    async def _wait(self):
+        if self._wakeup is None:
+            self._wakeup = asyncio.get_running_loop().create_future()
+        # Shield the shared future so one subscriber disconnecting doesn't cancel it for everyone.
+        await asyncio.shield(self._wakeup)
+
+
+def _release(waiter: asyncio.Future):
+    if not waiter.done():
+        waiter.set_result(None)
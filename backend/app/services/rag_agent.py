@@ -1,13 +1,22 @@
 import os
-import json
-import re
+import time
+import asyncio
+from contextvars import ContextVar
+from datetime import datetime, timezone
 from dotenv import load_dotenv
 from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain_tavily import TavilySearch
 from langchain.agents import AgentExecutor, create_tool_calling_agent
 from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.tools import BaseTool
 from pydantic import BaseModel, Field
-from typing import List
+from typing import AsyncIterator, Dict, List, Optional, Sequence
+from .. import metrics
+from .cache import PersistentCache, content_key
+from .dedup import canonicalize_url
+from .discovery_jobs import RunStats
+from .discovery_ledger import ledger, parse_published_date
+from .report_stream import ReportStreamParser
 
 # Load API keys from the .env file
 load_dotenv()
@@ -23,12 +32,161 @@ class ThreatReport(BaseModel):
     source_urls: List[str] = Field(description="A list of URLs for the sources used to identify the threat.")
     date_mentioned: str = Field(description="The date when the threat was mentioned in the sources. Usually a date on top for the article.")
 
-# Initialize the Gemini model
-llm = ChatGoogleGenerativeAI(model="gemini-2.5-flash", temperature=0.1)
+# --- Discovery Configuration ---
+# Each sub-query runs as its own agent invocation; together they cover regions and topics
+# a single broad query tends to miss. Override with a ';'-separated DISCOVERY_QUERIES.
+DEFAULT_DISCOVERY_QUERIES = [
+    "Find recent geopolitical threats to the maritime industry.",
+    "Find recent threats to shipping in the Red Sea, Bab el-Mandeb and Gulf of Aden.",
+    "Find recent threats to shipping in the Strait of Hormuz and the Persian Gulf.",
+    "Find recent threats to shipping in the Strait of Malacca and Singapore Strait.",
+    "Find recent threats to shipping in the South China Sea and Taiwan Strait.",
+    "Find recent threats to shipping in the Black Sea.",
+    "Find recent piracy and armed robbery incidents in the Gulf of Guinea.",
+    "Find recent maritime piracy incidents worldwide.",
+    "Find recent sanctions affecting shipping, tankers and ports.",
+    "Find recent tariff changes affecting maritime trade and shipping costs.",
+]
+DISCOVERY_QUERIES = [q.strip() for q in os.getenv("DISCOVERY_QUERIES", "").split(";") if q.strip()] or DEFAULT_DISCOVERY_QUERIES
+# How many sub-queries may run at once, and how long each one may take
+DISCOVERY_CONCURRENCY = int(os.getenv("DISCOVERY_CONCURRENCY", "4"))
+DISCOVERY_QUERY_TIMEOUT_SECONDS = float(os.getenv("DISCOVERY_QUERY_TIMEOUT_SECONDS", "180"))
 
-# Initialize the search tool
-search_tool = TavilySearch(max_results=10)
-tools = [search_tool]
+# --- Search Cache ---
+# Search results are reused within a time bucket. Articles the LLM has already read are
+# dropped from the results by the source ledger (see filter_processed_articles).
+DISCOVERY_CACHE_ENABLED = os.getenv("DISCOVERY_CACHE_ENABLED", "true").lower() != "false"
+SEARCH_CACHE_BUCKET_SECONDS = int(os.getenv("SEARCH_CACHE_BUCKET_SECONDS", str(6 * 3600)))
+
+search_cache = PersistentCache("search", ttl_seconds=SEARCH_CACHE_BUCKET_SECONDS)
+
+class QueryContext:
+    """Articles seen by the agent during one sub-query."""
+    def __init__(self, query: str = "", full_rescan: bool = False):
+        self.query = query
+        self.started_at = datetime.now(timezone.utc)
+        # A full rescan ignores the watermark and the ledger of processed sources
+        self.full_rescan = full_rescan
+        # Articles published before this were covered by an earlier run (None: no watermark yet)
+        self.cutoff: Optional[datetime] = None
+        # canonical URL -> publish date of every article handled, for the ledger
+        self.sources: Dict[str, Optional[datetime]] = {}
+        self.processed = 0
+        self.skipped = 0
+        # Set once the agent has answered; only then are the sources recorded in the ledger
+        self.completed = False
+
+    def skip(self, reason: str):
+        self.skipped += 1
+        metrics.DISCOVERY_SOURCES.inc(outcome=f"skipped_{reason}")
+
+# Set by run_query so the (shared) search tool knows which sub-query it is serving
+_query_context: ContextVar[Optional[QueryContext]] = ContextVar("query_context", default=None)
+
+async def filter_processed_articles(result):
+    """
+    Removes articles the LLM doesn't need to read from a search result: ones
+    published before the query's watermark and ones already in the ledger of
+    processed sources. A full rescan drops neither.
+    """
+    context = _query_context.get()
+    if context is None or not isinstance(result, dict) or not isinstance(result.get("results"), list):
+        return result
+
+    canonical_urls = {canonicalize_url(item["url"]) for item in result["results"] if item.get("url")}
+    known = set()
+    if not context.full_rescan:
+        try:
+            known = await ledger.known(canonical_urls)
+        except Exception as e:
+            print(f"Warning: Could not check the source ledger, treating all articles as new: {e}")
+
+    fresh_results = []
+    for item in result["results"]:
+        url = item.get("url")
+        if not url:
+            context.processed += 1
+            metrics.DISCOVERY_SOURCES.inc(outcome="processed")
+            fresh_results.append(item)
+            continue
+        canonical = canonicalize_url(url)
+        published_at = parse_published_date(item.get("published_date"))
+        # Also drops articles an earlier search of this same sub-query already returned
+        if canonical in known or canonical in context.sources:
+            context.skip("ledger")
+            continue
+        if context.cutoff is not None and published_at is not None and published_at < context.cutoff:
+            context.skip("watermark")
+            continue
+        context.sources[canonical] = published_at
+        context.processed += 1
+        metrics.DISCOVERY_SOURCES.inc(outcome="processed")
+        fresh_results.append(item)
+    return {**result, "results": fresh_results}
+
+class CachedSearchTool(BaseTool):
+    """
+    Wraps a search tool with the persistent search cache (if enabled), keyed by
+    the query arguments and a time bucket, and filters out already-processed
+    articles (see filter_processed_articles).
+    """
+    inner: BaseTool
+    bucket_seconds: int = SEARCH_CACHE_BUCKET_SECONDS
+    use_cache: bool = DISCOVERY_CACHE_ENABLED
+
+    def __init__(self, inner: BaseTool, **kwargs):
+        super().__init__(
+            name=inner.name, description=inner.description, args_schema=inner.args_schema, inner=inner, **kwargs
+        )
+
+    def _cache_key(self, kwargs: dict) -> str:
+        bucket = int(time.time() // self.bucket_seconds)
+        return content_key(self.inner.name, kwargs, bucket)
+
+    @staticmethod
+    def _cacheable(result) -> bool:
+        # Don't pin API errors in the cache for the rest of the bucket
+        return isinstance(result, (dict, list, str)) and not (isinstance(result, dict) and result.get("error"))
+
+    def _run(self, **kwargs):
+        """
+        Sync use (e.g. tool.invoke() from a script): the same search cache. Articles are
+        only filtered inside a discovery sub-query, and those always run async.
+        """
+        if not self.use_cache:
+            return self.inner.invoke(kwargs)
+        key = self._cache_key(kwargs)
+        result = search_cache.get(key)
+        if result is None:
+            result = self.inner.invoke(kwargs)
+            if self._cacheable(result):
+                search_cache.set(key, result)
+        return result
+
+    async def _arun(self, **kwargs):
+        if not self.use_cache:
+            return await filter_processed_articles(await self.inner.ainvoke(kwargs))
+        key = self._cache_key(kwargs)
+        result = await search_cache.aget(key)
+        if result is None:
+            result = await self.inner.ainvoke(kwargs)
+            if self._cacheable(result):
+                await search_cache.aset(key, result)
+        return await filter_processed_articles(result)
+
+# The Gemini model, search tool and agent are built on first use (see get_agent_executor),
+# so importing this module stays cheap and doesn't require API keys
+_agent_executor: Optional[AgentExecutor] = None
+
+def build_llm():
+    # Initialize the Gemini model
+    return ChatGoogleGenerativeAI(model="gemini-2.5-flash", temperature=0.1)
+
+def build_tools() -> list:
+    # Initialize the search tool
+    search_tool = TavilySearch(max_results=10)
+    # Always wrapped: besides caching, the wrapper drops already-processed articles
+    return [CachedSearchTool(search_tool, use_cache=DISCOVERY_CACHE_ENABLED)]
 
 # This is the detailed instruction manual (prompt) for our AI agent.
 PROMPT = """
@@ -80,38 +238,228 @@ prompt_template = ChatPromptTemplate.from_messages([
     ("placeholder", "{agent_scratchpad}"),
 ])
 
-agent = create_tool_calling_agent(llm, tools, prompt_template)
-agent_executor = AgentExecutor(agent=agent, tools=tools, verbose=True) # verbose=True lets us see the agent's "thoughts"
+def build_agent_executor(chat_model=None, agent_tools=None) -> AgentExecutor:
+    """
+    Builds the tool-calling agent. Tests and benchmarks can pass a fake chat
+    model and search tool to run discovery offline.
+    """
+    chat_model = chat_model if chat_model is not None else build_llm()
+    agent_tools = agent_tools if agent_tools is not None else build_tools()
+    agent = create_tool_calling_agent(chat_model, agent_tools, prompt_template)
+    return AgentExecutor(agent=agent, tools=agent_tools, verbose=True) # verbose=True lets us see the agent's "thoughts"
 
-async def find_maritime_threats() -> List[ThreatReport]:
+def get_agent_executor() -> AgentExecutor:
     """
-    Runs the RAG agent to find and structure maritime threats.
-    Returns a list of ThreatReport objects.
-    """
-    query = "Find recent geopolitical threats to the maritime industry."
-    
-    response = await agent_executor.ainvoke({"input": query})
-    
-    #print(f"Agent response 1: {response}")  # Debugging output
-    
-    # Try to parse the agent's final answer
+    Returns the shared agent executor, building it on first use.
+    """
+    global _agent_executor
+    if _agent_executor is None:
+        _agent_executor = build_agent_executor()
+    return _agent_executor
+
+def validate_items(items: list, query: str) -> List[ThreatReport]:
+    """
+    Turns parsed report objects into ThreatReport models, logging and skipping bad ones.
+    """
+    reports = []
+    for item in items:
+        try:
+            if isinstance(item, Exception):
+                raise item
+            reports.append(ThreatReport(**item))
+        except (ValueError, TypeError) as e:  # pydantic's ValidationError is a ValueError
+            metrics.PARSE_FAILURES.inc()
+            print(f"Error: Skipping malformed report for query '{query}'. Error: {e}")
+    return reports
+
+def parse_agent_output(raw_output: str, query: str = "") -> List[ThreatReport]:
+    """
+    Parses a complete agent answer into ThreatReport objects.
+    Each report is parsed on its own, so a malformed one only drops itself.
+    """
+    return validate_items(ReportStreamParser().feed(raw_output), query)
+
+def _chunk_text(chunk) -> str:
+    """Text content of a streamed message chunk (Gemini may send a list of parts)."""
+    content = getattr(chunk, "content", chunk)
+    if isinstance(content, str):
+        return content
+    if isinstance(content, list):
+        return "".join(part if isinstance(part, str) else part.get("text", "") for part in content)
+    return ""
+
+def query_input(query: str, cutoff: Optional[datetime]) -> str:
+    """The agent input for a sub-query, limited to material newer than the watermark."""
+    if cutoff is None:
+        return query
+    return (
+        f"{query}\nOnly material published since {cutoff:%Y-%m-%d %H:%M} UTC is new; "
+        "earlier articles were already processed, so don't search for or report them."
+    )
+
+async def stream_query(
+    executor: AgentExecutor, query: str, context: Optional[QueryContext] = None
+) -> AsyncIterator[ThreatReport]:
+    """
+    Runs the agent for a single sub-query, yielding each report as soon as the
+    LLM has finished writing it.
+    Unless `context.full_rescan` is set, only articles newer than the query's
+    watermark and not yet in the source ledger reach the LLM.
+    """
+    context = context if context is not None else QueryContext(query)
+    if not context.full_rescan:
+        try:
+            context.cutoff = await ledger.cutoff(query)
+        except Exception as e:
+            print(f"Warning: Could not read the watermark for query '{query}', running it in full: {e}")
+    token = _query_context.set(context)
+    parser = ReportStreamParser()
+    reports: List[ThreatReport] = []
+    # Start times of the LLM turns and tool calls in flight, by run id, for the stage timers
+    started: Dict[str, float] = {}
+    parse_seconds = 0.0
+    try:
+        async for event in executor.astream_events({"input": query_input(query, context.cutoff)}, version="v2"):
+            kind = event["event"]
+            if kind == "on_chat_model_start":
+                # Each LLM turn starts a fresh answer; earlier turns were tool calls
+                parser.reset()
+                started[event["run_id"]] = time.perf_counter()
+            elif kind == "on_chat_model_stream":
+                t0 = time.perf_counter()
+                new_reports = validate_items(parser.feed(_chunk_text(event["data"]["chunk"])), query)
+                parse_seconds += time.perf_counter() - t0
+                for report in new_reports:
+                    reports.append(report)
+                    yield report
+            elif kind == "on_tool_start":
+                # Only time the outermost tool call (CachedSearchTool wraps the real search tool)
+                if not any(parent in started for parent in event.get("parent_ids", ())):
+                    started[event["run_id"]] = time.perf_counter()
+            elif kind in ("on_chat_model_end", "on_tool_end", "on_tool_error"):
+                t0 = started.pop(event["run_id"], None)
+                if t0 is not None:
+                    stage = "llm" if kind == "on_chat_model_end" else "search"
+                    metrics.STAGE_SECONDS.observe(time.perf_counter() - t0, stage=stage)
+    finally:
+        _query_context.reset(token)
+        metrics.STAGE_SECONDS.observe(parse_seconds, stage="parse")
+
+    if not parser.done and not reports:
+        print(f"Error: Could not find a reports list in the LLM response for query '{query}'.")
+        return
+    context.completed = True
+
+def report_key(report: ThreatReport) -> tuple:
+    """Reports from overlapping sub-queries with the same title and region are the same report."""
+    return (report.title.strip().lower(), report.region.strip().lower())
+
+async def stream_maritime_threats(
+    queries: Optional[Sequence[str]] = None,
+    executor: Optional[AgentExecutor] = None,
+    concurrency: int = DISCOVERY_CONCURRENCY,
+    timeout: float = DISCOVERY_QUERY_TIMEOUT_SECONDS,
+    full_rescan: bool = False,
+    stats: Optional[RunStats] = None,
+) -> AsyncIterator[ThreatReport]:
+    """
+    Runs the RAG agent to find and structure maritime threats, yielding each
+    ThreatReport as soon as it is complete.
+    The sub-queries run concurrently (at most `concurrency` at a time, each
+    limited to `timeout` seconds); a sub-query that fails or times out is
+    logged and skipped without affecting the others. Exact repeats found by
+    overlapping sub-queries are only yielded once.
+
+    Discovery is incremental: once every report has been consumed, the sources
+    of the sub-queries that succeeded go into the ledger and their watermarks
+    advance, so the next run skips them. `full_rescan` ignores both (but still
+    records).
+    Source counts are added to `stats` as each sub-query finishes.
+    """
+    queries = list(queries) if queries is not None else DISCOVERY_QUERIES
+    executor = executor if executor is not None else get_agent_executor()
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    results: asyncio.Queue = asyncio.Queue()
+    finished = object()
+
+    contexts: List[QueryContext] = []
+
+    async def produce(query: str):
+        context = QueryContext(query, full_rescan=full_rescan)
+        contexts.append(context)
+
+        async def pump():
+            async for report in stream_query(executor, query, context):
+                await results.put(report)
+        try:
+            async with semaphore:
+                with metrics.stage("query"):
+                    await asyncio.wait_for(pump(), timeout=timeout)
+        except asyncio.TimeoutError:
+            metrics.QUERY_FAILURES.inc(reason="timeout")
+            print(f"Error: Query '{query}' timed out after {timeout}s.")
+        except Exception as e:
+            metrics.QUERY_FAILURES.inc(reason="error")
+            print(f"Error: Query '{query}' failed. Error: {e}")
+        finally:
+            if stats is not None:
+                stats.sources_processed += context.processed
+                stats.sources_skipped += context.skipped
+            await results.put(finished)
+
+    producers = [asyncio.create_task(produce(query)) for query in queries]
+    seen = set()
+    remaining = len(producers)
     try:
-        raw_output = response.get("output", "{}")
-
-        # Extract JSON content from a ```json fenced block using regex
-        match = re.search(r"```(?:json)?\s*(\{.*?\})\s*```", raw_output, re.DOTALL)
-        if match:
-            json_str = match.group(1)
-            output_data = json.loads(json_str)
-        else:
-            # Fall back to normal loading (if no code block found)
-            output_data = json.loads(raw_output)
-        
-        
-        report_list = output_data.get("reports", [])
-        # Convert the raw dictionaries into our ThreatReport Pydantic models
-        return [ThreatReport(**report) for report in report_list]
-    except (json.JSONDecodeError, TypeError) as e:
-        print(f"Error: Could not parse LLM response. Error: {e}")
-        print(f"Received response: {response.get('output')}")
-        return []
\ No newline at end of file
+        while remaining:
+            item = await results.get()
+            if item is finished:
+                remaining -= 1
+                continue
+            key = report_key(item)
+            if key in seen:
+                continue
+            seen.add(key)
+            yield item
+    finally:
+        # Stop the sub-queries if our consumer went away early
+        for producer in producers:
+            producer.cancel()
+        await asyncio.gather(*producers, return_exceptions=True)
+
+    # Every report has been handled by now: mark the sources of the completed sub-queries as processed
+    for context in contexts:
+        if context.completed:
+            try:
+                await ledger.record(context.query, context.started_at, context.sources)
+            except Exception as e:
+                print(f"Warning: Could not update the source ledger for query '{context.query}': {e}")
+    try:
+        await ledger.prune()
+    except Exception as e:
+        print(f"Warning: Could not prune the source ledger: {e}")
+
+    processed = sum(context.processed for context in contexts)
+    skipped = sum(context.skipped for context in contexts)
+    print(f"Agent finished {len(queries)} queries with {len(seen)} reports "
+          f"({processed} sources processed, {skipped} skipped as already seen).")
+    if DISCOVERY_CACHE_ENABLED:
+        print(f"Search cache stats: {search_cache.stats}")
+
+async def find_maritime_threats(
+    queries: Optional[Sequence[str]] = None,
+    executor: Optional[AgentExecutor] = None,
+    concurrency: int = DISCOVERY_CONCURRENCY,
+    timeout: float = DISCOVERY_QUERY_TIMEOUT_SECONDS,
+    full_rescan: bool = False,
+) -> List[ThreatReport]:
+    """
+    Runs the RAG agent to find and structure maritime threats.
+    Returns a list of ThreatReport objects (see stream_maritime_threats).
+    """
+    return [
+        report
+        async for report in stream_maritime_threats(
+            queries, executor, concurrency=concurrency, timeout=timeout, full_rescan=full_rescan
+        )
+    ]
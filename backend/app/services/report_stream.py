@@ -0,0 +1,108 @@
+import json
+import re
+from typing import List, Union
+
+# Start of the reports array in the agent's answer: "reports": [
+_REPORTS_ARRAY_RE = re.compile(r'"reports"\s*:\s*\[')
+
+
+class ReportStreamParser:
+    """
+    Incremental parser for the agent's {"reports": [...]} answer.
+
+    Text is fed in as it streams from the LLM. Each object of the reports array
+    is returned from feed() as soon as its closing brace arrives, decoded on its
+    own, so one malformed report doesn't take the rest of the answer with it.
+    Anything around the JSON (```json fences, prose) is ignored.
+    """
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self._buffer = ""          # Text not consumed yet
+        self._in_array = False     # Seen `"reports": [`
+        self._done = False         # Seen the closing `]`
+        self._depth = 0            # Brace depth inside the current object
+        self._in_string = False
+        self._escaped = False
+        self._object_start = None  # Buffer index of the current object's `{`
+        self._pos = 0              # Buffer index where scanning resumes
+        self.items_parsed = 0
+        self.items_failed = 0
+
+    @property
+    def done(self) -> bool:
+        return self._done
+
+    def feed(self, text: str) -> List[Union[dict, ValueError]]:
+        """
+        Consumes the next chunk of text. Returns the report objects completed by
+        it, with a ValueError in place of each one that isn't valid JSON.
+        """
+        if self._done or not text:
+            return []
+        self._buffer += text
+
+        if not self._in_array:
+            match = _REPORTS_ARRAY_RE.search(self._buffer)
+            if match is None:
+                # Keep a short tail in case the marker is split across chunks
+                self._buffer = self._buffer[-32:]
+                return []
+            self._in_array = True
+            self._buffer = self._buffer[match.end():]
+
+        items = []
+        i = self._pos
+        consumed = 0
+        while i < len(self._buffer):
+            char = self._buffer[i]
+            if self._object_start is None:
+                if char == "{":
+                    self._object_start = i
+                    self._depth = 1
+                elif char == "]":
+                    self._done = True
+                    consumed = i + 1
+                    break
+                else:
+                    # Whitespace and commas between objects
+                    consumed = i + 1
+            elif self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char == "{":
+                self._depth += 1
+            elif char == "}":
+                self._depth -= 1
+                if self._depth == 0:
+                    items.append(self._decode(self._buffer[self._object_start:i + 1]))
+                    self._object_start = None
+                    consumed = i + 1
+            i += 1
+
+        # Drop what has been handled; an unfinished object keeps its text (re-based to index 0)
+        if self._object_start is not None and not self._done:
+            consumed = self._object_start
+            self._object_start = 0
+        self._buffer = self._buffer[consumed:]
+        self._pos = len(self._buffer)
+        return items
+
+    def _decode(self, raw: str) -> Union[dict, ValueError]:
+        try:
+            item = json.loads(raw)
+            if not isinstance(item, dict):
+                raise ValueError("report is not a JSON object")
+            self.items_parsed += 1
+            return item
+        except ValueError as e:
+            self.items_failed += 1
+            return ValueError(f"Malformed report {raw[:80]!r}...: {e}")
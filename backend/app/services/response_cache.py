@@ -0,0 +1,84 @@
+import hashlib
+import os
+import time
+from collections import OrderedDict
+from typing import Dict, Hashable, NamedTuple, Optional
+
+# How many distinct query responses to keep (0 disables the cache)
+READ_CACHE_MAX_ENTRIES = int(os.getenv("READ_CACHE_MAX_ENTRIES", "512"))
+# Upper bound on staleness for writes made by *other* processes, which don't bump our version
+READ_CACHE_TTL_SECONDS = float(os.getenv("READ_CACHE_TTL_SECONDS", "60"))
+
+
+class CachedResponse(NamedTuple):
+    body: bytes
+    etag: str
+    headers: Dict[str, str]
+    stored_at: float
+
+
+def make_etag(version: int, body: bytes) -> str:
+    return f'"{version}-{hashlib.blake2b(body, digest_size=12).hexdigest()}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    True if an If-None-Match header value matches `etag` (weak comparison, as HTTP requires for GET).
+    """
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or any(tag.removeprefix("W/") == etag for tag in candidates)
+
+
+class ResponseCache:
+    """
+    In-process LRU cache of fully serialized responses.
+
+    Entries are tied to a dataset version counter that writers bump on every
+    insert, so a write invalidates everything at once without having to know
+    which queries it affects.
+    """
+
+    def __init__(self, max_entries: int = READ_CACHE_MAX_ENTRIES, ttl_seconds: float = READ_CACHE_TTL_SECONDS):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.version = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Hashable, CachedResponse]" = OrderedDict()
+
+    def bump_version(self):
+        """Invalidates all cached responses; call after every write to the dataset."""
+        self.version += 1
+        self._entries.clear()
+
+    def get(self, key: Hashable) -> Optional[CachedResponse]:
+        entry = self._entries.get(key)
+        if entry is None or time.monotonic() - entry.stored_at > self.ttl_seconds:
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    def put(self, key: Hashable, body: bytes, headers: Optional[Dict[str, str]] = None,
+            version: Optional[int] = None) -> CachedResponse:
+        """
+        Stores a response. Pass the `version` read before querying the database:
+        if a write happened in the meantime the response is returned but not cached.
+        """
+        version = self.version if version is None else version
+        entry = CachedResponse(body, make_etag(version, body), headers or {}, time.monotonic())
+        if self.max_entries > 0 and version == self.version:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return entry
+
+
+# Cache for GET /api/threats/, invalidated by crud on every insert
+threats_cache = ResponseCache()
@@ -0,0 +1,159 @@
+import asyncio
+from collections import Counter
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import delete, func, insert, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .. import models
+
+# --- Configuration ---
+BUCKETS = ("day", "week", "month")
+DIMENSIONS = ("region", "category")
+
+RollupKey = Tuple[str, date, str, str]  # (bucket, bucket_start, region, category)
+
+
+def bucket_start(created_at: datetime, bucket: str) -> date:
+    """
+    Start of the UTC day, week (Monday) or month that `created_at` falls in.
+    Naive datetimes (SQLite) are taken to be UTC already.
+    """
+    if created_at.tzinfo is not None:
+        created_at = created_at.astimezone(timezone.utc)
+    day = created_at.date()
+    if bucket == "week":
+        return day - timedelta(days=day.weekday())
+    if bucket == "month":
+        return day.replace(day=1)
+    return day
+
+
+def rollup_increments(threats: Iterable) -> Counter:
+    """
+    Counts threats per rollup key for every bucket size. Accepts Threat objects or
+    any rows with created_at, region and category attributes.
+    """
+    counts: Counter = Counter()
+    for threat in threats:
+        for bucket in BUCKETS:
+            counts[(bucket, bucket_start(threat.created_at, bucket), threat.region or "", threat.category or "")] += 1
+    return counts
+
+
+async def apply_increments(db: AsyncSession, counts: Dict[RollupKey, int]):
+    """
+    Adds `counts` to the rollup table inside the caller's transaction, with one
+    INSERT ... ON CONFLICT DO UPDATE so concurrent writers never lose increments.
+    """
+    if not counts:
+        return
+    table = models.ThreatRollup.__table__
+    rows = [
+        {"bucket": bucket, "bucket_start": start, "region": region, "category": category, "count": count}
+        for (bucket, start, region, category), count in counts.items()
+    ]
+
+    dialect = db.bind.dialect.name
+    if dialect in ("postgresql", "sqlite"):
+        dialect_insert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+        statement = dialect_insert(table)
+        statement = statement.on_conflict_do_update(
+            index_elements=[table.c.bucket, table.c.bucket_start, table.c.region, table.c.category],
+            set_={"count": table.c.count + statement.excluded["count"]},
+        )
+        await db.execute(statement, rows)
+        return
+
+    # Other databases: update in place, insert the buckets that don't exist yet
+    for row in rows:
+        result = await db.execute(
+            update(table)
+            .where(
+                table.c.bucket == row["bucket"],
+                table.c.bucket_start == row["bucket_start"],
+                table.c.region == row["region"],
+                table.c.category == row["category"],
+            )
+            .values(count=table.c.count + row["count"])
+        )
+        if not result.rowcount:
+            await db.execute(insert(table), [row])
+
+
+async def add_threats(db: AsyncSession, threats: Sequence[models.Threat]):
+    """Counts newly inserted threats into the rollups (same transaction as the insert)."""
+    await apply_increments(db, rollup_increments(threats))
+
+
+async def rebuild(db: AsyncSession, batch_size: int = 10000) -> int:
+    """
+    Recomputes the rollup table from the threats table, e.g. after a backfill.
+    Streams the threats once and returns the number counted.
+    """
+    await db.execute(delete(models.ThreatRollup))
+
+    counts: Counter = Counter()
+    total = 0
+    result = await db.stream(
+        select(models.Threat.created_at, models.Threat.region, models.Threat.category)
+        .execution_options(yield_per=batch_size)
+    )
+    async for partition in result.partitions():
+        counts.update(rollup_increments(partition))
+        total += len(partition)
+
+    await apply_increments(db, counts)
+    await db.commit()
+    return total
+
+
+async def get_stats(
+    db: AsyncSession,
+    bucket: str = "day",
+    group_by: Sequence[str] = (),
+    region: Optional[str] = None,
+    category: Optional[str] = None,
+    created_after: Optional[datetime] = None,
+    created_before: Optional[datetime] = None,
+) -> List[dict]:
+    """
+    Threat counts per time bucket, optionally broken down by region and/or category,
+    oldest bucket first. Reads only the rollup table, so the cost grows with the
+    number of buckets returned, not with the number of threats.
+
+    The time filters select whole buckets: from the one containing `created_after`
+    up to (excluding) those starting on or after the day of `created_before`.
+    """
+    rollup = models.ThreatRollup
+    columns = [rollup.bucket_start] + [getattr(rollup, dimension) for dimension in group_by]
+    query = select(*columns, func.sum(rollup.count).label("count")).where(rollup.bucket == bucket)
+
+    if region is not None:
+        query = query.where(rollup.region == region)
+    if category is not None:
+        query = query.where(rollup.category == category)
+    if created_after is not None:
+        query = query.where(rollup.bucket_start >= bucket_start(created_after, bucket))
+    if created_before is not None:
+        query = query.where(rollup.bucket_start < bucket_start(created_before, "day"))
+
+    query = query.group_by(*columns).order_by(*columns)
+    return [dict(row._mapping) for row in await db.execute(query)]
+
+
+if __name__ == "__main__":
+    # Usage (from backend/): python -m app.services.rollups
+    from ..database import SessionLocal, engine
+
+    async def _rebuild():
+        async with engine.begin() as conn:
+            await conn.run_sync(models.Base.metadata.create_all)
+        async with SessionLocal() as db:
+            count = await rebuild(db)
+        await engine.dispose()
+        print(f"Rebuilt threat rollups from {count} threats.")
+
+    asyncio.run(_rebuild())
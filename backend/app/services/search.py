@@ -0,0 +1,237 @@
+import html
+import math
+import re
+from array import array
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, List, NamedTuple, Optional
+
+from sqlalchemy import func, literal_column, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .. import models
+from ..crud import filter_threats
+
+# --- PostgreSQL: generated tsvector column + GIN index ---
+# Title and region weigh most, then the description, then the impact. The column is
+# GENERATED ... STORED, so Postgres keeps it up to date on every insert/update.
+SEARCH_DDL = [
+    """
+    ALTER TABLE threats ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(region, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(description, '')), 'B') ||
+        setweight(to_tsvector('english', coalesce(potential_impact, '')), 'C')
+    ) STORED
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_threats_search_vector ON threats USING GIN (search_vector)",
+]
+# Titles and descriptions come from the web via the LLM, so snippets are HTML-escaped and only
+# the <mark> tags are markup. ts_headline marks matches with private-use sentinels instead,
+# which are swapped for <mark> after escaping.
+MARK_START, MARK_STOP = "\ue000", "\ue001"
+HEADLINE_OPTIONS = f"StartSel={MARK_START}, StopSel={MARK_STOP}, MaxFragments=2, MaxWords=30, MinWords=10"
+
+# Field weights for the in-process fallback, mirroring the setweight() calls above
+FIELD_WEIGHTS = {"title": 3, "region": 3, "description": 2, "potential_impact": 1}
+HIGHLIGHT_FIELDS = ("title", "description", "potential_impact")
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def create_search_index(connection):
+    """
+    Adds the full-text search column and index on PostgreSQL. Idempotent; runs on a
+    sync connection (see main.create_schema). Other databases use InvertedIndex.
+    """
+    if connection.dialect.name != "postgresql":
+        return
+    for statement in SEARCH_DDL:
+        connection.execute(text(statement))
+
+
+class SearchHit(NamedTuple):
+    threat: models.Threat
+    rank: float
+    highlights: Dict[str, str]
+
+
+def tokenize(value: Optional[str]) -> List[str]:
+    return _TOKEN_RE.findall(value.lower()) if value else []
+
+
+def highlight(value: Optional[str], terms: set) -> str:
+    """HTML-escapes `value` and wraps the words in `terms` in <mark> tags."""
+    if not value:
+        return ""
+    parts = []
+    for segment in re.split(r"([A-Za-z0-9]+)", value):
+        escaped = html.escape(segment)
+        parts.append(f"<mark>{escaped}</mark>" if segment.lower() in terms else escaped)
+    return "".join(parts)
+
+
+def escape_headline(value: Optional[str]) -> str:
+    """HTML-escapes a ts_headline() snippet, turning its sentinel markers into <mark> tags."""
+    if not value:
+        return ""
+    return html.escape(value).replace(MARK_START, "<mark>").replace(MARK_STOP, "</mark>")
+
+
+class InvertedIndex:
+    """
+    In-process BM25 index over the searchable threat fields, used where
+    PostgreSQL full-text search isn't available (e.g. SQLite test setups).
+
+    Postings are compact arrays (doc ids + weighted term frequencies). The index
+    catches up incrementally with rows inserted since the last refresh, also by
+    other processes, so it never needs an explicit invalidation.
+    """
+
+    K1 = 1.2
+    B = 0.75
+
+    def __init__(self):
+        self._postings: Dict[str, tuple] = defaultdict(lambda: (array("I"), array("H")))
+        self._lengths: Dict[int, int] = {}
+        self._total_length = 0
+        self._last_id = 0
+
+    def __len__(self):
+        return len(self._lengths)
+
+    def add(self, threat: models.Threat):
+        if threat.id in self._lengths:
+            return
+        counts: Dict[str, int] = defaultdict(int)
+        length = 0
+        for field, weight in FIELD_WEIGHTS.items():
+            for token in tokenize(getattr(threat, field)):
+                counts[token] += weight
+                length += weight
+        for token, count in counts.items():
+            doc_ids, freqs = self._postings[token]
+            doc_ids.append(threat.id)
+            freqs.append(min(count, 65535))
+        self._lengths[threat.id] = length
+        self._total_length += length
+        self._last_id = max(self._last_id, threat.id)
+
+    async def refresh(self, db: AsyncSession, batch_size: int = 5000):
+        """Indexes threats inserted since the last refresh."""
+        while True:
+            threats = (await db.scalars(
+                select(models.Threat).where(models.Threat.id > self._last_id).order_by(models.Threat.id).limit(batch_size)
+            )).all()
+            for threat in threats:
+                self.add(threat)
+            if len(threats) < batch_size:
+                break
+
+    def search(self, terms: List[str]) -> Dict[int, float]:
+        """BM25 scores of the documents matching all of `terms`."""
+        if not terms or not self._lengths:
+            return {}
+        doc_count = len(self._lengths)
+        average_length = self._total_length / doc_count
+        postings = [self._postings.get(term) for term in terms]
+        if any(p is None for p in postings):
+            return {}
+
+        # Intersect starting from the rarest term
+        postings.sort(key=lambda p: len(p[0]))
+        scores: Dict[int, float] = {}
+        for i, (doc_ids, freqs) in enumerate(postings):
+            idf = math.log(1 + (doc_count - len(doc_ids) + 0.5) / (len(doc_ids) + 0.5))
+            next_scores = {}
+            for doc_id, freq in zip(doc_ids, freqs):
+                if i and doc_id not in scores:
+                    continue
+                norm = self.K1 * (1 - self.B + self.B * self._lengths[doc_id] / average_length)
+                next_scores[doc_id] = scores.get(doc_id, 0.0) + idf * freq * (self.K1 + 1) / (freq + norm)
+            scores = next_scores
+            if not scores:
+                break
+        return scores
+
+
+# Lazily populated on the first search against a non-PostgreSQL database
+fallback_index = InvertedIndex()
+
+
+async def search_threats(
+    db: AsyncSession,
+    q: str,
+    limit: int = 20,
+    offset: int = 0,
+    region: Optional[str] = None,
+    category: Optional[str] = None,
+    created_after: Optional[datetime] = None,
+    created_before: Optional[datetime] = None,
+) -> List[SearchHit]:
+    """
+    Ranked full-text search over title, description, potential_impact and region,
+    best match first, with <mark>-highlighted snippets.
+    """
+    if db.bind.dialect.name == "postgresql":
+        return await _search_postgres(db, q, limit, offset, region, category, created_after, created_before)
+    return await _search_fallback(db, q, limit, offset, region, category, created_after, created_before)
+
+
+async def _search_postgres(db, q, limit, offset, region, category, created_after, created_before) -> List[SearchHit]:
+    tsquery = func.websearch_to_tsquery("english", q)
+    vector = literal_column("threats.search_vector")
+    rank = func.ts_rank_cd(vector, tsquery).label("rank")
+
+    # Rank and page on the GIN index first; headlines are expensive, so only build them for the page
+    page = filter_threats(
+        select(models.Threat.id, rank).where(vector.op("@@")(tsquery)),
+        region, category, created_after, created_before,
+    ).order_by(rank.desc(), models.Threat.id.desc()).limit(limit).offset(offset).subquery()
+
+    headlines = [
+        func.ts_headline("english", func.coalesce(getattr(models.Threat, field), ""), tsquery, HEADLINE_OPTIONS)
+        for field in HIGHLIGHT_FIELDS
+    ]
+    rows = (await db.execute(
+        select(models.Threat, page.c.rank, *headlines)
+        .join(page, page.c.id == models.Threat.id)
+        .order_by(page.c.rank.desc(), models.Threat.id.desc())
+    )).all()
+    return [
+        SearchHit(threat, float(score), {field: escape_headline(value) for field, value in zip(HIGHLIGHT_FIELDS, fields)})
+        for threat, score, *fields in rows
+    ]
+
+
+async def _search_fallback(db, q, limit, offset, region, category, created_after, created_before) -> List[SearchHit]:
+    await fallback_index.refresh(db)
+    terms = list(dict.fromkeys(tokenize(q)))
+    scores = fallback_index.search(terms)
+    if not scores:
+        return []
+
+    hits: List[SearchHit] = []
+    ranked = sorted(scores.items(), key=lambda item: (-item[1], -item[0]))
+    # Filters are checked in the database, walking down the ranking until the page is full
+    wanted = offset + limit
+    matched = 0
+    chunk = max(wanted, 100)
+    for start in range(0, len(ranked), chunk):
+        candidates = ranked[start:start + chunk]
+        rows = (await db.scalars(filter_threats(
+            select(models.Threat).where(models.Threat.id.in_([doc_id for doc_id, _ in candidates])),
+            region, category, created_after, created_before,
+        ))).all()
+        by_id = {threat.id: threat for threat in rows}
+        for doc_id, score in candidates:
+            threat = by_id.get(doc_id)
+            if threat is None:
+                continue
+            matched += 1
+            if matched > offset:
+                highlights = {field: highlight(getattr(threat, field), set(terms)) for field in HIGHLIGHT_FIELDS}
+                hits.append(SearchHit(threat, score, highlights))
+            if matched >= wanted:
+                return hits
+    return hits
@@ -1,22 +1,97 @@
+import asyncio
 import os
+import random
+import time
+from email.utils import parsedate_to_datetime
+from typing import List, Optional
 import httpx
-from .. import schemas
+from .. import metrics, schemas
 
 # Get the webhook URL from our environment variables
 TEAMS_WEBHOOK_URL = os.getenv("TEAMS_WEBHOOK_URL")
+# How many webhook requests may be in flight at once (also the connection pool size)
+TEAMS_CONCURRENCY = int(os.getenv("TEAMS_CONCURRENCY", "4"))
+# Threats waiting to be sent; ingestion only waits when this is full
+TEAMS_QUEUE_SIZE = int(os.getenv("TEAMS_QUEUE_SIZE", "1000"))
+TEAMS_MAX_RETRIES = int(os.getenv("TEAMS_MAX_RETRIES", "5"))
+# Threats arriving within this many seconds of each other are sent as one card (0 disables)
+TEAMS_COALESCE_WINDOW_SECONDS = float(os.getenv("TEAMS_COALESCE_WINDOW_SECONDS", "0"))
+TEAMS_COALESCE_MAX = int(os.getenv("TEAMS_COALESCE_MAX", "10"))
 
-async def send_threat_to_teams(threat: schemas.Threat):
+
+def threat_card_body(threat: schemas.Threat) -> list:
+    """
+    The Adaptive Card elements describing a single threat.
+    """
+    return [
+        {
+            "type": "TextBlock",
+            "text": threat.title,
+            "weight": "Bolder",
+            "size": "Medium",
+            "wrap": True
+        },
+        {
+            "type": "FactSet",
+            "facts": [
+                {"title": "Region:", "value": threat.region},
+                {"title": "Category:", "value": threat.category},
+                {"title": "Published:", "value": f"{threat.date_mentioned}" if threat.date_mentioned else "Not specified"},
+                {"title": "Impact:", "value": threat.potential_impact or "Not specified"},
+                {"title": "Reported:", "value": f"{threat.created_at.strftime('%Y-%m-%d %H:%M')} UTC"}
+            ]
+        },
+        {
+            "type": "TextBlock",
+            "text": threat.description,
+            "wrap": True,
+            "separator": True
+        },
+        *(
+            [
+                {
+                    "type": "TextBlock",
+                    "text": f"[{url.split('/')[-2].replace('-', ' ').title()}]({url.strip()})", # Extracts and formats the domain/path for display
+                    "wrap": True,
+                    "separator": True,
+                    "spacing": "Small"
+                }
+                for url in threat.source_urls
+            ]
+            if threat.source_urls
+            else [
+                {
+                    "type": "TextBlock",
+                    "text": "No source URLs provided.",
+                    "wrap": True,
+                    "separator": True
+                }
+            ]
+        )
+    ]
+
+
+def build_threat_card(threats: List[schemas.Threat]) -> dict:
     """
-    Formats a threat notification and sends it to a Microsoft Teams channel
-    using an Incoming Webhook.
+    Builds the Teams message for one or more threats.
     """
-    if not TEAMS_WEBHOOK_URL:
-        print("Warning: TEAMS_WEBHOOK_URL is not set. Skipping notification.")
-        return
+    heading = "🚨 New Maritime Threat Detected!" if len(threats) == 1 else f"🚨 {len(threats)} New Maritime Threats Detected!"
+    body = [
+        {
+            "type": "TextBlock",
+            "text": heading,
+            "weight": "Bolder",
+            "size": "Large",
+            "color": "Attention"
+        }
+    ]
+    for threat in threats:
+        # Each threat gets its own container so they are visually separated in a multi-threat card
+        body.append({"type": "Container", "separator": len(threats) > 1, "items": threat_card_body(threat)})
 
     # We will use an "Adaptive Card" for a rich, well-formatted message.
     # This is a standard JSON format that Teams understands.
-    card_payload = {
+    return {
         "type": "message",
         "attachments": [
             {
@@ -27,71 +102,196 @@ async def send_threat_to_teams(threat: schemas.Threat):
                     "type": "AdaptiveCard",
                     "version": "1.5",
                     "msteams": {"width": "Full"},
-                    "body": [
-                        {
-                            "type": "TextBlock",
-                            "text": "🚨 New Maritime Threat Detected!",
-                            "weight": "Bolder",
-                            "size": "Large",
-                            "color": "Attention"
-                        },
-                        {
-                            "type": "TextBlock",
-                            "text": threat.title,
-                            "weight": "Bolder",
-                            "size": "Medium",
-                            "wrap": True
-                        },
-                        {
-                            "type": "FactSet",
-                            "facts": [
-                                {"title": "Region:", "value": threat.region},
-                                {"title": "Category:", "value": threat.category},
-                                {"title": "Published:", "value": f"{threat.date_mentioned}" if threat.date_mentioned else "Not specified"},
-                                {"title": "Impact:", "value": threat.potential_impact or "Not specified"},
-                                {"title": "Reported:", "value": f"{threat.created_at.strftime('%Y-%m-%d %H:%M')} UTC"}  
-                            ]
-                        },
-                        {
-                            "type": "TextBlock",
-                            "text": threat.description,
-                            "wrap": True,
-                            "separator": True
-                        },
-                        *(
-                            [
-                                {
-                                    "type": "TextBlock",
-                                    "text": f"[{url.split('/')[-2].replace('-', ' ').title()}]({url.strip()})", # Extracts and formats the domain/path for display
-                                    "wrap": True,
-                                    "separator": True,
-                                    "spacing": "Small"
-                                }
-                                for url in threat.source_urls
-                            ]
-                            if threat.source_urls
-                            else [
-                                {
-                                    "type": "TextBlock",
-                                    "text": "No source URLs provided.",
-                                    "wrap": True,
-                                    "separator": True
-                                }
-                            ]
-                        )
-                    ]
+                    "body": body
                 }
             }
         ]
     }
 
-    # Send the POST request to the Teams webhook URL
-    async with httpx.AsyncClient() as client:
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    Parses a Retry-After header (delay in seconds or an HTTP date) into seconds to wait.
+    """
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class TeamsDispatcher:
+    """
+    Long-lived sender for Teams notifications.
+
+    Threats are put on a bounded queue and sent by a fixed number of workers
+    sharing one pooled HTTP client, so callers never wait on the webhook and
+    TCP/TLS connections are reused. 429 responses honour Retry-After (up to
+    backoff_max), and transient failures are retried with exponential backoff.
+    """
+
+    def __init__(
+        self,
+        webhook_url: Optional[str] = TEAMS_WEBHOOK_URL,
+        concurrency: int = TEAMS_CONCURRENCY,
+        queue_size: int = TEAMS_QUEUE_SIZE,
+        max_retries: int = TEAMS_MAX_RETRIES,
+        backoff_base: float = 1.0,
+        backoff_max: float = 60.0,
+        coalesce_window: float = TEAMS_COALESCE_WINDOW_SECONDS,
+        coalesce_max: int = TEAMS_COALESCE_MAX,
+        timeout: float = 10.0,
+    ):
+        self.webhook_url = webhook_url
+        self.concurrency = max(1, concurrency)
+        self.queue_size = queue_size
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.coalesce_window = coalesce_window
+        self.coalesce_max = max(1, coalesce_max)
+        self.timeout = timeout
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._client: Optional[httpx.AsyncClient] = None
+        self._workers: List[asyncio.Task] = []
+
+        self.sent = 0
+        self.failed = 0
+        self.retries = 0
+
+    @property
+    def running(self) -> bool:
+        return bool(self._workers)
+
+    @property
+    def queue_depth(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    async def start(self):
+        if self.running:
+            return
+        self._queue = asyncio.Queue(maxsize=self.queue_size)
+        self._client = httpx.AsyncClient(
+            timeout=self.timeout,
+            limits=httpx.Limits(max_connections=self.concurrency, max_keepalive_connections=self.concurrency),
+        )
+        self._workers = [asyncio.create_task(self._worker()) for _ in range(self.concurrency)]
+
+    async def stop(self, drain_timeout: float = 10.0):
+        """
+        Stops the workers, giving queued notifications up to `drain_timeout` seconds to go out.
+        """
+        if not self.running:
+            return
         try:
-            response = await client.post(TEAMS_WEBHOOK_URL, json=card_payload)
-            response.raise_for_status()  # Raises an exception for 4xx/5xx responses
-            print(f"Successfully sent notification to Teams for threat ID: {threat.id}")
-        except httpx.HTTPStatusError as e:
-            print(f"Error sending notification to Teams: {e.response.status_code} - {e.response.text}")
-        except Exception as e:
-            print(f"An unexpected error occurred while sending Teams notification: {e}")
\ No newline at end of file
+            await asyncio.wait_for(self._queue.join(), timeout=drain_timeout)
+        except asyncio.TimeoutError:
+            print(f"Warning: dropping {self._queue.qsize()} unsent Teams notifications on shutdown.")
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        await self._client.aclose()
+        self._client = None
+
+    async def enqueue(self, threat: schemas.Threat):
+        """
+        Queues a threat for delivery. Only waits if the queue is full.
+        """
+        if not self.webhook_url:
+            print("Warning: TEAMS_WEBHOOK_URL is not set. Skipping notification.")
+            return
+        if not self.running:
+            await self.start()
+        await self._queue.put(threat)
+
+    async def _worker(self):
+        while True:
+            batch = [await self._queue.get()]
+            try:
+                if self.coalesce_window > 0:
+                    await self._collect_burst(batch)
+                await self._send(batch)
+            except Exception as e:
+                print(f"An unexpected error occurred while sending Teams notification: {e}")
+                self.failed += len(batch)
+                metrics.NOTIFICATIONS.inc(len(batch), outcome="failed")
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    async def _collect_burst(self, batch: list):
+        deadline = asyncio.get_running_loop().time() + self.coalesce_window
+        while len(batch) < self.coalesce_max:
+            remaining = deadline - asyncio.get_running_loop().time()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout=remaining))
+            except asyncio.TimeoutError:
+                break
+
+    async def _send(self, threats: List[schemas.Threat]):
+        card_payload = build_threat_card(threats)
+        threat_ids = ", ".join(str(threat.id) for threat in threats)
+
+        for attempt in range(self.max_retries + 1):
+            delay = None
+            try:
+                with metrics.stage("webhook"):
+                    response = await self._client.post(self.webhook_url, json=card_payload)
+                metrics.WEBHOOK_REQUESTS.inc(status=response.status_code)
+                if response.status_code == 429:
+                    delay = parse_retry_after(response.headers.get("Retry-After"))
+                    print(f"Teams webhook rate limited us (attempt {attempt + 1}).")
+                    if delay is not None and delay > self.backoff_max:
+                        # Don't park a worker for however long the server asks; this attempt is spent
+                        # and the next one goes out after backoff_max
+                        print(f"Teams asked to wait {delay:.0f}s, retrying after {self.backoff_max:.0f}s instead.")
+                        delay = self.backoff_max
+                elif response.status_code >= 500:
+                    print(f"Teams webhook error {response.status_code} (attempt {attempt + 1}).")
+                else:
+                    response.raise_for_status()  # Other 4xx errors won't succeed on retry
+                    self.sent += len(threats)
+                    metrics.NOTIFICATIONS.inc(len(threats), outcome="sent")
+                    print(f"Successfully sent notification to Teams for threat ID: {threat_ids}")
+                    return
+            except httpx.HTTPStatusError as e:
+                print(f"Error sending notification to Teams: {e.response.status_code} - {e.response.text}")
+                break
+            except httpx.TransportError as e:
+                metrics.WEBHOOK_REQUESTS.inc(status="error")
+                print(f"Network error sending notification to Teams (attempt {attempt + 1}): {e}")
+
+            if attempt == self.max_retries:
+                break
+            if delay is None:
+                # Exponential backoff with jitter so parallel workers don't retry in lockstep
+                delay = min(self.backoff_max, self.backoff_base * 2 ** attempt) * random.uniform(0.5, 1.0)
+            self.retries += 1
+            metrics.WEBHOOK_RETRIES.inc()
+            await asyncio.sleep(delay)
+
+        self.failed += len(threats)
+        metrics.NOTIFICATIONS.inc(len(threats), outcome="failed")
+        print(f"Giving up on Teams notification for threat ID: {threat_ids}")
+
+
+# Shared dispatcher, started and stopped by the app lifespan
+dispatcher = TeamsDispatcher()
+metrics.registry.set_function("maritime_teams_queue_depth", lambda: dispatcher.queue_depth)
+
+
+async def send_threat_to_teams(threat: schemas.Threat):
+    """
+    Queues a threat notification for the Microsoft Teams channel.
+    The actual webhook call happens in the background dispatcher.
+    """
+    await dispatcher.enqueue(threat)
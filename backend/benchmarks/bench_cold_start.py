@@ -0,0 +1,109 @@
+"""
+Cold-start cost: import time per module and time-to-first-response.
+
+Every measurement runs in a fresh interpreter, the way a serverless cold start
+does. For each app module the cumulative import time is reported (the module
+plus everything it pulls in). Time-to-first-response covers interpreter
+start-up to the first GET /api/threats/ answered through the ASGI app,
+including the lifespan startup, in the default and in the read-only
+(serverless) configuration. The script also checks that the agent stack and
+Mongo driver were never imported on that path.
+
+Run from the backend/ directory:
+    python -m benchmarks.bench_cold_start [--repeat 5] [--json]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+DB_PATH = os.path.join(tempfile.gettempdir(), "maritime_bench_cold_start.db")
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MODULES = [
+    "app.database",
+    "app.models",
+    "app.crud",
+    "app.services.notification_hub",
+    "app.services.teams_notifier",
+    "app.services.dedup",
+    "app.services.rag_agent",
+    "app.main",
+]
+# Modules that must stay off the read path
+HEAVY_MODULES = ["langchain", "langchain_core", "langchain_google_genai", "motor", "pymongo", "apscheduler"]
+
+IMPORT_SNIPPET = """
+import time, importlib
+t0 = time.perf_counter()
+importlib.import_module({module!r})
+print(time.perf_counter() - t0)
+"""
+
+FIRST_RESPONSE_SNIPPET = """
+import time
+t0 = time.perf_counter()
+import asyncio, json, sys
+import httpx
+from app.main import app
+
+async def first_response():
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            response = await client.get("/api/threats/?limit=20")
+            response.raise_for_status()
+
+asyncio.run(first_response())
+elapsed = time.perf_counter() - t0
+print(json.dumps({{"seconds": elapsed, "heavy_imported": [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+
+def run_snippet(code: str, extra_env: dict) -> str:
+    env = {**os.environ, "DATABASE_URL": f"sqlite:///{DB_PATH}", **extra_env}
+    result = subprocess.run(
+        [sys.executable, "-c", code], cwd=BACKEND_DIR, env=env, capture_output=True, text=True, check=True
+    )
+    return result.stdout.strip().splitlines()[-1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--json", action="store_true", help="Print machine-readable results.")
+    args = parser.parse_args()
+
+    results = {"import_seconds": {}, "first_response": {}}
+    for module in MODULES:
+        samples = [float(run_snippet(IMPORT_SNIPPET.format(module=module), {})) for _ in range(args.repeat)]
+        results["import_seconds"][module] = statistics.median(samples)
+
+    # The default run creates the tables the read-only run then reads from
+    for label, env in (("default", {}), ("read_only", {"READ_ONLY_MODE": "true"})):
+        samples = [
+            json.loads(run_snippet(FIRST_RESPONSE_SNIPPET.format(heavy=HEAVY_MODULES), env))
+            for _ in range(args.repeat)
+        ]
+        results["first_response"][label] = {
+            "seconds": statistics.median(sample["seconds"] for sample in samples),
+            "heavy_imported": samples[-1]["heavy_imported"],
+        }
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{'module':<34} {'import ms':>10}")
+    for module, seconds in results["import_seconds"].items():
+        print(f"{module:<34} {seconds * 1000:10.1f}")
+    for label, result in results["first_response"].items():
+        heavy = ", ".join(result["heavy_imported"]) or "none"
+        print(f"time to first response ({label}): {result['seconds'] * 1000:.1f} ms, heavy modules loaded: {heavy}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Wall-clock time and time-to-first-report of a discovery run with serial vs.
+concurrent sub-queries.
+
+The agent is replaced by a fake executor that streams its answer to each
+sub-query after a random delay, so the run is fully offline. A fraction of the sub-queries fail
+or hang past the timeout to show that they don't sink the run.
+
+Run from the backend/ directory:
+    python -m benchmarks.bench_discovery_fanout [--latency 2.0] [--concurrency 4]
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+
+from app.services import rag_agent
+
+
+class FakeAgentExecutor:
+    """Stands in for AgentExecutor: streams a few reports per query after a delay."""
+
+    def __init__(self, latency: float, failure_rate: float, hang_rate: float, seed: int = 7):
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.hang_rate = hang_rate
+        self.rng = random.Random(seed)
+
+    async def astream_events(self, inputs: dict, version: str = "v2"):
+        query = inputs["input"]
+        roll = self.rng.random()
+        if roll < self.failure_rate:
+            await asyncio.sleep(self.latency / 4)
+            raise RuntimeError("simulated search API error")
+        if roll < self.failure_rate + self.hang_rate:
+            await asyncio.sleep(3600)
+        reports = [
+            {
+                "title": f"Threat {n} found by: {query}",
+                "region": "Global",
+                "category": "Geopolitical Instability",
+                "description": "Synthetic report.",
+                "potential_impact": "None",
+                "source_urls": [f"https://example.com/{abs(hash(query))}/{n}"],
+                "date_mentioned": "Not specified",
+            }
+            for n in range(3)
+        ]
+        answer = "```json\n" + json.dumps({"reports": reports}, indent=2) + "\n```"
+
+        # Like a real LLM, the answer trickles in over the whole latency budget
+        yield {"event": "on_chat_model_start", "data": {}}
+        chunks = [answer[i:i + 16] for i in range(0, len(answer), 16)]
+        delay = self.latency * self.rng.uniform(0.5, 1.5) / len(chunks)
+        for chunk in chunks:
+            await asyncio.sleep(delay)
+            yield {"event": "on_chat_model_stream", "data": {"chunk": chunk}}
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--latency", type=float, default=2.0, help="Mean seconds per fake agent run.")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--timeout", type=float, default=5.0)
+    parser.add_argument("--failure-rate", type=float, default=0.1)
+    parser.add_argument("--hang-rate", type=float, default=0.1)
+    args = parser.parse_args()
+
+    for concurrency in (1, args.concurrency):
+        executor = FakeAgentExecutor(args.latency, args.failure_rate, args.hang_rate)
+        t0 = time.perf_counter()
+        first_report_at = None
+        reports = 0
+        async for _ in rag_agent.stream_maritime_threats(executor=executor, concurrency=concurrency, timeout=args.timeout):
+            first_report_at = first_report_at or time.perf_counter() - t0
+            reports += 1
+        elapsed = time.perf_counter() - t0
+        print(f"concurrency={concurrency}: {reports} reports from {len(rag_agent.DISCOVERY_QUERIES)} queries"
+              f" in {elapsed:.2f}s, first report after {first_report_at or 0:.2f}s")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
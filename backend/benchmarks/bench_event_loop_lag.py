@@ -0,0 +1,109 @@
+"""
+Event-loop lag while a discovery run writes and API reads run concurrently.
+
+A ticker task sleeps for a fixed interval and records how late it wakes up.
+While it runs, a writer saves threats in discovery-sized batches and a number
+of readers page through GET /api/threats/ via crud.get_threats. With the async
+data-access layer the lag should stay close to zero; `--blocking-baseline`
+repeats the run with the writer using a synchronous engine on the loop thread
+(what the old database.py did) for comparison.
+
+Run from the backend/ directory:
+    python -m benchmarks.bench_event_loop_lag [--readers 50] [--batches 200]
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+
+DB_PATH = os.path.join(tempfile.gettempdir(), "maritime_bench_loop_lag.db")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{DB_PATH}")
+
+from sqlalchemy import create_engine, insert  # noqa: E402
+
+from app import crud, database, models  # noqa: E402
+from app.database import SQLALCHEMY_DATABASE_URL, SessionLocal, engine  # noqa: E402
+from benchmarks.bench_ingest import make_report  # noqa: E402
+from benchmarks.fakes import InMemoryMongo  # noqa: E402
+
+TICK_SECONDS = 0.005
+
+
+async def ticker(stop: asyncio.Event, lags: list):
+    while not stop.is_set():
+        t0 = time.perf_counter()
+        await asyncio.sleep(TICK_SECONDS)
+        lags.append(time.perf_counter() - t0 - TICK_SECONDS)
+
+
+async def reader(stop: asyncio.Event, latencies: list):
+    async with SessionLocal() as db:
+        while not stop.is_set():
+            t0 = time.perf_counter()
+            await crud.get_threats(db, limit=50)
+            latencies.append(time.perf_counter() - t0)
+            db.expunge_all()
+
+
+async def async_writer(batches: int, batch_size: int):
+    async with SessionLocal() as db:
+        for b in range(batches):
+            await crud.create_threats_bulk(db, [make_report(b * batch_size + i) for i in range(batch_size)])
+
+
+async def blocking_writer(batches: int, batch_size: int):
+    sync_engine = create_engine(SQLALCHEMY_DATABASE_URL)
+    for b in range(batches):
+        rows = [make_report(b * batch_size + i).model_dump() for i in range(batch_size)]
+        with sync_engine.begin() as conn:
+            conn.execute(insert(models.Threat), rows)
+        # Yield once per batch like the old per-report loop did between awaits
+        await asyncio.sleep(0)
+    sync_engine.dispose()
+
+
+async def run(readers: int, batches: int, batch_size: int, blocking: bool):
+    async with engine.begin() as conn:
+        await conn.run_sync(models.Base.metadata.drop_all)
+        await conn.run_sync(models.Base.metadata.create_all)
+    archive = InMemoryMongo()
+    database.use_mongo_db(archive)
+
+    stop = asyncio.Event()
+    lags, latencies = [], []
+    background = [asyncio.create_task(ticker(stop, lags))]
+    background += [asyncio.create_task(reader(stop, latencies)) for _ in range(readers)]
+
+    t0 = time.perf_counter()
+    writer = blocking_writer if blocking else async_writer
+    await writer(batches, batch_size)
+    elapsed = time.perf_counter() - t0
+
+    stop.set()
+    await asyncio.gather(*background)
+
+    lags_ms = sorted(lag * 1000 for lag in lags)
+    label = "blocking writer" if blocking else "async writer"
+    print(f"{label}: {batches * batch_size} rows in {elapsed:.2f}s, {len(latencies)} reads")
+    print(f"  loop lag ms  p50={statistics.median(lags_ms):.2f}"
+          f"  p99={lags_ms[int(len(lags_ms) * 0.99) - 1]:.2f}  max={lags_ms[-1]:.2f}")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--readers", type=int, default=50)
+    parser.add_argument("--batches", type=int, default=200)
+    parser.add_argument("--batch-size", type=int, default=20)
+    parser.add_argument("--blocking-baseline", action="store_true")
+    args = parser.parse_args()
+
+    await run(args.readers, args.batches, args.batch_size, blocking=False)
+    if args.blocking_baseline:
+        await run(args.readers, args.batches, args.batch_size, blocking=True)
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
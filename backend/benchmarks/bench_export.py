@@ -0,0 +1,65 @@
+"""
+Throughput and memory of the streaming threat export (GET /api/threats/export).
+
+Seeds a local SQLite database (see bench_pagination.seed), streams the whole
+table through services.export and prints rows/sec plus the process RSS at a
+few points of the export. RSS should stay flat once the first batch is in.
+
+Run from the backend/ directory:
+    python -m benchmarks.bench_export [--rows 1000000] [--format ndjson]
+"""
+import argparse
+import asyncio
+import os
+import resource
+import tempfile
+import time
+
+DB_PATH = os.path.join(tempfile.gettempdir(), "maritime_bench_export.db")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{DB_PATH}")
+
+from app.database import SessionLocal, engine  # noqa: E402
+from app.services import export  # noqa: E402
+from benchmarks import bench_pagination  # noqa: E402
+
+
+def rss_mb() -> float:
+    """Current resident set size (Linux), falling back to the peak elsewhere."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1e6
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1e3
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--format", choices=("ndjson", "csv"), default="ndjson")
+    parser.add_argument("--skip-seed", action="store_true", help="Reuse the database of an earlier run.")
+    args = parser.parse_args()
+
+    if not args.skip_seed:
+        print(f"Seeding {args.rows} threats...")
+        await bench_pagination.seed(args.rows)
+
+    chunks = 0
+    size = 0
+    samples = []
+    t0 = time.perf_counter()
+    async for chunk in export.stream_export(SessionLocal, args.format):
+        chunks += 1
+        size += len(chunk)
+        if chunks % 50 == 1:
+            samples.append((chunks * export.EXPORT_BATCH_SIZE, rss_mb()))
+    elapsed = time.perf_counter() - t0
+    await engine.dispose()
+
+    print(f"Exported {args.rows} rows ({size / 1e6:.1f} MB of {args.format}) in {elapsed:.1f}s: "
+          f"{args.rows / elapsed:,.0f} rows/sec")
+    for rows, rss in samples:
+        print(f"  after ~{rows:>10,} rows  RSS {rss:8.1f} MB")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
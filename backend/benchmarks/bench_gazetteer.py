@@ -0,0 +1,65 @@
+"""
+Latency of the gazetteer lookups behind GET /api/threats/?bbox=... and ?near=...
+
+Measures region normalization and bbox / point-radius lookups on the bundled
+gazetteer, then on gazetteers padded with synthetic regions, to show the grid
+index keeps lookup cost flat as regions are added. The database side of those
+queries is an index range scan on threat_regions (region_id, threat_id).
+
+Run from the backend/ directory:
+    python -m benchmarks.bench_gazetteer [--lookups 10000]
+"""
+import argparse
+import random
+import time
+
+from app.services.gazetteer import Gazetteer, Region
+
+
+def timed(fn, args_list) -> float:
+    """Mean microseconds per call."""
+    t0 = time.perf_counter()
+    for args in args_list:
+        fn(*args)
+    return (time.perf_counter() - t0) / len(args_list) * 1e6
+
+
+def synthetic_regions(count: int, rng: random.Random):
+    for i in range(count):
+        lon, lat = rng.uniform(-179, 175), rng.uniform(-80, 75)
+        width, height = rng.uniform(0.2, 4), rng.uniform(0.2, 4)
+        yield Region(
+            id=f"synthetic_{i}", name=f"Synthetic Region {i}", kind="sea",
+            bbox=(lon, lat, lon + width, lat + height), aliases=(),
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lookups", type=int, default=10_000)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    bundled = Gazetteer.load()
+    texts = [("Southern Red Sea",), ("Bab el-Mandeb and the Gulf of Aden",), ("Global",), ("Strait of Hormuz",)]
+    print(f"normalize: {timed(bundled.normalize, texts * (args.lookups // len(texts))):.1f} us/call")
+
+    boxes = []
+    points = []
+    for _ in range(args.lookups):
+        lon, lat = rng.uniform(-180, 170), rng.uniform(-80, 70)
+        boxes.append(((lon, lat, lon + rng.uniform(1, 10), lat + rng.uniform(1, 10)),))
+        points.append((lat, lon, rng.uniform(10, 500)))
+
+    base = list(bundled.regions.values())
+    for extra in (0, 1_000, 10_000, 100_000):
+        gazetteer = Gazetteer(base + list(synthetic_regions(extra, rng))) if extra else bundled
+        print(
+            f"{len(gazetteer.regions):>7} regions: "
+            f"bbox {timed(gazetteer.regions_in_bbox, boxes):7.1f} us/lookup, "
+            f"radius {timed(gazetteer.regions_near, points):7.1f} us/lookup"
+        )
+
+
+if __name__ == "__main__":
+    main()
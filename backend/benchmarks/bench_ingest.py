@@ -0,0 +1,70 @@
+"""
+Ingest throughput (rows/sec) of crud.create_threats_bulk at several batch sizes.
+
+Batch size 1 is what crud.create_threat does, i.e. the old per-row path. The
+MongoDB archive is replaced by an in-memory collection and is written in the
+background by the archive outbox, so the timing covers the database work
+(including the outbox rows); the outbox is drained before the next run.
+
+Run from the backend/ directory:
+    python -m benchmarks.bench_ingest [--rows 20000] [--batch-sizes 1,100,1000]
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+DB_PATH = os.path.join(tempfile.gettempdir(), "maritime_bench_ingest.db")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{DB_PATH}")
+
+from app import crud, database, models, schemas  # noqa: E402
+from app.services import archive_outbox  # noqa: E402
+from app.database import SessionLocal, engine  # noqa: E402
+from benchmarks.fakes import InMemoryMongo  # noqa: E402
+
+
+def make_report(i: int) -> schemas.ThreatCreate:
+    return schemas.ThreatCreate(
+        title=f"Historical threat {i}",
+        region="Red Sea",
+        category="Military Conflict",
+        description="Backfilled report used for benchmarking ingestion.",
+        potential_impact="Increased shipping costs",
+        source_urls=[f"https://example.com/report/{i}"],
+        date_mentioned="Not specified",
+    )
+
+
+async def run(rows: int, batch_size: int) -> float:
+    async with engine.begin() as conn:
+        await conn.run_sync(models.Base.metadata.drop_all)
+        await conn.run_sync(models.Base.metadata.create_all)
+    archive = InMemoryMongo()
+    database.use_mongo_db(archive)
+    reports = [make_report(i) for i in range(rows)]
+
+    async with SessionLocal() as db:
+        t0 = time.perf_counter()
+        for offset in range(0, rows, batch_size):
+            await crud.create_threats_bulk(db, reports[offset:offset + batch_size])
+        elapsed = time.perf_counter() - t0
+
+    await archive_outbox.flusher.stop(drain_timeout=None)
+    assert len(archive.threat_logs.documents) == rows
+    return rows / elapsed
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=20_000)
+    parser.add_argument("--batch-sizes", default="1,100,1000")
+    args = parser.parse_args()
+
+    print(f"{'batch size':>10} {'rows/sec':>12}")
+    for batch_size in (int(size) for size in args.batch_sizes.split(",")):
+        print(f"{batch_size:>10} {await run(args.rows, batch_size):12,.0f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,100 @@
+"""
+Page latency of GET /api/threats/ from page 1 to page 10,000.
+
+Seeds a local SQLite database with a million threats and walks the whole table
+through crud.get_threats, once with keyset cursors and once with the old
+offset paging, printing the latency at a few page depths.
+
+Run from the backend/ directory:
+    python -m benchmarks.bench_pagination [--rows 1000000] [--page-size 100]
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+DB_PATH = os.path.join(tempfile.gettempdir(), "maritime_bench_pagination.db")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{DB_PATH}")
+
+from app import crud, models  # noqa: E402
+from app.database import SessionLocal, engine  # noqa: E402
+
+MILESTONES = [1, 10, 100, 1_000, 10_000]
+REGIONS = ["Red Sea", "Strait of Malacca", "Black Sea", "Gulf of Guinea", "South China Sea", "Global"]
+CATEGORIES = ["Piracy", "Military Conflict", "Sanctions", "Tariffs", "Cyber Attack"]
+
+
+async def seed(rows: int):
+    start = datetime(2020, 1, 1)
+    chunk = 10_000
+    async with engine.begin() as conn:
+        await conn.run_sync(models.Base.metadata.drop_all)
+        await conn.run_sync(models.Base.metadata.create_all)
+        for offset in range(0, rows, chunk):
+            await conn.execute(
+                models.Threat.__table__.insert(),
+                [
+                    {
+                        "title": f"Threat {i}",
+                        "region": REGIONS[i % len(REGIONS)],
+                        "category": CATEGORIES[i % len(CATEGORIES)],
+                        "description": "Synthetic threat used for benchmarking.",
+                        "potential_impact": "None",
+                        "source_urls": [f"https://example.com/{i}"],
+                        "date_mentioned": "Not specified",
+                        # A few duplicate timestamps make sure the id tie-breaker is exercised
+                        "created_at": start + timedelta(seconds=i // 3),
+                    }
+                    for i in range(offset, min(offset + chunk, rows))
+                ],
+            )
+
+
+async def walk(pages: int, page_size: int, use_cursor: bool):
+    latencies = {}
+    async with SessionLocal() as db:
+        cursor = None
+        for page in range(1, pages + 1):
+            t0 = time.perf_counter()
+            if use_cursor:
+                threats = await crud.get_threats(db, limit=page_size, cursor=cursor)
+            else:
+                threats = await crud.get_threats(db, skip=(page - 1) * page_size, limit=page_size)
+            elapsed = time.perf_counter() - t0
+            if page in MILESTONES:
+                latencies[page] = elapsed
+            if len(threats) < page_size:
+                break
+            cursor = crud.encode_cursor(threats[-1])
+            db.expunge_all()
+    return latencies
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--offset-pages", type=int, default=1_000,
+                        help="Offset paging is quadratic, so only walk this many pages with it.")
+    args = parser.parse_args()
+
+    print(f"Seeding {args.rows:,} threats into {DB_PATH}...")
+    await seed(args.rows)
+    pages = args.rows // args.page_size
+
+    keyset = await walk(pages, args.page_size, use_cursor=True)
+    offset = await walk(min(pages, args.offset_pages), args.page_size, use_cursor=False)
+
+    print(f"{'page':>8} {'keyset ms':>12} {'offset ms':>12}")
+    for page in MILESTONES:
+        if page in keyset:
+            offset_ms = f"{offset[page] * 1000:12.3f}" if page in offset else f"{'-':>12}"
+            print(f"{page:>8} {keyset[page] * 1000:12.3f} {offset_ms}")
+    print(f"keyset max/median latency: {max(keyset.values()) / statistics.median(keyset.values()):.2f}x")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
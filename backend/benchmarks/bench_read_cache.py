@@ -0,0 +1,76 @@
+"""
+Requests/sec of GET /api/threats/ with and without the in-process read cache.
+
+Requests go through the real FastAPI app in-process (httpx ASGITransport), so
+routing, the database query, serialization and the cache are all measured,
+but not the network. Three modes are compared: cache disabled, warm cache,
+and conditional requests answered with 304 from the warm cache.
+
+Run from the backend/ directory:
+    python -m benchmarks.bench_read_cache [--rows 10000] [--requests 2000]
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+DB_PATH = os.path.join(tempfile.gettempdir(), "maritime_bench_read_cache.db")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{DB_PATH}")
+
+import httpx  # noqa: E402
+
+from app.main import app  # noqa: E402
+from app.services.response_cache import threats_cache  # noqa: E402
+from benchmarks.bench_pagination import seed  # noqa: E402
+
+PAGES = [
+    "/api/threats/?limit=100",
+    "/api/threats/?limit=100&region=Red%20Sea",
+    "/api/threats/?limit=50&category=Piracy",
+    "/api/threats/?limit=20",
+]
+
+
+async def measure(client: httpx.AsyncClient, requests: int, conditional: bool) -> float:
+    etags = {}
+    if conditional:
+        for path in PAGES:
+            etags[path] = (await client.get(path)).headers["ETag"]
+
+    t0 = time.perf_counter()
+    for i in range(requests):
+        path = PAGES[i % len(PAGES)]
+        headers = {"If-None-Match": etags[path]} if conditional else {}
+        response = await client.get(path, headers=headers)
+        assert response.status_code == (304 if conditional else 200), response.status_code
+    return requests / (time.perf_counter() - t0)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--requests", type=int, default=2_000)
+    args = parser.parse_args()
+
+    await seed(args.rows)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        max_entries = threats_cache.max_entries
+
+        threats_cache.max_entries = 0
+        uncached = await measure(client, args.requests, conditional=False)
+
+        threats_cache.max_entries = max_entries
+        await measure(client, len(PAGES), conditional=False)  # warm up
+        warm = await measure(client, args.requests, conditional=False)
+        not_modified = await measure(client, args.requests, conditional=True)
+
+    print(f"{'no cache':<16} {uncached:10.0f} req/s")
+    print(f"{'warm cache':<16} {warm:10.0f} req/s  ({warm / uncached:.1f}x)")
+    print(f"{'304 revalidate':<16} {not_modified:10.0f} req/s  ({not_modified / uncached:.1f}x)")
+    print(f"cache hits={threats_cache.hits} misses={threats_cache.misses}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,115 @@
+"""
+Latency of full-text search (services.search) on a million-row corpus.
+
+Seeds the database with synthetic threats whose text is drawn from a maritime
+vocabulary, then runs a mix of one-, two- and three-term queries, with and
+without a region filter, and prints p50/p95/p99 latency. Against PostgreSQL
+(set DATABASE_URL) this exercises the tsvector column and GIN index; against
+the default SQLite file it exercises the in-process inverted index, whose
+one-off build time is reported separately.
+
+Run from the backend/ directory:
+    python -m benchmarks.bench_search [--rows 1000000] [--queries 500]
+"""
+import argparse
+import asyncio
+import os
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+DB_PATH = os.path.join(tempfile.gettempdir(), "maritime_bench_search.db")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{DB_PATH}")
+
+from app import models  # noqa: E402
+from app.database import SessionLocal, engine  # noqa: E402
+from app.main import create_schema  # noqa: E402
+from app.services import search  # noqa: E402
+from benchmarks.bench_pagination import CATEGORIES, REGIONS  # noqa: E402
+
+VOCABULARY = (
+    "vessel tanker container bulk carrier port strait gulf canal convoy navy warship drone missile "
+    "attack hijack boarding piracy armed robbery seizure detention sanctions embargo tariff insurance "
+    "premium reroute diversion delay congestion blockade mine explosion fire collision grounding "
+    "cyber gps jamming spoofing crew hostage ransom militia houthi coast guard patrol escort "
+    "shipping lane chokepoint freight rates oil lng grain export import customs inspection"
+).split()
+
+
+def make_text(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choice(VOCABULARY) for _ in range(words))
+
+
+async def seed(rows: int):
+    rng = random.Random(7)
+    start = datetime(2020, 1, 1)
+    chunk = 10_000
+    async with engine.begin() as conn:
+        await conn.run_sync(models.Base.metadata.drop_all)
+        await conn.run_sync(create_schema)
+        for offset in range(0, rows, chunk):
+            await conn.execute(
+                models.Threat.__table__.insert(),
+                [
+                    {
+                        "title": make_text(rng, 6).capitalize(),
+                        "region": REGIONS[i % len(REGIONS)],
+                        "category": CATEGORIES[i % len(CATEGORIES)],
+                        "description": make_text(rng, 40),
+                        "potential_impact": make_text(rng, 12),
+                        "source_urls": [f"https://example.com/{i}"],
+                        "date_mentioned": "Not specified",
+                        "created_at": start + timedelta(seconds=i),
+                    }
+                    for i in range(offset, min(offset + chunk, rows))
+                ],
+            )
+
+
+def percentile(values, fraction: float) -> float:
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--skip-seed", action="store_true", help="Reuse the corpus from a previous run.")
+    args = parser.parse_args()
+
+    if not args.skip_seed:
+        t0 = time.perf_counter()
+        await seed(args.rows)
+        print(f"seeded {args.rows} rows in {time.perf_counter() - t0:.1f}s")
+
+    rng = random.Random(11)
+    queries = [
+        (" ".join(rng.sample(VOCABULARY, rng.choice((1, 2, 3)))), rng.choice([None, None, *REGIONS]))
+        for _ in range(args.queries)
+    ]
+
+    async with SessionLocal() as db:
+        backend = "postgres tsvector/GIN" if db.bind.dialect.name == "postgresql" else "in-process inverted index"
+        t0 = time.perf_counter()
+        await search.search_threats(db, queries[0][0], limit=args.limit)
+        print(f"backend: {backend}, first query (includes index build): {time.perf_counter() - t0:.2f}s")
+
+        latencies, hits = [], 0
+        for q, region in queries:
+            t0 = time.perf_counter()
+            results = await search.search_threats(db, q, limit=args.limit, region=region)
+            latencies.append(time.perf_counter() - t0)
+            hits += len(results)
+            db.expunge_all()
+
+    latencies_ms = sorted(latency * 1000 for latency in latencies)
+    print(f"{len(queries)} queries, {hits / len(queries):.1f} hits/query")
+    print(f"latency ms  p50={percentile(latencies_ms, 0.5):.1f}  p95={percentile(latencies_ms, 0.95):.1f}"
+          f"  p99={percentile(latencies_ms, 0.99):.1f}  max={latencies_ms[-1]:.1f}")
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,94 @@
+"""
+Throughput and latency of Teams notifications against a local stub webhook.
+
+The stub speaks just enough HTTP/1.1 (with keep-alive) to accept webhook
+posts, adds a fixed service latency and answers every Nth request with a 429
+and a Retry-After header. The TeamsDispatcher is compared with the old
+approach of awaiting one freshly created httpx.AsyncClient per threat.
+
+Run from the backend/ directory:
+    python -m benchmarks.bench_teams_dispatch [--threats 200] [--latency-ms 50]
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from datetime import datetime, timezone
+
+import httpx
+
+from app import schemas
+from app.services.teams_notifier import TeamsDispatcher, build_threat_card
+from benchmarks.fakes import WebhookSink
+
+
+def make_threat(i: int) -> schemas.Threat:
+    return schemas.Threat(
+        id=i,
+        title=f"Threat {i}",
+        region="Red Sea",
+        category="Piracy",
+        description="Synthetic threat used for benchmarking notifications.",
+        potential_impact="Delays",
+        source_urls=[f"https://example.com/news/threat-{i}/"],
+        date_mentioned="Not specified",
+        created_at=datetime.now(timezone.utc),
+    )
+
+
+async def run_serial(url: str, threats):
+    """The old path: one new client (and TCP handshake) per threat, awaited in the ingest loop."""
+    enqueued = {}
+    for threat in threats:
+        enqueued[threat.title] = time.perf_counter()
+        async with httpx.AsyncClient() as client:
+            response = await client.post(url, json=build_threat_card([threat]))
+            if response.status_code == 429:
+                await asyncio.sleep(float(response.headers["Retry-After"]))
+                await client.post(url, json=build_threat_card([threat]))
+    return enqueued
+
+
+async def run_dispatcher(url: str, threats, concurrency: int, coalesce_window: float):
+    dispatcher = TeamsDispatcher(webhook_url=url, concurrency=concurrency, coalesce_window=coalesce_window)
+    await dispatcher.start()
+    enqueued = {}
+    for threat in threats:
+        enqueued[threat.title] = time.perf_counter()
+        await dispatcher.enqueue(threat)
+    await dispatcher.stop(drain_timeout=600)
+    return enqueued
+
+
+async def measure(label: str, args, runner, *runner_args):
+    stub = WebhookSink(args.latency_ms / 1000, args.rate_limit_every, args.retry_after)
+    url = await stub.start()
+    threats = [make_threat(i) for i in range(args.threats)]
+
+    t0 = time.perf_counter()
+    enqueued = await runner(url, threats, *runner_args)
+    elapsed = time.perf_counter() - t0
+    await stub.stop()
+
+    latencies = sorted((stub.arrivals[title] - at) * 1000 for title, at in enqueued.items() if title in stub.arrivals)
+    print(f"{label:<28} {len(latencies) / elapsed:10.1f} threats/s"
+          f"  p50={statistics.median(latencies):8.1f}ms  p95={latencies[int(len(latencies) * 0.95) - 1]:8.1f}ms"
+          f"  requests={stub.requests}  connections={stub.connections}")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threats", type=int, default=200)
+    parser.add_argument("--latency-ms", type=float, default=50)
+    parser.add_argument("--rate-limit-every", type=int, default=25, help="Answer every Nth request with 429 (0 = never).")
+    parser.add_argument("--retry-after", type=float, default=0.2)
+    parser.add_argument("--concurrency", type=int, default=4)
+    args = parser.parse_args()
+
+    await measure("serial, client per threat", args, run_serial)
+    await measure(f"dispatcher x{args.concurrency}", args, run_dispatcher, args.concurrency, 0)
+    await measure(f"dispatcher x{args.concurrency} coalesced", args, run_dispatcher, args.concurrency, 0.05)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,244 @@
+"""
+Local stand-ins for the service's external dependencies, so every benchmark
+runs offline and deterministically:
+
+- FakeChatModel: a tool-calling chat model for rag_agent (replaces Gemini).
+  The first turn calls the search tool, the second streams a {"reports": [...]}
+  answer built from the search results, token by token, over `latency` seconds.
+- FakeSearchTool: returns Tavily-shaped results after `latency` seconds (replaces Tavily).
+- InMemoryMongo: the `threat_logs` collection crud writes to (replaces MongoDB Atlas).
+- WebhookSink: a keep-alive HTTP server accepting Teams webhook posts (replaces Teams).
+
+The database needs no stand-in: point DATABASE_URL at a SQLite file or a local Postgres.
+"""
+import asyncio
+import hashlib
+import json
+import re
+import time
+import uuid
+from typing import Any, AsyncIterator, List, Optional, Type
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage, HumanMessage, ToolMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_core.tools import BaseTool
+from pydantic import BaseModel, Field
+
+REGIONS = ["Red Sea", "Strait of Hormuz", "Strait of Malacca", "South China Sea", "Black Sea", "Gulf of Guinea", "Global"]
+CATEGORIES = ["Military Conflict", "Piracy", "Sanctions", "Tariffs", "Cyber Attack", "Geopolitical Instability"]
+_URL_RE = re.compile(r"https?://[^\s\"'\\]+")
+VOCABULARY = (
+    "tanker container carrier port strait convoy navy warship drone missile attack hijack boarding "
+    "seizure detention sanctions embargo tariff insurance reroute diversion congestion blockade mine "
+    "explosion collision jamming spoofing crew hostage ransom militia patrol escort chokepoint freight "
+    "oil lng grain export customs inspection"
+).split()
+
+
+def _stable_hash(value: str) -> int:
+    return int.from_bytes(hashlib.sha256(value.encode()).digest()[:8], "big")
+
+
+def _words(seed: str, count: int) -> str:
+    """Deterministic filler text, different enough per seed that dedup keeps articles apart."""
+    return " ".join(VOCABULARY[_stable_hash(f"{seed}:{i}") % len(VOCABULARY)] for i in range(count))
+
+
+# --- Search (Tavily) ---
+
+class FakeSearchInput(BaseModel):
+    query: str = Field(description="Search query.")
+
+
+class FakeSearchTool(BaseTool):
+    """Returns `results_per_query` synthetic news articles per query, the same ones for the same query."""
+    name: str = "tavily_search"
+    description: str = "Searches recent news articles. Input should be a search query."
+    args_schema: Type[BaseModel] = FakeSearchInput
+    latency: float = 0.2
+    results_per_query: int = 3
+    calls: int = 0
+
+    def results(self, query: str) -> dict:
+        digest = _stable_hash(query)
+        return {
+            "query": query,
+            "results": [
+                {
+                    "url": f"https://news.example.com/{digest:x}/article-{n}",
+                    "title": f"{_words(f'{query}:{n}:title', 6).capitalize()} ({digest:x}-{n})",
+                    "content": _words(f"{query}:{n}:content", 12),
+                    "score": 1.0 - n / 10,
+                }
+                for n in range(self.results_per_query)
+            ],
+        }
+
+    def _run(self, query: str, **kwargs) -> dict:
+        self.calls += 1
+        time.sleep(self.latency)
+        return self.results(query)
+
+    async def _arun(self, query: str, **kwargs) -> dict:
+        self.calls += 1
+        await asyncio.sleep(self.latency)
+        return self.results(query)
+
+
+# --- LLM (Gemini) ---
+
+class FakeChatModel(BaseChatModel):
+    """
+    Deterministic tool-calling chat model. Supports bind_tools() (as required by
+    create_tool_calling_agent) and token streaming (as used by rag_agent.stream_query).
+    """
+    latency: float = 1.0  # seconds to stream one full answer
+    chunk_size: int = 16  # characters per streamed chunk
+    tool_name: str = "tavily_search"
+    calls: int = 0
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-maritime-analyst"
+
+    def bind_tools(self, tools: Any, **kwargs) -> "FakeChatModel":
+        return self
+
+    def _respond(self, messages: List[BaseMessage]) -> AIMessage:
+        self.calls += 1
+        if not isinstance(messages[-1], ToolMessage):
+            query = next((m.content for m in reversed(messages) if isinstance(m, HumanMessage)), "")
+            return AIMessage(
+                content="",
+                tool_calls=[{"name": self.tool_name, "args": {"query": query}, "id": f"call_{uuid.uuid4().hex[:12]}"}],
+            )
+        return AIMessage(content=self.answer(messages[-1].content))
+
+    def answer(self, tool_output: Any) -> str:
+        """The final JSON answer: one report per article in the tool output."""
+        try:
+            articles = json.loads(tool_output)["results"]
+        except (TypeError, ValueError, KeyError):
+            articles = [{"url": url, "title": url, "content": ""} for url in _URL_RE.findall(str(tool_output))]
+        reports = []
+        for article in articles:
+            digest = _stable_hash(article["url"])
+            reports.append({
+                "title": article.get("title") or article["url"],
+                "region": REGIONS[digest % len(REGIONS)],
+                "category": CATEGORIES[digest % len(CATEGORIES)],
+                "description": article.get("content") or "Synthetic report.",
+                "potential_impact": "Increased shipping costs and delays.",
+                "source_urls": [article["url"]],
+                "date_mentioned": "Not specified",
+            })
+        return "```json\n" + json.dumps({"reports": reports}, indent=2) + "\n```"
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager=None, **kwargs) -> ChatResult:
+        time.sleep(self.latency)
+        return ChatResult(generations=[ChatGeneration(message=self._respond(messages))])
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager=None, **kwargs) -> ChatResult:
+        await asyncio.sleep(self.latency)
+        return ChatResult(generations=[ChatGeneration(message=self._respond(messages))])
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs) -> AsyncIterator[ChatGenerationChunk]:
+        message = self._respond(messages)
+        if message.tool_calls:
+            await asyncio.sleep(self.latency / 10)
+            call = message.tool_calls[0]
+            yield ChatGenerationChunk(message=AIMessageChunk(
+                content="",
+                tool_call_chunks=[{"name": call["name"], "args": json.dumps(call["args"]), "id": call["id"], "index": 0}],
+            ))
+            return
+        # Like a real LLM, the answer trickles in over the whole latency budget
+        text = message.content
+        chunks = [text[i:i + self.chunk_size] for i in range(0, len(text), self.chunk_size)]
+        delay = self.latency / max(1, len(chunks))
+        for chunk in chunks:
+            await asyncio.sleep(delay)
+            yield ChatGenerationChunk(message=AIMessageChunk(content=chunk))
+
+
+# --- MongoDB (threat_logs archive) ---
+
+class InMemoryCollection:
+    def __init__(self):
+        self.documents = []
+
+    async def insert_one(self, document):
+        self.documents.append(document)
+
+    async def insert_many(self, documents, ordered=True):
+        self.documents.extend(documents)
+
+    async def create_index(self, keys, **kwargs):
+        return keys
+
+    async def distinct(self, key, filter=None):
+        return list({document[key] for document in self.documents if key in document})
+
+
+class InMemoryMongo:
+    """Install with database.use_mongo_db(InMemoryMongo())."""
+    def __init__(self):
+        self.threat_logs = InMemoryCollection()
+
+
+# --- Teams webhook ---
+
+class WebhookSink:
+    """
+    Minimal keep-alive HTTP/1.1 server accepting webhook posts. Adds a fixed
+    service latency, answers every Nth request with a 429 + Retry-After, and
+    records when each threat title (first text block of each card container) arrives.
+    """
+
+    def __init__(self, latency: float = 0.0, rate_limit_every: int = 0, retry_after: float = 0.2):
+        self.latency = latency
+        self.rate_limit_every = rate_limit_every
+        self.retry_after = retry_after
+        self.requests = 0
+        self.connections = 0
+        self.arrivals = {}
+        self._server = None
+
+    async def start(self) -> str:
+        self._server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+        host, port = self._server.sockets[0].getsockname()[:2]
+        return f"http://{host}:{port}/webhook"
+
+    async def stop(self):
+        self._server.close()
+        await self._server.wait_closed()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.connections += 1
+        try:
+            while True:
+                head = await reader.readuntil(b"\r\n\r\n")
+                headers = {
+                    key.lower(): value
+                    for key, value in (line.split(": ", 1) for line in head.decode().split("\r\n")[1:] if ": " in line)
+                }
+                body = await reader.readexactly(int(headers.get("content-length", "0")))
+                self.requests += 1
+                await asyncio.sleep(self.latency)
+
+                if self.rate_limit_every and self.requests % self.rate_limit_every == 0:
+                    writer.write(
+                        b"HTTP/1.1 429 Too Many Requests\r\nContent-Length: 0\r\n"
+                        + f"Retry-After: {self.retry_after}\r\n\r\n".encode()
+                    )
+                else:
+                    now = time.perf_counter()
+                    for container in json.loads(body)["attachments"][0]["content"]["body"][1:]:
+                        self.arrivals[container["items"][0]["text"]] = now
+                    writer.write(b"HTTP/1.1 200 OK\r\nContent-Length: 0\r\n\r\n")
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionResetError):
+            pass
+        finally:
+            writer.close()
@@ -0,0 +1,282 @@
+"""
+Offline benchmark suite: runs every scenario against local stand-ins (see
+benchmarks/fakes.py) and writes the results as JSON, tagged with the git
+commit, so runs can be compared across commits.
+
+Scenarios:
+  discovery  wall time of a full discovery run (run_threat_discovery_and_save):
+             fake LLM + search tool, dedup, inserts, SSE publish, Teams webhook sink
+  ingest     rows/sec of crud.create_threats_bulk at several batch sizes
+  list       GET /api/threats/ latency (read cache off) at several table sizes
+  sse        fan-out latency of one published threat to N SSE clients
+
+The database is a SQLite file unless DATABASE_URL points elsewhere (e.g. a local Postgres).
+
+Run from the backend/ directory:
+    python -m benchmarks.suite [--scenarios discovery,ingest,list,sse] [--output results.json]
+    python -m benchmarks.suite --compare old.json --output new.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import tempfile
+import time
+from datetime import datetime, timezone
+
+DB_PATH = os.path.join(tempfile.gettempdir(), "maritime_bench_suite.db")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{DB_PATH}")
+
+import httpx  # noqa: E402
+from sqlalchemy import func, select  # noqa: E402
+
+from app import database, main as app_main, models  # noqa: E402
+from app.database import SessionLocal, engine  # noqa: E402
+from app.services import archive_outbox  # noqa: E402
+from app.services.response_cache import threats_cache  # noqa: E402
+from benchmarks import bench_ingest, bench_pagination  # noqa: E402
+from benchmarks.fakes import FakeChatModel, FakeSearchTool, InMemoryMongo, WebhookSink  # noqa: E402
+
+SCENARIOS = ("discovery", "ingest", "list", "sse")
+
+
+def percentiles(samples) -> dict:
+    """p50/p95/p99/max of a list of seconds, in milliseconds."""
+    values = sorted(sample * 1000 for sample in samples)
+    if not values:
+        return {}
+    at = lambda fraction: values[min(len(values) - 1, int(len(values) * fraction))]  # noqa: E731
+    return {"p50_ms": at(0.5), "p95_ms": at(0.95), "p99_ms": at(0.99), "max_ms": values[-1]}
+
+
+async def reset_schema():
+    async with engine.begin() as conn:
+        await conn.run_sync(models.Base.metadata.drop_all)
+        await conn.run_sync(app_main.create_schema)
+
+
+# --- Scenarios ---
+
+async def scenario_discovery(args) -> dict:
+    from app.services import rag_agent, teams_notifier
+
+    await reset_schema()
+    archive = InMemoryMongo()
+    database.use_mongo_db(archive)
+    sink = WebhookSink(latency=args.webhook_latency)
+    teams_notifier.dispatcher.webhook_url = await sink.start()
+
+    chat_model = FakeChatModel(latency=args.llm_latency)
+    search_tool = FakeSearchTool(latency=args.search_latency, results_per_query=args.results_per_query)
+    # Wrapped like in production (minus the on-disk cache), so the source ledger is exercised too
+    agent_tools = [rag_agent.CachedSearchTool(search_tool, use_cache=False)]
+    rag_agent._agent_executor = rag_agent.build_agent_executor(chat_model, agent_tools)
+    try:
+        t0 = time.perf_counter()
+        stats = await app_main.run_threat_discovery_and_save()
+        discovery_seconds = time.perf_counter() - t0
+        await teams_notifier.dispatcher.stop(drain_timeout=120)
+        notified_seconds = time.perf_counter() - t0
+        await archive_outbox.flusher.stop(drain_timeout=None)
+    finally:
+        rag_agent._agent_executor = None
+        await sink.stop()
+
+    async with SessionLocal() as db:
+        saved = await db.scalar(select(func.count()).select_from(models.Threat))
+    return {
+        "queries": len(rag_agent.DISCOVERY_QUERIES),
+        "concurrency": rag_agent.DISCOVERY_CONCURRENCY,
+        "wall_seconds": discovery_seconds,
+        "wall_seconds_incl_notifications": notified_seconds,
+        "threats_saved": saved,
+        "archived": len(archive.threat_logs.documents),
+        "webhook_requests": sink.requests,
+        "llm_calls": chat_model.calls,
+        "search_calls": search_tool.calls,
+        "sources_processed": stats.sources_processed,
+        "sources_skipped": stats.sources_skipped,
+        "stages": stats.stages,
+    }
+
+
+async def scenario_ingest(args) -> dict:
+    results = {}
+    for batch_size in args.batch_sizes:
+        results[f"batch_{batch_size}_rows_per_sec"] = await bench_ingest.run(args.ingest_rows, batch_size)
+    return {"rows": args.ingest_rows, **results}
+
+
+async def _timed_get(client: httpx.AsyncClient, path: str, requests: int) -> list:
+    latencies = []
+    for _ in range(requests):
+        t0 = time.perf_counter()
+        response = await client.get(path)
+        latencies.append(time.perf_counter() - t0)
+        response.raise_for_status()
+    return latencies
+
+
+async def scenario_list(args) -> dict:
+    results = {}
+    max_entries = threats_cache.max_entries
+    threats_cache.max_entries = 0  # measure the database path, not the read cache
+    try:
+        transport = httpx.ASGITransport(app=app_main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            for rows in args.table_sizes:
+                await bench_pagination.seed(rows)
+                first = await client.get("/api/threats/?limit=100")
+                cursor = first.headers.get("X-Next-Cursor", "")
+                paths = {
+                    "first_page": "/api/threats/?limit=100",
+                    "cursor_page": f"/api/threats/?limit=100&cursor={cursor}",
+                    "region_filter": "/api/threats/?limit=100&region=Red%20Sea",
+                }
+                results[str(rows)] = {
+                    name: percentiles(await _timed_get(client, path, args.list_requests))
+                    for name, path in paths.items()
+                }
+    finally:
+        threats_cache.max_entries = max_entries
+    return {"requests_per_path": args.list_requests, "table_sizes": results}
+
+
+async def scenario_sse(args) -> dict:
+    hub = app_main.notification_hub
+    dropped_before = hub.dropped_events
+    subscribers_before = hub.subscriber_count
+    latencies, received = [], []
+
+    async def client():
+        count = 0
+        stream = app_main.notification_generator()
+        try:
+            async for message in stream:
+                payload = json.loads(message["data"])
+                if payload.get("done"):
+                    break
+                latencies.append(time.perf_counter() - payload["sent_at"])
+                count += 1
+        finally:
+            await stream.aclose()
+            received.append(count)
+
+    tasks = [asyncio.create_task(client()) for _ in range(args.sse_clients)]
+    while hub.subscriber_count < subscribers_before + args.sse_clients:
+        await asyncio.sleep(0.001)
+
+    t0 = time.perf_counter()
+    for i in range(args.sse_events):
+        hub.publish(json.dumps({"id": i, "sent_at": time.perf_counter()}))
+        await asyncio.sleep(args.sse_interval)
+    hub.publish(json.dumps({"done": True}))
+    await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - t0
+
+    return {
+        "clients": args.sse_clients,
+        "events": args.sse_events,
+        "deliveries": sum(received),
+        "deliveries_per_sec": sum(received) / elapsed,
+        "dropped_events": hub.dropped_events - dropped_before,
+        "latency": percentiles(latencies),
+    }
+
+
+# --- Results ---
+
+def git_revision() -> dict:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+        dirty = bool(subprocess.run(["git", "status", "--porcelain"], capture_output=True, text=True).stdout.strip())
+        return {"commit": commit, "dirty": dirty}
+    except (OSError, subprocess.CalledProcessError):
+        return {"commit": None, "dirty": None}
+
+
+def flatten(results: dict, prefix: str = "") -> dict:
+    flat = {}
+    for key, value in results.items():
+        name = f"{prefix}.{key}" if prefix else key
+        if isinstance(value, dict):
+            flat.update(flatten(value, name))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[name] = value
+    return flat
+
+
+def print_comparison(baseline: dict, current: dict):
+    old, new = flatten(baseline["scenarios"]), flatten(current["scenarios"])
+    print(f"\nCompared with {baseline['meta'].get('commit') or 'baseline'}:")
+    for name in sorted(new.keys() & old.keys()):
+        if old[name]:
+            print(f"  {name:<60} {old[name]:>12.2f} -> {new[name]:>12.2f}  ({(new[name] / old[name] - 1) * 100:+.1f}%)")
+
+
+async def run(args) -> dict:
+    runners = {"discovery": scenario_discovery, "ingest": scenario_ingest, "list": scenario_list, "sse": scenario_sse}
+    results = {
+        "meta": {
+            **git_revision(),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "database": engine.dialect.name,
+            "args": vars(args),
+        },
+        "scenarios": {},
+    }
+    for name in args.scenarios:
+        print(f"--- {name} ---")
+        t0 = time.perf_counter()
+        results["scenarios"][name] = await runners[name](args)
+        print(f"{name} finished in {time.perf_counter() - t0:.1f}s")
+    await engine.dispose()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS))
+    parser.add_argument("--output", default="bench-results.json")
+    parser.add_argument("--compare", help="Earlier results file to print relative changes against.")
+    # discovery
+    parser.add_argument("--llm-latency", type=float, default=0.5, help="Seconds per fake LLM answer.")
+    parser.add_argument("--search-latency", type=float, default=0.2)
+    parser.add_argument("--results-per-query", type=int, default=3)
+    parser.add_argument("--webhook-latency", type=float, default=0.02)
+    # ingest
+    parser.add_argument("--ingest-rows", type=int, default=5_000)
+    parser.add_argument("--batch-sizes", default="1,100,1000")
+    # list
+    parser.add_argument("--table-sizes", default="1000,10000,100000")
+    parser.add_argument("--list-requests", type=int, default=200)
+    # sse
+    parser.add_argument("--sse-clients", type=int, default=100)
+    parser.add_argument("--sse-events", type=int, default=200)
+    parser.add_argument("--sse-interval", type=float, default=0.001)
+    args = parser.parse_args()
+
+    args.scenarios = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenario(s): {', '.join(sorted(unknown))}")
+    args.batch_sizes = [int(size) for size in args.batch_sizes.split(",")]
+    args.table_sizes = [int(size) for size in args.table_sizes.split(",")]
+
+    results = asyncio.run(run(args))
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2, default=str)
+    print(json.dumps(results["scenarios"], indent=2, default=str))
+    print(f"Results written to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            print_comparison(json.load(f), results)
+
+
+if __name__ == "__main__":
+    main()
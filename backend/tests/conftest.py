@@ -0,0 +1,114 @@
+"""
+Shared setup for the backend tests: a throwaway SQLite database (configured
+before any app module is imported) and an in-memory MongoDB archive.
+
+Run from the backend/ directory:
+    python -m pytest
+"""
+import asyncio
+import os
+import tempfile
+
+DB_PATH = os.path.join(tempfile.mkdtemp(prefix="maritime_tests_"), "test.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{DB_PATH}"
+
+import httpx  # noqa: E402
+import pytest  # noqa: E402
+
+from app import database, models, schemas  # noqa: E402
+from app.database import engine  # noqa: E402
+from app.services import archive_outbox, search  # noqa: E402
+from app.services.response_cache import threats_cache  # noqa: E402
+
+
+class BulkWriteError(Exception):
+    """Shaped like pymongo's BulkWriteError: per-document errors in `details`."""
+    def __init__(self, details):
+        super().__init__("batch op errors occurred")
+        self.details = details
+
+
+class MemoryCollection:
+    """
+    threat_logs stand-in honouring a unique postgres_id index once created.
+    `fail` makes every call raise, like an unreachable MongoDB.
+    """
+    def __init__(self):
+        self.documents = []
+        self.unique_index = False
+        self.fail = None
+
+    async def create_index(self, keys, unique=False, **kwargs):
+        if self.fail is not None:
+            raise self.fail
+        self.unique_index = self.unique_index or unique
+        return keys
+
+    async def insert_many(self, documents, ordered=True):
+        if self.fail is not None:
+            raise self.fail
+        existing = {document["postgres_id"] for document in self.documents}
+        errors = []
+        for index, document in enumerate(documents):
+            if self.unique_index and document["postgres_id"] in existing:
+                errors.append({"index": index, "code": 11000, "errmsg": "E11000 duplicate key error"})
+                continue
+            existing.add(document["postgres_id"])
+            self.documents.append(document)
+        if errors:
+            raise BulkWriteError({"writeErrors": errors, "writeConcernErrors": []})
+
+    async def distinct(self, key, filter=None):
+        return list({document[key] for document in self.documents})
+
+
+class MemoryMongo:
+    def __init__(self):
+        self.threat_logs = MemoryCollection()
+
+
+async def reset_schema():
+    async with engine.begin() as conn:
+        await conn.run_sync(models.Base.metadata.drop_all)
+        await conn.run_sync(models.Base.metadata.create_all)
+    # In-process state derived from the tables
+    threats_cache.bump_version()
+    search.fallback_index = search.InvertedIndex()
+
+
+def run(scenario):
+    """Runs an async test scenario, then stops the archive flusher and closes the pool on the same loop."""
+    async def wrapper():
+        try:
+            return await scenario()
+        finally:
+            await archive_outbox.flusher.stop()
+            await engine.dispose()
+    return asyncio.run(wrapper())
+
+
+def api_client() -> httpx.AsyncClient:
+    """Client calling the FastAPI app in-process (without its lifespan: no scheduler, no schema sync)."""
+    from app.main import app
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test")
+
+
+def make_report(i: int) -> schemas.ThreatCreate:
+    return schemas.ThreatCreate(
+        title=f"Test threat {i}",
+        region="Red Sea",
+        category="Piracy",
+        # Distinct text per report so the duplicate detector keeps them apart
+        description=" ".join(f"word{i}x{n}" for n in range(12)),
+        potential_impact="Increased shipping costs",
+        source_urls=[f"https://example.com/report/{i}"],
+        date_mentioned="Not specified",
+    )
+
+
+@pytest.fixture
+def mongo():
+    archive = MemoryMongo()
+    database.use_mongo_db(archive)
+    yield archive
+    database.use_mongo_db(None)
@@ -0,0 +1,63 @@
+import asyncio
+
+from sqlalchemy import func, select
+
+from app import crud, models
+from app.database import SessionLocal, engine
+from app.services import archive_outbox
+from tests.conftest import make_report, reset_schema
+
+
+async def pending() -> int:
+    async with SessionLocal() as db:
+        return await db.scalar(select(func.count()).select_from(models.ArchiveOutbox))
+
+
+async def save_threats(count: int):
+    async with SessionLocal() as db:
+        threats = await crud.create_threats_bulk(db, [make_report(i) for i in range(count)])
+    # create_threats_bulk wakes the shared flusher; the tests drive their own
+    await archive_outbox.flusher.stop(drain_timeout=0)
+    return threats
+
+
+def test_outage_keeps_rows_and_retries_the_unique_index(mongo):
+    async def scenario():
+        await reset_schema()
+        mongo.threat_logs.fail = ConnectionError("MongoDB is down")
+        await save_threats(3)
+        flusher = archive_outbox.ArchiveOutboxFlusher()
+
+        try:
+            await flusher.flush_once()
+            raise AssertionError("flush_once should fail while MongoDB is down")
+        except ConnectionError:
+            pass
+        assert await pending() == 3
+        assert not flusher._index_ready
+
+        mongo.threat_logs.fail = None
+        assert await flusher.drain() == 3
+        assert flusher._index_ready and mongo.threat_logs.unique_index
+        assert await pending() == 0
+        await engine.dispose()
+
+    asyncio.run(scenario())
+    assert sorted(document["postgres_id"] for document in mongo.threat_logs.documents) == [1, 2, 3]
+
+
+def test_redelivery_after_a_lost_delete_does_not_duplicate(mongo):
+    async def scenario():
+        await reset_schema()
+        threats = await save_threats(4)
+        flusher = archive_outbox.ArchiveOutboxFlusher()
+        # An earlier flusher archived the first two, then died before deleting their outbox rows
+        await mongo.threat_logs.create_index("postgres_id", unique=True)
+        await mongo.threat_logs.insert_many([archive_outbox.archive_document(threat) for threat in threats[:2]])
+
+        assert await flusher.drain() == 4
+        assert await pending() == 0
+        await engine.dispose()
+
+    asyncio.run(scenario())
+    assert sorted(document["postgres_id"] for document in mongo.threat_logs.documents) == [1, 2, 3, 4]
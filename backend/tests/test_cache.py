@@ -0,0 +1,63 @@
+from app.services import cache
+from app.services.cache import PersistentCache, content_key
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_cache(tmp_path, monkeypatch, **kwargs) -> tuple:
+    clock = Clock()
+    monkeypatch.setattr(cache.time, "time", clock)
+    return PersistentCache("test", path=str(tmp_path / "cache.sqlite3"), **kwargs), clock
+
+
+def test_content_key_ignores_dict_order():
+    assert content_key("search", {"query": "red sea", "max_results": 10}) == \
+        content_key("search", {"max_results": 10, "query": "red sea"})
+    assert content_key("search", {"query": "red sea"}) != content_key("search", {"query": "black sea"})
+
+
+def test_entries_expire_after_the_ttl(tmp_path, monkeypatch):
+    store, clock = make_cache(tmp_path, monkeypatch, ttl_seconds=60)
+    store.set("key", {"results": [1, 2]})
+    clock.now += 59
+    assert store.get("key") == {"results": [1, 2]}
+    clock.now += 2
+    assert store.get("key") is None
+    assert store.stats["hits"] == 1 and store.stats["misses"] == 1
+
+
+def test_least_recently_used_entries_are_evicted_at_the_size_cap(tmp_path, monkeypatch):
+    store, clock = make_cache(tmp_path, monkeypatch, ttl_seconds=3600, max_entries=3)
+    for key in ("a", "b", "c"):
+        store.set(key, key)
+        clock.now += 1
+    assert store.get("a") == "a"  # now the most recently used
+    clock.now += 1
+    store.set("d", "d")
+    assert [key for key in ("a", "b", "c", "d") if store.get(key) is not None] == ["a", "c", "d"]
+
+
+def test_eviction_leaves_headroom_below_the_cap(tmp_path, monkeypatch):
+    store, clock = make_cache(tmp_path, monkeypatch, ttl_seconds=3600, max_entries=20)
+    for i in range(21):
+        store.set(f"key{i}", i)
+        clock.now += 1
+    # 21 > 20: the oldest go, plus 20 // 10 = 2 more, so the next writes don't evict again
+    assert [i for i in range(21) if store.get(f"key{i}") is not None] == list(range(3, 21))
+
+
+def test_namespaces_sharing_a_file_are_independent(tmp_path, monkeypatch):
+    first, _ = make_cache(tmp_path, monkeypatch, ttl_seconds=60, max_entries=1)
+    second = PersistentCache("other", ttl_seconds=60, max_entries=1, path=first.path)
+    first.set("key", "first")
+    second.set("key", "second")
+    second.set("another", "second")
+    assert first.get("key") == "first"
+    first.clear()
+    assert first.get("key") is None and second.get("another") == "second"
@@ -0,0 +1,74 @@
+from app import crud, schemas
+from app.database import SessionLocal
+from app.services.dedup import canonicalize_url, detector
+from tests.conftest import reset_schema, run
+
+WORDS = (
+    "houthi drones struck liberian flagged tanker near hodeidah port red sea shipping "
+    "lanes disrupted insurers raise premiums crews evacuated vessel damaged"
+).split()
+
+
+def report(words, url: str, title: str = "Tanker attack") -> schemas.ThreatCreate:
+    return schemas.ThreatCreate(
+        title=title,
+        region="Red Sea",
+        category="Military Conflict",
+        description=" ".join(words),
+        potential_impact="Higher war-risk premiums",
+        source_urls=[url],
+        date_mentioned="Not specified",
+    )
+
+
+def reworded(replaced: int):
+    """WORDS with the last `replaced` words swapped for unrelated ones."""
+    return WORDS[:len(WORDS) - replaced] + [f"unrelated{i}" for i in range(replaced)]
+
+
+def fingerprint(r: schemas.ThreatCreate):
+    return detector.fingerprint(r.title, r.description, r.source_urls)
+
+
+def new_after_storing(stored, incoming):
+    async def scenario():
+        await reset_schema()
+        async with SessionLocal() as db:
+            await crud.create_threats_bulk(db, stored)
+        async with SessionLocal() as db:
+            return await detector.filter_new(db, incoming)
+    return run(scenario)
+
+
+def test_canonical_urls_ignore_tracking_and_cosmetics():
+    assert canonicalize_url("https://www.Example.com:443/news//item/?utm_source=x&b=2&a=1#top") == \
+        canonicalize_url("http://example.com/news/item?a=1&b=2&fbclid=abc")
+
+
+def test_exact_resubmit_is_dropped(mongo):
+    original = report(WORDS, "https://example.com/a")
+    assert new_after_storing([original], [original]) == []
+
+
+def test_near_duplicate_above_the_threshold_is_dropped(mongo):
+    original = report(WORDS, "https://example.com/a")
+    rewrite = report(reworded(3), "https://other.example.org/b")
+    assert detector.similarity(fingerprint(original).signature, fingerprint(rewrite).signature) >= detector.threshold
+    assert new_after_storing([original], [rewrite]) == []
+
+
+def test_distinct_report_in_the_same_lsh_bucket_is_kept(mongo):
+    original = report(WORDS, "https://example.com/a")
+    distinct = report(reworded(7), "https://other.example.org/b")
+    a, b = fingerprint(original), fingerprint(distinct)
+    # A candidate through a shared band, but verification rejects it
+    assert set(a.band_keys) & set(b.band_keys)
+    assert detector.similarity(a.signature, b.signature) < detector.threshold
+    assert new_after_storing([original], [distinct]) == [distinct]
+
+
+def test_duplicates_within_one_batch_are_collapsed(mongo):
+    first = report(WORDS, "https://example.com/a")
+    repeat = report(reworded(2), "https://other.example.org/b")
+    unrelated = report([f"gulf{i}" for i in range(len(WORDS))], "https://example.com/c", title="Mines")
+    assert new_after_storing([], [first, repeat, unrelated]) == [first, unrelated]
@@ -0,0 +1,113 @@
+import asyncio
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import func, select
+
+from app import models
+from app.database import SessionLocal
+from app.services.discovery_jobs import CANCELLED, FAILED, RUNNING, SUCCEEDED, DiscoveryJobManager
+from tests.conftest import reset_schema, run
+
+
+class FakeDiscovery:
+    """A run function that stays in progress until released (or fails when told to)."""
+    def __init__(self, error=None):
+        self.release = asyncio.Event()
+        self.error = error
+        self.calls = 0
+
+    async def __call__(self, stats, full_rescan=False):
+        self.calls += 1
+        stats.found += 2
+        await self.release.wait()
+        if self.error is not None:
+            raise self.error
+        stats.saved += 1
+
+
+async def active_runs() -> int:
+    async with SessionLocal() as db:
+        return await db.scalar(select(func.count()).where(models.DiscoveryRun.active.is_(True)))
+
+
+def test_concurrent_triggers_join_one_run():
+    async def scenario():
+        await reset_schema()
+        discovery = FakeDiscovery()
+        jobs = DiscoveryJobManager(discovery, SessionLocal)
+        (first, started_first), (second, started_second) = await asyncio.gather(jobs.trigger(), jobs.trigger())
+        live = await jobs.get(first.id)
+        discovery.release.set()
+        final = await jobs.wait(first.id)
+        return first, started_first, second, started_second, live, final, discovery.calls, await active_runs()
+
+    first, started_first, second, started_second, live, final, calls, active = run(scenario)
+    assert first.id == second.id and (started_first, started_second) == (True, False)
+    assert calls == 1
+    assert live.status == RUNNING and live.reports_found == 2
+    assert final.status == SUCCEEDED and final.reports_saved == 1 and final.active is None
+    assert active == 0
+
+
+def test_cancelled_run_is_recorded_and_a_new_one_can_start():
+    async def scenario():
+        await reset_schema()
+        jobs = DiscoveryJobManager(FakeDiscovery(), SessionLocal)
+        cancelled_run, _ = await jobs.trigger()
+        cancelled = await jobs.cancel(cancelled_run.id)
+        next_run, started = await jobs.trigger()
+        await jobs.stop()
+        return cancelled, next_run, started
+
+    cancelled, next_run, started = run(scenario)
+    assert cancelled.status == CANCELLED and cancelled.active is None
+    assert cancelled.error == "Cancelled on request."
+    assert started and next_run.id != cancelled.id
+
+
+def test_crashed_run_leaves_no_active_row():
+    async def scenario():
+        await reset_schema()
+        discovery = FakeDiscovery(error=RuntimeError("LLM quota exceeded"))
+        jobs = DiscoveryJobManager(discovery, SessionLocal)
+        crashed, _ = await jobs.trigger()
+        discovery.release.set()
+        final = await jobs.wait(crashed.id)
+        active = await active_runs()
+        discovery.error = None
+        _, started = await jobs.trigger()
+        await jobs.stop()
+        return final, active, started
+
+    final, active, started = run(scenario)
+    assert final.status == FAILED and final.error == "RuntimeError: LLM quota exceeded"
+    assert active == 0 and started
+
+
+def test_active_row_of_another_process_is_joined_until_abandoned():
+    async def scenario():
+        await reset_schema()
+        jobs = DiscoveryJobManager(FakeDiscovery(), SessionLocal, timeout=60)
+        other = models.DiscoveryRun(
+            id=uuid.uuid4().hex, status=RUNNING, trigger="schedule", active=True,
+            cancel_requested=False, started_at=datetime.now(timezone.utc),
+        )
+        async with SessionLocal() as db:
+            db.add(other)
+            await db.commit()
+        joined, started_while_alive = await jobs.trigger()
+
+        # The other process died: once its run is well past the timeout, it is released
+        async with SessionLocal() as db:
+            (await db.get(models.DiscoveryRun, other.id)).started_at = datetime.now(timezone.utc) - timedelta(minutes=5)
+            await db.commit()
+        fresh, started_after = await jobs.trigger()
+        abandoned = await jobs.get(other.id)
+        await jobs.stop()
+        return other.id, joined, started_while_alive, fresh, started_after, abandoned
+
+    other_id, joined, started_while_alive, fresh, started_after, abandoned = run(scenario)
+    assert joined.id == other_id and not started_while_alive
+    assert started_after and fresh.id != other_id
+    assert abandoned.status == FAILED and abandoned.active is None
@@ -0,0 +1,103 @@
+import csv
+import io
+import json
+
+import pytest
+
+from app import crud, schemas
+from app.database import SessionLocal
+from app.services import export
+from tests.conftest import api_client, make_report, reset_schema, run
+
+TRICKY_DESCRIPTION = 'Boarded at dawn, crew "safe"\nsecond line, with commas'
+
+
+def report(i: int, region: str, description: str = None) -> schemas.ThreatCreate:
+    update = {"region": region}
+    if description is not None:
+        update["description"] = description
+    return make_report(i).model_copy(update=update)
+
+
+async def seed():
+    await reset_schema()
+    async with SessionLocal() as db:
+        await crud.create_threats_bulk(db, [report(1, "Red Sea"), report(2, "Black Sea")])
+        await crud.create_threats_bulk(db, [report(3, "Red Sea", TRICKY_DESCRIPTION), report(4, "Red Sea")])
+        await crud.create_threats_bulk(db, [report(5, "Black Sea")])
+        # The filtered query the export must match, oldest first
+        expected = list(reversed(await crud.get_threats(db, limit=1000, region="Red Sea")))
+    return expected
+
+
+def expected_rows(threats):
+    return [[getattr(threat, name) for name in export.FIELD_NAMES] for threat in threats]
+
+
+def get_export(**params):
+    async def scenario():
+        expected = await seed()
+        async with api_client() as client:
+            response = await client.get("/api/threats/export", params={"region": "Red Sea", **params})
+        return expected, response
+
+    return run(scenario)
+
+
+def test_ndjson_matches_the_filtered_query(mongo):
+    expected, response = get_export(format="ndjson")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    records = [json.loads(line) for line in response.text.splitlines()]
+    assert len(records) == len(expected) == 3
+    assert all(list(record) == list(export.FIELD_NAMES) for record in records)
+    rows = expected_rows(expected)
+    for row in rows:
+        row[1] = row[1].isoformat()
+    assert [list(record.values()) for record in records] == rows
+    assert records[1]["description"] == TRICKY_DESCRIPTION
+
+
+def test_csv_matches_the_filtered_query_and_quotes_fields(mongo):
+    expected, response = get_export(format="csv")
+    assert response.status_code == 200
+    assert response.headers["content-disposition"] == 'attachment; filename="threats.csv"'
+    # Commas, quotes and newlines inside a field are quoted, not split into columns or rows
+    assert '"Boarded at dawn, crew ""safe""\nsecond line, with commas"' in response.text
+    header, *rows = list(csv.reader(io.StringIO(response.text)))
+    assert header == list(export.FIELD_NAMES)
+    assert len(rows) == len(expected) == 3
+    assert all(len(row) == len(header) for row in rows)
+    assert [int(row[0]) for row in rows] == [threat.id for threat in expected]
+    assert rows[1][header.index("description")] == TRICKY_DESCRIPTION
+    assert rows[0][header.index("source_urls")] == " ".join(expected[0].source_urls)
+
+
+def test_parquet_without_pyarrow_is_rejected_before_streaming(mongo, monkeypatch):
+    monkeypatch.setattr(export, "parquet_available", lambda: False)
+    _, response = get_export(format="parquet")
+    assert response.status_code == 501
+    assert "pyarrow" in response.json()["detail"]
+
+
+def test_parquet_matches_the_filtered_query(mongo):
+    pq = pytest.importorskip("pyarrow.parquet")
+    expected, response = get_export(format="parquet")
+    assert response.status_code == 200
+    table = pq.read_table(io.BytesIO(response.content))
+    assert table.column_names == list(export.FIELD_NAMES)
+    assert table.column("id").to_pylist() == [threat.id for threat in expected]
+
+
+def test_unknown_format_is_rejected(mongo):
+    _, response = get_export(format="xlsx")
+    assert response.status_code == 422
+
+
+def test_batches_are_bounded_by_batch_size(mongo):
+    async def scenario():
+        await seed()
+        async with SessionLocal() as db:
+            return [len(rows) async for rows in export.iter_batches(db, batch_size=2)]
+
+    assert run(scenario) == [2, 2, 1]
@@ -0,0 +1,28 @@
+from app.services.gazetteer import Gazetteer, Region
+
+BERING_SEA = Region(id="bering_sea", name="Bering Sea", kind="sea", bbox=(170.0, 52.0, -160.0, 66.0), aliases=())
+
+
+def test_region_crossing_the_antimeridian_is_found_on_both_sides():
+    gazetteer = Gazetteer([BERING_SEA])
+    assert gazetteer.regions_in_bbox((175.0, 55.0, 178.0, 58.0)) == {"bering_sea"}
+    assert gazetteer.regions_in_bbox((-170.0, 55.0, -165.0, 58.0)) == {"bering_sea"}
+    assert gazetteer.regions_in_bbox((-150.0, 55.0, -140.0, 58.0)) == set()
+    assert gazetteer.regions_near(58.0, 179.0, 50.0) == {"bering_sea"}
+    assert gazetteer.regions_near(58.0, -179.0, 50.0) == {"bering_sea"}
+
+
+def test_radius_reaches_a_region_just_across_the_antimeridian():
+    fiji = Region(id="fiji", name="Fiji", kind="sea", bbox=(-179.9, -20.0, -178.0, -15.0), aliases=())
+    gazetteer = Gazetteer([fiji])
+    # About 20 km west of the box, on the other side of 180
+    assert gazetteer.regions_near(-17.0, 179.9, 50.0) == {"fiji"}
+    assert gazetteer.regions_near(-17.0, 175.0, 50.0) == set()
+
+
+def test_bundled_pacific_regions():
+    gazetteer = Gazetteer.load()
+    assert gazetteer.normalize("Western Pacific") == ["north_pacific"]
+    assert gazetteer.normalize("Philippine Sea") == ["philippine_sea"]
+    assert gazetteer.normalize("West Philippine Sea") == ["south_china_sea"]
+    assert "north_pacific" in gazetteer.regions_near(30.0, -170.0, 100.0)
@@ -0,0 +1,69 @@
+import asyncio
+
+import pytest
+
+from app.services.notification_hub import DISCONNECT, DROP_OLDEST, NotificationHub, SlowConsumerError
+
+
+async def take(stream, count: int):
+    return [await stream.__anext__() for _ in range(count)]
+
+
+def test_replay_is_not_capped_by_the_subscriber_buffer():
+    async def scenario():
+        hub = NotificationHub(replay_window=1000, subscriber_buffer_size=100, slow_consumer_policy=DROP_OLDEST)
+        start = hub.last_event_id
+        for i in range(499):
+            hub.publish(f"event {i}")
+        stream = hub.subscribe(last_event_id=start)
+        events = await take(stream, 499)
+        await stream.aclose()
+        return start, events, hub.dropped_events
+
+    start, events, dropped = asyncio.run(scenario())
+    assert [event.id for event in events] == list(range(start + 1, start + 500))
+    assert dropped == 0
+
+
+def test_disconnect_policy_reconnect_from_an_old_event_id_gets_the_replay():
+    async def scenario():
+        hub = NotificationHub(replay_window=1000, subscriber_buffer_size=100, slow_consumer_policy=DISCONNECT)
+        start = hub.last_event_id
+        for i in range(300):
+            hub.publish(f"event {i}")
+        stream = hub.subscribe(last_event_id=start)
+        events = await take(stream, 300)
+        hub.publish("live")
+        live = await stream.__anext__()
+        await stream.aclose()
+        return start, events, live, hub.disconnected_subscribers
+
+    start, events, live, disconnected = asyncio.run(scenario())
+    assert [event.id for event in events] == list(range(start + 1, start + 301))
+    assert live.data == "live"
+    assert disconnected == 0
+
+
+def test_live_lag_beyond_the_buffer_still_applies_the_policy():
+    async def scenario(policy):
+        hub = NotificationHub(replay_window=1000, subscriber_buffer_size=10, slow_consumer_policy=policy)
+        stream = hub.subscribe()
+        pending = asyncio.ensure_future(stream.__anext__())
+        await asyncio.sleep(0)  # subscribed and waiting
+        hub.publish("first")
+        first = await pending
+        for i in range(50):
+            hub.publish(f"event {i}")
+        try:
+            rest = await take(stream, 10)
+        finally:
+            await stream.aclose()
+        return hub, first, rest
+
+    hub, first, rest = asyncio.run(scenario(DROP_OLDEST))
+    assert first.data == "first"
+    assert [event.data for event in rest] == [f"event {i}" for i in range(40, 50)]
+    assert hub.dropped_events == 40
+
+    with pytest.raises(SlowConsumerError):
+        asyncio.run(scenario(DISCONNECT))
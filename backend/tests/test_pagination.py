@@ -0,0 +1,44 @@
+import asyncio
+
+from app import crud
+from app.database import SessionLocal, engine
+from app.services import archive_outbox
+from tests.conftest import api_client, make_report, reset_schema, run
+
+
+def test_cursor_pages_through_server_defaulted_rows(mongo):
+    async def scenario():
+        await reset_schema()
+        async with SessionLocal() as db:
+            # One statement: every row gets the same server-side created_at, so only the id breaks ties
+            await crud.create_threats_bulk(db, [make_report(i) for i in range(25)])
+            seen = []
+            cursor = None
+            for _ in range(10):
+                page = await crud.get_threats(db, limit=10, cursor=cursor)
+                seen.extend(threat.id for threat in page)
+                if len(page) < 10:
+                    break
+                cursor = crud.encode_cursor(page[-1])
+        await archive_outbox.flusher.stop()
+        await engine.dispose()
+        return seen
+
+    seen = asyncio.run(scenario())
+    assert seen == list(range(25, 0, -1))
+
+
+def test_out_of_range_skip_and_limit_are_rejected(mongo):
+    async def scenario():
+        await reset_schema()
+        async with api_client() as client:
+            rejected = [
+                (await client.get("/api/threats/", params=params)).status_code
+                for params in ({"limit": -1}, {"limit": 0}, {"limit": 1001}, {"skip": -1})
+            ]
+            accepted = (await client.get("/api/threats/", params={"limit": 1000, "skip": 0})).status_code
+        return rejected, accepted
+
+    rejected, accepted = run(scenario)
+    assert rejected == [422, 422, 422, 422]
+    assert accepted == 200
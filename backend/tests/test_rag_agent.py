@@ -0,0 +1,96 @@
+from datetime import datetime, timezone
+
+from langchain_core.tools import BaseTool
+from pydantic import BaseModel
+
+from app.services import rag_agent
+from app.services.cache import PersistentCache
+from app.services.discovery_ledger import ledger
+from tests.conftest import reset_schema, run
+
+SEARCH_RESULT = {"results": [
+    {"url": "https://www.example.com/read-before/?utm_source=feed", "content": "old"},
+    {"url": "https://example.com/new", "content": "new"},
+]}
+
+
+def filter_for(context):
+    async def scenario():
+        await reset_schema()
+        await ledger.record("query", datetime.now(timezone.utc), {"example.com/read-before": None})
+        token = rag_agent._query_context.set(context)
+        try:
+            return await rag_agent.filter_processed_articles(SEARCH_RESULT)
+        finally:
+            rag_agent._query_context.reset(token)
+    return run(scenario)
+
+
+def test_articles_in_the_ledger_do_not_reach_the_llm():
+    context = rag_agent.QueryContext("query")
+    result = filter_for(context)
+    assert [item["url"] for item in result["results"]] == ["https://example.com/new"]
+    assert (context.processed, context.skipped) == (1, 1)
+
+
+def test_full_rescan_reads_ledger_articles_again():
+    context = rag_agent.QueryContext("query", full_rescan=True)
+    result = filter_for(context)
+    assert len(result["results"]) == 2
+    assert set(context.sources) == {"example.com/read-before", "example.com/new"}
+
+
+class SearchArgs(BaseModel):
+    query: str
+
+
+class FakeSearch(BaseTool):
+    """Stands in for the web search API and counts the calls that reach it."""
+    name: str = "fake_search"
+    description: str = "Searches the web."
+    args_schema: type = SearchArgs
+    calls: int = 0
+
+    def _run(self, query: str):
+        self.calls += 1
+        return {"query": query, "results": [{"url": f"https://example.com/{self.calls}", "content": query}]}
+
+    async def _arun(self, query: str):
+        return self._run(query)
+
+
+def cached_search(tmp_path, monkeypatch) -> rag_agent.CachedSearchTool:
+    monkeypatch.setattr(rag_agent, "search_cache", PersistentCache("search", 3600, path=str(tmp_path / "c.sqlite3")))
+    return rag_agent.CachedSearchTool(FakeSearch(), use_cache=True)
+
+
+def test_same_search_twice_calls_the_api_once(tmp_path, monkeypatch):
+    tool = cached_search(tmp_path, monkeypatch)
+
+    async def scenario():
+        first = await tool.ainvoke({"query": "red sea attacks"})
+        second = await tool.ainvoke({"query": "red sea attacks"})
+        other = await tool.ainvoke({"query": "black sea mines"})
+        return first, second, other
+
+    first, second, other = run(scenario)
+    assert first == second and other != first
+    assert tool.inner.calls == 2
+    assert rag_agent.search_cache.stats["hits"] == 1
+
+
+def test_sync_invoke_shares_the_search_cache(tmp_path, monkeypatch):
+    tool = cached_search(tmp_path, monkeypatch)
+    first = tool.invoke({"query": "hormuz tanker"})
+    assert tool.invoke({"query": "hormuz tanker"}) == first
+    assert run(lambda: tool.ainvoke({"query": "hormuz tanker"})) == first
+    assert tool.inner.calls == 1
+
+
+def test_api_errors_are_not_cached(tmp_path, monkeypatch):
+    tool = cached_search(tmp_path, monkeypatch)
+    responses = [{"error": "rate limited"}, {"results": []}]
+    monkeypatch.setattr(FakeSearch, "_run", lambda self, query: responses.pop(0))
+    assert tool.invoke({"query": "piracy"}) == {"error": "rate limited"}
+    assert tool.invoke({"query": "piracy"}) == {"results": []}
+    assert tool.invoke({"query": "piracy"}) == {"results": []}
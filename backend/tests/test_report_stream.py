@@ -0,0 +1,85 @@
+import json
+
+import pytest
+
+from app.services.report_stream import ReportStreamParser
+
+REPORTS = [
+    {
+        "title": "Tanker hit [again] near {Hodeidah}",
+        "region": "Red Sea",
+        "description": 'Officials said "the ] and } in this text" are not JSON syntax \\ at all.',
+        "source_urls": ["https://example.com/a?x=[1]", "https://example.com/b#}"],
+        "nested": {"severity": {"level": 3}, "tags": ["a]", "{b"]},
+    },
+    {"title": "Mines drifting", "region": "Black Sea", "description": "Escaped quote: \"", "source_urls": []},
+    {"title": "Ünïcödé ✓ — dashes", "region": "Gulf of Guinea", "description": "", "source_urls": []},
+]
+ANSWER = json.dumps({"reports": REPORTS}, ensure_ascii=False, indent=2)
+
+INPUTS = {
+    "bare": ANSWER,
+    "fenced_with_preamble": (
+        'Here is what I found about the "reports" you asked for [with brackets] {and braces}:\n'
+        f"```json\n{ANSWER}\n```\nLet me know if you need more."
+    ),
+    "compact": json.dumps({"reports": REPORTS}, separators=(",", ":")),
+}
+
+
+def feed_in_two(text: str, offset: int):
+    parser = ReportStreamParser()
+    return parser.feed(text[:offset]) + parser.feed(text[offset:]), parser
+
+
+@pytest.mark.parametrize("name", INPUTS)
+def test_every_split_offset_matches_json_loads(name):
+    text = INPUTS[name]
+    for offset in range(len(text) + 1):
+        items, parser = feed_in_two(text, offset)
+        assert items == REPORTS, f"split at {offset}: {text[max(0, offset - 10):offset + 10]!r}"
+        assert parser.done and parser.items_parsed == len(REPORTS) and parser.items_failed == 0
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 7, 16, 64])
+def test_fixed_size_chunks_match_json_loads(chunk_size):
+    text = INPUTS["fenced_with_preamble"]
+    parser = ReportStreamParser()
+    items = []
+    for start in range(0, len(text), chunk_size):
+        items.extend(parser.feed(text[start:start + chunk_size]))
+    assert items == REPORTS
+
+
+def test_objects_are_yielded_as_soon_as_they_close():
+    parser = ReportStreamParser()
+    text = INPUTS["compact"]
+    first_end = text.index('},{"title"') + 1
+    assert parser.feed(text[:first_end]) == REPORTS[:1]
+    assert not parser.done
+
+
+@pytest.mark.parametrize("cut", [1, 10, 40])
+def test_truncated_final_object_is_not_yielded(cut):
+    last_start = ANSWER.rindex("{\n      \"title\"")
+    truncated = ANSWER[:last_start + cut]
+    for offset in range(len(truncated) + 1):
+        items, parser = feed_in_two(truncated, offset)
+        assert items == REPORTS[:2]
+        assert not parser.done
+
+
+def test_malformed_report_only_drops_itself():
+    text = '{"reports": [{"title": "ok"}, {"title": nope}, {"title": "also ok"}]}'
+    parser = ReportStreamParser()
+    items = parser.feed(text)
+    assert items[0] == {"title": "ok"} and items[2] == {"title": "also ok"}
+    assert isinstance(items[1], ValueError)
+    assert (parser.items_parsed, parser.items_failed) == (2, 1)
+
+
+def test_reset_starts_a_new_answer():
+    parser = ReportStreamParser()
+    parser.feed('{"reports": [{"title": "from a tool-calling turn"')
+    parser.reset()
+    assert parser.feed(INPUTS["compact"]) == REPORTS
@@ -0,0 +1,85 @@
+from app import crud, schemas
+from app.database import SessionLocal
+from app.services.response_cache import ResponseCache, etag_matches, threats_cache
+from tests.conftest import api_client, make_report, reset_schema, run
+
+
+def report(i: int, region: str) -> schemas.ThreatCreate:
+    return make_report(i).model_copy(update={"region": region})
+
+
+async def ingest(*reports):
+    async with SessionLocal() as db:
+        await crud.create_threats_bulk(db, list(reports))
+
+
+def test_if_none_match_gets_304_until_an_ingest(mongo):
+    async def scenario():
+        await reset_schema()
+        await ingest(report(1, "Red Sea"))
+        async with api_client() as client:
+            first = await client.get("/api/threats/")
+            etag = first.headers["ETag"]
+            not_modified = await client.get("/api/threats/", headers={"If-None-Match": etag})
+            weak = await client.get("/api/threats/", headers={"If-None-Match": f'"other", W/{etag}'})
+            await ingest(report(2, "Red Sea"))
+            after_ingest = await client.get("/api/threats/", headers={"If-None-Match": etag})
+        return first, not_modified, weak, after_ingest
+
+    first, not_modified, weak, after_ingest = run(scenario)
+    assert first.status_code == 200 and len(first.json()) == 1
+    assert not_modified.status_code == 304 and not_modified.content == b""
+    assert not_modified.headers["ETag"] == first.headers["ETag"]
+    assert weak.status_code == 304
+    assert after_ingest.status_code == 200 and len(after_ingest.json()) == 2
+    assert after_ingest.headers["ETag"] != first.headers["ETag"]
+
+
+def test_filters_and_cursors_do_not_share_cache_entries(mongo):
+    async def scenario():
+        await reset_schema()
+        await ingest(*(report(i, "Red Sea" if i % 2 else "Black Sea") for i in range(1, 7)))
+        async with api_client() as client:
+            red = await client.get("/api/threats/", params={"region": "Red Sea"})
+            black = await client.get("/api/threats/", params={"region": "Black Sea"})
+            page_1 = await client.get("/api/threats/", params={"limit": 2})
+            page_2 = await client.get("/api/threats/", params={"limit": 2, "cursor": page_1.headers["X-Next-Cursor"]})
+            # Served from the cache this time, still per key
+            hits = threats_cache.hits
+            red_again = await client.get("/api/threats/", params={"region": "Red Sea"})
+            page_2_again = await client.get(
+                "/api/threats/", params={"limit": 2, "cursor": page_1.headers["X-Next-Cursor"]}
+            )
+        return red, black, page_1, page_2, red_again, page_2_again, threats_cache.hits - hits
+
+    red, black, page_1, page_2, red_again, page_2_again, hits = run(scenario)
+    assert {threat["region"] for threat in red.json()} == {"Red Sea"}
+    assert {threat["region"] for threat in black.json()} == {"Black Sea"}
+    assert red.headers["ETag"] != black.headers["ETag"]
+    assert [t["id"] for t in page_1.json()] == [6, 5] and [t["id"] for t in page_2.json()] == [4, 3]
+    assert red_again.json() == red.json() and page_2_again.json() == page_2.json()
+    assert hits == 2
+
+
+def test_put_after_a_concurrent_write_is_not_cached():
+    cache = ResponseCache(max_entries=2)
+    version = cache.version
+    cache.bump_version()  # a write landed while the response was being built
+    entry = cache.put("key", b"[]", version=version)
+    assert entry.body == b"[]" and cache.get("key") is None
+
+
+def test_least_recently_used_response_is_evicted():
+    cache = ResponseCache(max_entries=2)
+    for key in ("a", "b"):
+        cache.put(key, key.encode())
+    cache.get("a")
+    cache.put("c", b"c")
+    assert cache.get("b") is None and cache.get("a") is not None and cache.get("c") is not None
+
+
+def test_etag_matching():
+    assert etag_matches('"1-abc"', '"1-abc"')
+    assert etag_matches('W/"1-abc", "2-def"', '"1-abc"')
+    assert etag_matches("*", '"1-abc"')
+    assert not etag_matches(None, '"1-abc"') and not etag_matches('"1-abd"', '"1-abc"')
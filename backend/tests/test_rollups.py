@@ -0,0 +1,91 @@
+from datetime import datetime, timezone
+
+from sqlalchemy import func, insert, select
+
+from app import crud, models
+from app.database import SessionLocal
+from app.services import rollups
+from tests.conftest import api_client, make_report, reset_schema, run
+
+# (created_at, region, category); batches span weeks and months
+BATCHES = [
+    [
+        (datetime(2025, 1, 30, 8, tzinfo=timezone.utc), "Red Sea", "Piracy"),
+        # Same bucket as the row above, in the same batch
+        (datetime(2025, 1, 30, 21, tzinfo=timezone.utc), "Red Sea", "Piracy"),
+        (datetime(2025, 1, 31, 23, 59, tzinfo=timezone.utc), "Black Sea", "Mines"),
+    ],
+    [
+        # Same day bucket as the first batch again: the ON CONFLICT update adds to it
+        (datetime(2025, 1, 30, 12, tzinfo=timezone.utc), "Red Sea", "Piracy"),
+        (datetime(2025, 2, 1, 0, 0, tzinfo=timezone.utc), "Red Sea", "Sanctions"),
+        (datetime(2025, 2, 3, 9, tzinfo=timezone.utc), "Black Sea", "Mines"),
+    ],
+    [
+        (datetime(2025, 2, 2, 10, tzinfo=timezone.utc), "Red Sea", "Piracy"),
+        (datetime(2025, 2, 3, 11, tzinfo=timezone.utc), "Black Sea", "Mines"),
+        (datetime(2025, 2, 3, 12, tzinfo=timezone.utc), "Black Sea", "Mines"),
+    ],
+]
+
+# SQLite expressions for the UTC bucket starts (week: back to Monday)
+BUCKET_SQL = {
+    "day": func.date(models.Threat.created_at),
+    "week": func.date(models.Threat.created_at, "weekday 0", "-6 days"),
+    "month": func.strftime("%Y-%m-01", models.Threat.created_at),
+}
+
+
+async def ingest(batch):
+    """Inserts one batch with explicit timestamps the way crud.create_threats_bulk does."""
+    rows = [
+        {**make_report(i).model_dump(), "created_at": created_at, "region": region, "category": category}
+        for i, (created_at, region, category) in enumerate(batch)
+    ]
+    async with SessionLocal() as db:
+        threats = (await db.scalars(insert(models.Threat).returning(models.Threat), rows)).all()
+        await rollups.add_threats(db, threats)
+        await db.commit()
+
+
+async def grouped_counts(db, bucket, group_by):
+    """The expected answer, straight from the threats table."""
+    columns = [BUCKET_SQL[bucket].label("bucket_start")] + [getattr(models.Threat, d) for d in group_by]
+    query = select(*columns, func.count().label("count")).group_by(*columns).order_by(*columns)
+    return [dict(row._mapping) for row in await db.execute(query)]
+
+
+def test_stats_match_a_group_by_over_threats(mongo):
+    async def scenario():
+        await reset_schema()
+        for batch in BATCHES:
+            await ingest(batch)
+        # And one batch through the real ingest path (created_at from the database)
+        async with SessionLocal() as db:
+            await crud.create_threats_bulk(db, [make_report(100), make_report(101)])
+
+        results = []
+        async with api_client() as client, SessionLocal() as db:
+            for bucket in rollups.BUCKETS:
+                for group_by in ((), ("region",), ("category",), ("region", "category")):
+                    response = await client.get(
+                        "/api/threats/stats", params={"bucket": bucket, "group_by": ",".join(group_by)}
+                    )
+                    assert response.status_code == 200
+                    results.append((bucket, group_by, response.json(), await grouped_counts(db, bucket, group_by)))
+        return results
+
+    for bucket, group_by, actual, expected in run(scenario):
+        assert actual == expected, (bucket, group_by)
+
+
+def test_repeated_keys_add_up_within_and_across_batches(mongo):
+    async def scenario():
+        await reset_schema()
+        for batch in BATCHES:
+            await ingest(batch)
+        async with SessionLocal() as db:
+            return await rollups.get_stats(db, "day", ["region", "category"], region="Red Sea", category="Piracy")
+
+    stats = run(scenario)
+    assert [(row["bucket_start"].isoformat(), row["count"]) for row in stats] == [("2025-01-30", 3), ("2025-02-02", 1)]
@@ -0,0 +1,40 @@
+from app import crud, schemas
+from app.database import SessionLocal
+from app.services.search import MARK_START, MARK_STOP, escape_headline, highlight
+from tests.conftest import api_client, reset_schema, run
+
+
+def test_fallback_highlight_escapes_html_around_marks():
+    snippet = highlight('<script>alert("tanker")</script> Tanker seized', {"tanker"})
+    assert snippet == (
+        "&lt;script&gt;alert(&quot;<mark>tanker</mark>&quot;)&lt;/script&gt; <mark>Tanker</mark> seized"
+    )
+
+
+def test_postgres_headline_escapes_html_around_marks():
+    headline = f"<img src=x onerror=alert(1)> {MARK_START}tanker{MARK_STOP} seized"
+    assert escape_headline(headline) == "&lt;img src=x onerror=alert(1)&gt; <mark>tanker</mark> seized"
+
+
+def test_search_endpoint_returns_escaped_snippets(mongo):
+    async def scenario():
+        await reset_schema()
+        async with SessionLocal() as db:
+            await crud.create_threats_bulk(db, [schemas.ThreatCreate(
+                title="<script>alert(1)</script> Tanker seized",
+                region="Strait of Hormuz",
+                category="Security",
+                description="A tanker was boarded <b>near</b> the strait.",
+                potential_impact="Higher insurance premiums",
+                source_urls=["https://example.com/tanker"],
+                date_mentioned="Not specified",
+            )])
+        async with api_client() as client:
+            return await client.get("/api/threats/search", params={"q": "tanker"})
+
+    response = run(scenario)
+    assert response.status_code == 200
+    [hit] = response.json()
+    assert "<script>" not in hit["highlights"]["title"]
+    assert hit["highlights"]["title"] == "&lt;script&gt;alert(1)&lt;/script&gt; <mark>Tanker</mark> seized"
+    assert hit["highlights"]["description"] == "A <mark>tanker</mark> was boarded &lt;b&gt;near&lt;/b&gt; the strait."
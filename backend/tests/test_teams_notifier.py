@@ -0,0 +1,40 @@
+import asyncio
+from datetime import datetime, timezone
+
+import httpx
+
+from app.schemas import Threat
+from app.services import teams_notifier
+
+
+def make_threat() -> Threat:
+    return Threat(
+        id=1, title="Drone attack", source_urls=["https://example.com/a"], region="Red Sea",
+        category="Security", description="A drone struck a tanker.", potential_impact="Delays.",
+        date_mentioned="2026-10-01", created_at=datetime.now(timezone.utc),
+    )
+
+
+def test_retry_after_longer_than_backoff_max_counts_as_a_failed_attempt(monkeypatch):
+    sleeps = []
+
+    async def fake_sleep(delay):
+        sleeps.append(delay)
+
+    def rate_limited(request):
+        return httpx.Response(429, headers={"Retry-After": "3600"})
+
+    async def scenario():
+        dispatcher = teams_notifier.TeamsDispatcher(
+            webhook_url="https://teams.example.com/webhook", max_retries=2, backoff_max=5.0
+        )
+        dispatcher._client = httpx.AsyncClient(transport=httpx.MockTransport(rate_limited))
+        monkeypatch.setattr(teams_notifier.asyncio, "sleep", fake_sleep)
+        await dispatcher._send([make_threat()])
+        await dispatcher._client.aclose()
+        return dispatcher
+
+    dispatcher = asyncio.run(scenario())
+    assert sleeps == [5.0, 5.0]
+    assert dispatcher.retries == 2
+    assert dispatcher.failed == 1 and dispatcher.sent == 0